@@ -0,0 +1,144 @@
+"""Routes d'administration de la plateforme (superutilisateurs uniquement)."""
+
+import os
+import tracemalloc
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.dependencies import get_db, get_current_superuser
+from app.core.memory import current_rss, memory_accountant, peak_rss
+from app.core.profiling import profiling_control
+from app.models.user import User
+from app.schemas.admin import (
+    AuditEventResponse,
+    AuditVerification,
+    MemoryReport,
+    MemorySettings,
+    ProfilingSettings,
+    ProfilingStatus,
+)
+from app.schemas.pharmacy import PharmacyQuota, PharmacyQuotaUpdate
+from app.services.audit_service import AuditService
+from app.services.pharmacy_service import PharmacyService
+from app.services.stats_service import QuotaLimits
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+RECENT_PROFILES = 20
+
+
+def _profiling_status() -> ProfilingStatus:
+    recent = []
+    if os.path.isdir(settings.PROFILING_OUTPUT_DIR):
+        names = (name for name in os.listdir(settings.PROFILING_OUTPUT_DIR) if name.endswith(".folded"))
+        recent = sorted(names, reverse=True)[:RECENT_PROFILES]
+    return ProfilingStatus(
+        enabled=settings.PROFILING_ENABLED,
+        sample_rate=profiling_control.sample_rate,
+        header_enabled=bool(profiling_control.header_token),
+        output_dir=settings.PROFILING_OUTPUT_DIR,
+        recent_profiles=recent,
+    )
+
+
+@router.get("/profiling", response_model=ProfilingStatus)
+def get_profiling(current_user: User = Depends(get_current_superuser)):
+    """État du profilage et derniers profils écrits."""
+    return _profiling_status()
+
+
+@router.put("/profiling", response_model=ProfilingStatus)
+def update_profiling(
+    profiling: ProfilingSettings,
+    current_user: User = Depends(get_current_superuser),
+):
+    """Modifier à chaud la fraction de requêtes profilées (processus courant)."""
+    profiling_control.sample_rate = profiling.sample_rate
+    return _profiling_status()
+
+
+def _memory_report(limit: int) -> MemoryReport:
+    traced_current = traced_peak = None
+    if tracemalloc.is_tracing():
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+    return MemoryReport(
+        pid=os.getpid(),
+        rss_bytes=current_rss(),
+        peak_rss_bytes=peak_rss(),
+        tracemalloc=memory_accountant.tracing,
+        traced_current_bytes=traced_current,
+        traced_peak_bytes=traced_peak,
+        recorded_requests=len(memory_accountant),
+        heaviest=[record._asdict() for record in memory_accountant.heaviest(limit)],
+    )
+
+
+@router.get("/memory", response_model=MemoryReport)
+def get_memory(
+    limit: int = Query(settings.MEMORY_TOP_REQUESTS, ge=1, le=1000),
+    current_user: User = Depends(get_current_superuser),
+):
+    """Mémoire du processus et requêtes récentes les plus lourdes (worker courant)."""
+    return _memory_report(limit)
+
+
+@router.put("/memory", response_model=MemoryReport)
+def update_memory(
+    memory: MemorySettings,
+    current_user: User = Depends(get_current_superuser),
+):
+    """Activer ou désactiver à chaud le pic tracemalloc par requête (processus courant)."""
+    memory_accountant.set_tracing(memory.tracemalloc)
+    return _memory_report(settings.MEMORY_TOP_REQUESTS)
+
+
+@router.put("/pharmacies/{pharmacy_id}/quota", response_model=PharmacyQuota)
+def update_pharmacy_quota(
+    pharmacy_id: int,
+    quota: PharmacyQuotaUpdate,
+    current_user: User = Depends(get_current_superuser),
+    db: Session = Depends(get_db),
+):
+    """Définir les quotas d'une pharmacie ; retourne les quotas effectifs."""
+    try:
+        pharmacy = PharmacyService(db).update_quota(pharmacy_id, quota)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    return QuotaLimits.for_pharmacy(pharmacy)._asdict()
+
+
+@router.get("/audit", response_model=list[AuditEventResponse])
+def list_audit_events(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    pharmacy_id: Optional[int] = None,
+    action: Optional[str] = None,
+    document_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_superuser),
+    db: Session = Depends(get_db),
+):
+    """Journal d'audit sur une plage de dates, du plus récent au plus ancien."""
+    return AuditService(db).list_events(
+        start=start,
+        end=end,
+        pharmacy_id=pharmacy_id,
+        action=action,
+        document_id=document_id,
+        limit=limit,
+    )
+
+
+@router.get("/audit/verify", response_model=AuditVerification)
+def verify_audit_chain(
+    from_sequence: Optional[int] = Query(None, ge=1),
+    to_sequence: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(get_current_superuser),
+    db: Session = Depends(get_db),
+):
+    """Vérifier l'intégrité du chaînage du journal d'audit."""
+    return AuditService(db).verify(from_sequence=from_sequence, to_sequence=to_sequence)
@@ -6,9 +6,11 @@ Routes d'authentification
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.dependencies import get_db, get_current_user
-from app.schemas.auth import LoginRequest, TokenResponse, RegisterRequest, UserProfileResponse
+from app.core.admission import admission
+from app.core.dependencies import get_db, get_read_db, get_current_read_user
+from app.schemas.auth import LoginRequest, TokenResponse, RegisterRequest, RefreshRequest, UserProfileResponse
 from app.services.auth_service import AuthService
 from app.models.user import User
 
@@ -31,17 +33,20 @@ async def login(
     """
     auth_service = AuthService(db)
     
-    try:
-        result = auth_service.authenticate(
-            email=form_data.username,
-            password=form_data.password
-        )
-        return result
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Email ou mot de passe incorrect"
-        )
+    async with admission.slot("auth"):
+        try:
+            # bcrypt hors de la boucle d'événements
+            result = await run_in_threadpool(
+                auth_service.authenticate,
+                email=form_data.username,
+                password=form_data.password
+            )
+            return result
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Email ou mot de passe incorrect"
+            )
 
 
 @router.post("/register", response_model=TokenResponse)
@@ -52,24 +57,55 @@ async def register(
     """Inscription d'un pharmacien avec code pharmacie"""
     auth_service = AuthService(db)
     
+    async with admission.slot("auth"):
+        try:
+            result = await run_in_threadpool(
+                auth_service.register,
+                email=user_data.email,
+                password=user_data.password,
+                full_name=user_data.full_name,
+                pharmacy_code=user_data.pharmacy_code
+            )
+            return result
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(
+    payload: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Renouveler le token d'accès à partir d'un refresh token (sans mot de passe)"""
+    auth_service = AuthService(db)
+    
     try:
-        result = auth_service.register(
-            email=user_data.email,
-            password=user_data.password,
-            full_name=user_data.full_name,
-            pharmacy_code=user_data.pharmacy_code
-        )
-        return result
+        return auth_service.refresh(payload.refresh_token)
     except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
 
 
+@router.post("/logout")
+async def logout(
+    payload: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Révoquer la session associée au refresh token"""
+    auth_service = AuthService(db)
+    auth_service.logout(payload.refresh_token)
+    return {"message": "Déconnexion effectuée"}
+
+
 @router.get("/profile", response_model=UserProfileResponse)
 async def get_profile(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Récupérer les informations du pharmacien connecté et sa pharmacie."""
-    return current_user
+    return AuthService(db).get_profile(current_user.id)
@@ -3,10 +3,18 @@
 Routes de gestion des codes/QR codes
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
 
-from app.core.dependencies import get_db, get_current_user
+from app.core.dependencies import get_db, get_read_db, get_current_read_user, get_current_user
+from app.core.idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyConflict,
+    fingerprint_request,
+    idempotency_store,
+)
 from app.schemas.code import CodeCreate, CodeResponse
 from app.services.code_service import CodeService
 from app.models.user import User
@@ -17,23 +25,43 @@ router = APIRouter(prefix="/codes", tags=["codes"])
 @router.post("/generate", response_model=CodeResponse)
 async def generate_code(
     code_data: CodeCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Générer un nouveau code de transfert
     
-    Nécessite authentification (pharmacien)
+    Nécessite authentification (pharmacien).
+    L'en-tête Idempotency-Key évite de créer plusieurs codes lors des réessais.
     """
     code_service = CodeService(db)
     
-    code = code_service.create_code(
-        user_id=current_user.id,
-        pharmacy_id=current_user.pharmacy_id,
-        expiration_hours=code_data.expiration_hours
-    )
+    async def handler():
+        code = await run_in_threadpool(
+            code_service.create_code,
+            user_id=current_user.id,
+            pharmacy_id=current_user.pharmacy_id,
+            expiration_hours=code_data.expiration_hours
+        )
+        return CodeResponse.model_validate(code).model_dump(mode="json")
+    
+    try:
+        result, replayed = await idempotency_store.execute(
+            f"codes.generate:{current_user.id}",
+            idempotency_key,
+            fingerprint_request(code_data.expiration_hours),
+            handler
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return code
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 
 @router.post("/validate")
@@ -61,8 +89,8 @@ async def validate_code(
 
 @router.get("/active", response_model=list[CodeResponse])
 async def get_active_codes(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Récupérer tous les codes actifs du pharmacien"""
     code_service = CodeService(db)
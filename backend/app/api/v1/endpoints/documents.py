@@ -3,46 +3,113 @@
 Routes de gestion des documents
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-import io
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timedelta
+from typing import Optional
 
-from app.core.dependencies import get_db, get_current_user
-from app.schemas.document import DocumentResponse, DocumentList
+from app.core.admission import admission
+from app.core.config import settings
+from app.core.dependencies import get_db, get_read_db, get_current_read_user, get_current_user
+from app.core.idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyConflict,
+    fingerprint_request,
+    idempotency_store,
+)
+from app.core.security import create_signed_token, verify_signed_token
+from app.schemas.document import (
+    DocumentDownloadUrl,
+    DocumentResponse,
+    DocumentList,
+    DocumentMarkViewed,
+    DocumentMarkViewedResponse,
+    DocumentSearchResponse,
+)
 from app.services.document_service import DocumentService
+from app.services.stats_service import QuotaExceededError
 from app.models.user import User
+from app.utils.file_handler import read_upload, staged_file_path
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+DOWNLOAD_TOKEN_PURPOSE = "document-download"
+
+
+def _attachment_headers(filename: str) -> dict:
+    return {"Content-Disposition": f"attachment; filename={filename}"}
+
+
+def _accel_redirect(staged_name: str, filename: str, mime_type: Optional[str]) -> Response:
+    """Réponse vide : Nginx sert le fichier en transit depuis sa location interne"""
+    return Response(
+        media_type=mime_type,
+        headers={
+            **_attachment_headers(filename),
+            "X-Accel-Redirect": f"{settings.DOWNLOAD_ACCEL_PREFIX}{staged_name}",
+            "Cache-Control": "no-store",
+        }
+    )
+
 
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
+    response: Response,
     code: str = Form(...),
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
     db: Session = Depends(get_db)
 ):
     """
     Upload d'un document par un patient
     
-    Accessible sans authentification (utilise le code)
+    Accessible sans authentification (utilise le code).
+    L'en-tête Idempotency-Key permet de rejouer un upload sans le dupliquer.
     """
     document_service = DocumentService(db)
     
     try:
-        # Lire le contenu du fichier
-        content = await file.read()
-        
-        # Upload et chiffrement
-        document = document_service.upload_document(
-            code=code,
-            filename=file.filename,
-            content=content,
-            content_type=file.content_type
+        # Lire le contenu du fichier (type vérifié sur le premier bloc, taille bornée)
+        upload = await read_upload(
+            file,
+            max_size=settings.MAX_FILE_SIZE_MB * 1024 * 1024,
+            allowed_extensions=settings.ALLOWED_EXTENSIONS.split(',')
         )
         
-        return document
+        async def handler():
+            # Upload et chiffrement (corps déjà reçu : seul le calcul occupe une place)
+            async with admission.slot("upload"):
+                document = await run_in_threadpool(
+                    document_service.upload_document,
+                    code=code,
+                    filename=file.filename,
+                    content=upload.content,
+                    content_hash=upload.content_hash
+                )
+            return DocumentResponse.model_validate(document).model_dump(mode="json")
+        
+        fingerprint = None
+        if idempotency_key:
+            fingerprint = fingerprint_request(code, file.filename, upload.content_hash)
+        result, replayed = await idempotency_store.execute(
+            "documents.upload", idempotency_key, fingerprint, handler
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return result
     
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except QuotaExceededError as e:
+        if e.retry_after is not None:
+            raise HTTPException(
+                status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+            )
+        raise HTTPException(status_code=403, detail=str(e))
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -51,8 +118,8 @@ async def upload_document(
 
 @router.get("", response_model=DocumentList)
 async def get_documents(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
 ):
     """Récupérer tous les documents de la pharmacie"""
     document_service = DocumentService(db)
@@ -67,6 +134,58 @@ async def get_documents(
     }
 
 
+@router.get("/search", response_model=DocumentSearchResponse)
+async def search_documents(
+    filename: Optional[str] = Query(None, max_length=255, description="Fragment du nom de fichier"),
+    file_type: Optional[str] = Query(None, max_length=10),
+    uploaded_from: Optional[datetime] = None,
+    uploaded_to: Optional[datetime] = None,
+    is_viewed: Optional[bool] = None,
+    code: Optional[str] = Query(None, max_length=6),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db)
+):
+    """Rechercher les documents de la pharmacie par métadonnées"""
+    document_service = DocumentService(db)
+    
+    try:
+        documents, next_cursor = document_service.search_documents(
+            pharmacy_id=current_user.pharmacy_id,
+            filename=filename,
+            file_type=file_type,
+            uploaded_from=uploaded_from,
+            uploaded_to=uploaded_to,
+            is_viewed=is_viewed,
+            code=code,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"documents": documents, "next_cursor": next_cursor}
+
+
+@router.post("/viewed", response_model=DocumentMarkViewedResponse)
+async def mark_documents_viewed(
+    payload: DocumentMarkViewed,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Marquer plusieurs documents comme vus"""
+    document_service = DocumentService(db)
+    
+    updated = document_service.mark_viewed(
+        document_ids=payload.document_ids,
+        pharmacy_id=current_user.pharmacy_id,
+        user_id=current_user.id
+    )
+    
+    return {"updated": updated}
+
+
 @router.get("/{document_id}/download")
 async def download_document(
     document_id: int,
@@ -77,25 +196,96 @@ async def download_document(
     document_service = DocumentService(db)
     
     try:
+        if settings.DOWNLOAD_OFFLOAD_ENABLED:
+            # Déchiffrement vers le tmpfs, puis Nginx sert les octets
+            async with admission.slot("download"):
+                document, staged_name = await run_in_threadpool(
+                    document_service.stage_download,
+                    document_id=document_id,
+                    pharmacy_id=current_user.pharmacy_id,
+                    user_id=current_user.id
+                )
+            return _accel_redirect(staged_name, document.original_filename, document.mime_type)
+        
         # Récupérer et déchiffrer
-        document, decrypted_content = document_service.download_document(
-            document_id=document_id,
-            pharmacy_id=current_user.pharmacy_id
-        )
+        # Déchiffrement hors de la boucle d'événements
+        async with admission.slot("download"):
+            document, chunks = await run_in_threadpool(
+                document_service.stream_document,
+                document_id=document_id,
+                pharmacy_id=current_user.pharmacy_id,
+                user_id=current_user.id
+            )
         
-        # Retourner le fichier
+        # Retourner le fichier (décompression par blocs, dans le pool de threads ;
+        # la place est déjà rendue, un client lent ne bloque pas les autres)
         return StreamingResponse(
-            io.BytesIO(decrypted_content),
+            chunks,
             media_type=document.mime_type,
-            headers={
-                "Content-Disposition": f"attachment; filename={document.original_filename}"
-            }
+            headers=_attachment_headers(document.original_filename)
         )
     
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.post("/{document_id}/download-url", response_model=DocumentDownloadUrl)
+async def create_download_url(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Générer une URL de téléchargement signée, valable DOWNLOAD_URL_TTL_SECONDS
+    
+    Le document est déchiffré une fois dans le répertoire de transit ; l'URL
+    peut ensuite être ouverte sans en-tête Authorization (nouvel onglet, lien).
+    """
+    document_service = DocumentService(db)
+    
+    try:
+        async with admission.slot("download"):
+            document, staged_name = await run_in_threadpool(
+                document_service.stage_download,
+                document_id=document_id,
+                pharmacy_id=current_user.pharmacy_id,
+                user_id=current_user.id
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    ttl = settings.DOWNLOAD_URL_TTL_SECONDS
+    token = create_signed_token(
+        {"f": staged_name, "n": document.original_filename, "m": document.mime_type},
+        expires_in=ttl,
+        purpose=DOWNLOAD_TOKEN_PURPOSE
+    )
+    return {
+        "url": f"/api/documents/signed/{token}",
+        "expires_at": datetime.utcnow() + timedelta(seconds=ttl)
+    }
+
+
+@router.get("/signed/{token}")
+async def download_signed(token: str):
+    """Télécharger via une URL signée (sans authentification, jusqu'à expiration)"""
+    payload = verify_signed_token(token, DOWNLOAD_TOKEN_PURPOSE)
+    if payload is None:
+        raise HTTPException(status_code=403, detail="Lien de téléchargement invalide ou expiré")
+    
+    path = staged_file_path(settings.DOWNLOAD_STAGING_DIR, payload["f"])
+    if path is None:
+        raise HTTPException(status_code=404, detail="Lien de téléchargement expiré")
+    
+    if settings.DOWNLOAD_OFFLOAD_ENABLED:
+        return _accel_redirect(payload["f"], payload["n"], payload["m"])
+    return FileResponse(
+        path,
+        media_type=payload["m"],
+        headers={**_attachment_headers(payload["n"]), "Cache-Control": "no-store"}
+    )
+
+
 @router.delete("/{document_id}")
 async def delete_document(
     document_id: int,
@@ -108,7 +298,8 @@ async def delete_document(
     try:
         document_service.delete_document(
             document_id=document_id,
-            pharmacy_id=current_user.pharmacy_id
+            pharmacy_id=current_user.pharmacy_id,
+            user_id=current_user.id
         )
         return {"message": "Document supprimé avec succès"}
     
@@ -1,23 +1,62 @@
 """Routes pour la gestion des pharmacies."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.dependencies import get_db
-from app.schemas.pharmacy import PharmacyCreate, PharmacyResponse
+from app.core.admission import admission
+from app.core.dependencies import get_db, get_read_db, get_current_read_user, get_current_superuser
+from app.models.user import User
+from app.schemas.pharmacy import (
+    PharmacyCreate,
+    PharmacyImportReport,
+    PharmacyResponse,
+    PharmacyStatsResponse,
+)
 from app.services.pharmacy_service import PharmacyService
+from app.services.stats_service import StatsService
 
 router = APIRouter(prefix="/pharmacies", tags=["pharmacies"])
 
 
 @router.post("", response_model=PharmacyResponse, status_code=status.HTTP_201_CREATED)
-def create_pharmacy(
+async def create_pharmacy(
     pharmacy_data: PharmacyCreate,
     db: Session = Depends(get_db),
 ):
     """Créer un nouveau tenant pharmacie (accessible sans authentification)."""
     service = PharmacyService(db)
     try:
-        return service.create_pharmacy(pharmacy_data)
+        # Hachage du mot de passe du propriétaire : travail limité comme une inscription
+        async with admission.slot("auth"):
+            return await run_in_threadpool(service.create_pharmacy, pharmacy_data)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+@router.get("/me/stats", response_model=PharmacyStatsResponse)
+def get_pharmacy_stats(
+    current_user: User = Depends(get_current_read_user),
+    db: Session = Depends(get_read_db),
+):
+    """Compteurs du tableau de bord et consommation des quotas de la pharmacie."""
+    return StatsService(db).get_usage(current_user.pharmacy_id)
+
+
+@router.post("/import", response_model=PharmacyImportReport)
+async def import_pharmacies(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_superuser),
+    db: Session = Depends(get_db),
+):
+    """Importer un groupe de pharmacies depuis un CSV (administrateurs uniquement).
+
+    Colonnes : name, city, postal_code, phone, address, email,
+    owner_full_name, owner_email, owner_password.
+    """
+    service = PharmacyService(db)
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""))
+    return await run_in_threadpool(service.bulk_import, reader)
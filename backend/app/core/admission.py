@@ -0,0 +1,130 @@
+# backend/app/core/admission.py
+"""
+Contrôle d'admission : concurrence bornée et délestage du travail coûteux en CPU
+
+Le chiffrement des uploads, le déchiffrement des téléchargements et le hachage
+des mots de passe (connexion, inscription) passent chacun par un limiteur dédié
+avec une file d'attente bornée en taille et en durée. Au-delà, la requête reçoit
+immédiatement un 503 avec Retry-After. Seul le calcul est limité : un client
+lent (corps envoyé ou réponse lue au débit mobile) n'occupe pas de place.
+Les autres requêtes (healthcheck, lectures du tableau de bord) ne sont jamais
+mises en file : elles forment la voie prioritaire.
+
+Les limiteurs sont propres à chaque processus : derrière app.server, la capacité
+totale d'une voie est SERVER_WORKERS x ADMISSION_*_CONCURRENCY (et autant de
+files de ADMISSION_MAX_QUEUE). Dimensionner les valeurs par worker.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+ADMISSION_IN_FLIGHT = registry.gauge(
+    "santhium_admission_in_flight", "Requêtes en cours par classe d'endpoint"
+)
+ADMISSION_QUEUED = registry.gauge(
+    "santhium_admission_queued", "Requêtes en attente par classe d'endpoint"
+)
+ADMISSION_REJECTED = registry.counter(
+    "santhium_admission_rejected_total", "Requêtes délestées (503) par classe et motif"
+)
+ADMISSION_QUEUE_SECONDS = registry.histogram(
+    "santhium_admission_queue_seconds", "Temps d'attente avant admission"
+)
+
+
+class AdmissionRejected(Exception):
+    """Le limiteur est saturé"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """Limiteur de concurrence avec file d'attente bornée"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self):
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            ADMISSION_REJECTED.inc(endpoint=self.name, reason="queue_full")
+            raise AdmissionRejected("queue_full")
+
+        started = time.monotonic()
+        self.queued += 1
+        ADMISSION_QUEUED.set(self.queued, endpoint=self.name)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTED.inc(endpoint=self.name, reason="queue_timeout")
+            raise AdmissionRejected("queue_timeout")
+        finally:
+            self.queued -= 1
+            ADMISSION_QUEUED.set(self.queued, endpoint=self.name)
+
+        ADMISSION_QUEUE_SECONDS.observe(time.monotonic() - started, endpoint=self.name)
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight, endpoint=self.name)
+
+    def release(self):
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight, endpoint=self.name)
+        self._semaphore.release()
+
+
+class Admission:
+    """Limiteurs par classe de travail coûteux"""
+
+    def __init__(self):
+        queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        self.limiters = {
+            name: ConcurrencyLimiter(name, concurrency, settings.ADMISSION_MAX_QUEUE, queue_timeout)
+            for name, concurrency in (
+                ("upload", settings.ADMISSION_UPLOAD_CONCURRENCY),
+                ("download", settings.ADMISSION_DOWNLOAD_CONCURRENCY),
+                ("auth", settings.ADMISSION_AUTH_CONCURRENCY),
+            )
+        }
+
+    @asynccontextmanager
+    async def slot(self, name: str):
+        """
+        Réserver une place pour le travail CPU d'une requête (503 si saturé).
+
+        À placer autour de l'appel au service seulement : ni la réception du
+        corps ni l'envoi de la réponse n'occupent de place.
+        """
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            yield
+            return
+
+        limiter = self.limiters[name]
+        try:
+            await limiter.acquire()
+        except AdmissionRejected:
+            raise HTTPException(
+                status_code=503,
+                detail="Service momentanément surchargé, veuillez réessayer",
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+        try:
+            yield
+        finally:
+            limiter.release()
+
+
+admission = Admission()
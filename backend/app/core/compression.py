@@ -0,0 +1,82 @@
+# backend/app/core/compression.py
+"""
+Compression des contenus avant chiffrement (un contenu chiffré n'est plus compressible)
+
+Le codec utilisé est enregistré avec chaque contenu : "none" ou "zstd". La
+décision est prise sur un échantillon du début du fichier, pour un coût constant.
+"""
+
+from typing import Iterator, Optional
+import io
+
+import zstandard
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+CODEC_NONE = "none"
+CODEC_ZSTD = "zstd"
+
+SAMPLE_BYTES = 64 * 1024
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Formats déjà compressés : jamais recompressés
+INCOMPRESSIBLE_MIME_TYPES = {"image/jpeg"}
+
+COMPRESSION_BYTES = registry.counter(
+    "santhium_compression_bytes_total", "Octets avant (in) et après (out) compression"
+)
+
+
+def choose_codec(content: bytes, mime_type: Optional[str] = None) -> str:
+    """Codec à utiliser : zstd si l'échantillon se compresse suffisamment"""
+    if not settings.COMPRESSION_ENABLED or mime_type in INCOMPRESSIBLE_MIME_TYPES:
+        return CODEC_NONE
+    sample = content[:SAMPLE_BYTES]
+    if not sample:
+        return CODEC_NONE
+    # Niveau 1 : estimation rapide, le niveau réel ne fait que l'améliorer
+    compressed = zstandard.ZstdCompressor(level=1).compress(sample)
+    if len(sample) / len(compressed) < settings.COMPRESSION_MIN_RATIO:
+        return CODEC_NONE
+    return CODEC_ZSTD
+
+
+def compress(content: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    """Compresser un contenu avec le codec demandé"""
+    if codec == CODEC_NONE:
+        return content
+    if codec == CODEC_ZSTD:
+        compressed = zstandard.ZstdCompressor(
+            level=level or settings.COMPRESSION_ZSTD_LEVEL
+        ).compress(content)
+        COMPRESSION_BYTES.inc(len(content), codec=codec, direction="in")
+        COMPRESSION_BYTES.inc(len(compressed), codec=codec, direction="out")
+        return compressed
+    raise ValueError(f"Codec de compression inconnu: {codec}")
+
+
+def decompress(data: bytes, codec: Optional[str]) -> bytes:
+    """Décompresser un contenu (codec NULL : contenu historique non compressé)"""
+    if codec in (None, CODEC_NONE):
+        return data
+    if codec == CODEC_ZSTD:
+        # La taille d'origine est inscrite dans la trame zstd
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Codec de compression inconnu: {codec}")
+
+
+def decompress_stream(data: bytes, codec: Optional[str]) -> Iterator[bytes]:
+    """Décompresser par blocs, sans matérialiser le contenu complet en mémoire"""
+    if codec in (None, CODEC_NONE):
+        view = memoryview(data)
+        for offset in range(0, len(view), STREAM_CHUNK_SIZE):
+            yield bytes(view[offset:offset + STREAM_CHUNK_SIZE])
+        return
+    if codec == CODEC_ZSTD:
+        yield from zstandard.ZstdDecompressor().read_to_iter(
+            io.BytesIO(data), read_size=STREAM_CHUNK_SIZE, write_size=STREAM_CHUNK_SIZE
+        )
+        return
+    raise ValueError(f"Codec de compression inconnu: {codec}")
@@ -16,14 +16,34 @@ class Settings(BaseSettings):
     
     # Base de données
     DATABASE_URL: str
+    DATABASE_REPLICA_URL: Optional[str] = None  # Réplica pour les lectures du tableau de bord
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+    REPLICA_MARKER_REFRESH_SECONDS: float = 1.0  # Rechargement des écritures des autres workers
     
     # Sécurité
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REVOCATION_CACHE_SECONDS: int = 30
+    
+    # Hachage des mots de passe (calibrer avec scripts/calibrate_password_hash.py)
+    PASSWORD_HASH_SCHEMES: str = "bcrypt"  # Le premier schéma hache, les autres sont migrés
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KB: int = 65536
+    ARGON2_PARALLELISM: int = 2
     
     # Chiffrement
     ENCRYPTION_KEY: str
+    ENCRYPTION_KEYS: str = ""  # Trousseau versionné "id:clé,id:clé" (rotation)
+    ENCRYPTION_ACTIVE_KEY_ID: str = ""  # Par défaut : première clé du trousseau
+    REENCRYPTION_RATE_MB_PER_SECOND: float = 5.0
+    ENCRYPTION_SEGMENT_SIZE_KB: int = 1024  # Segments authentifiés indépendants
+    ENCRYPTION_PARALLEL_THRESHOLD_KB: int = 2048  # En dessous : un seul jeton Fernet
+    ENCRYPTION_WORKERS: int = 0  # Pool partagé de chiffrement, 0 = nombre de cœurs
     
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000"
@@ -32,15 +52,113 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE_MB: int = 10
     ALLOWED_EXTENSIONS: str = "pdf,jpg,jpeg,png"
     UPLOAD_FOLDER: str = "/app/uploads"
+    VIEW_FLUSH_INTERVAL_MS: int = 250
+    
+    # Téléchargements servis par Nginx (X-Accel-Redirect) depuis un tmpfs partagé
+    DOWNLOAD_OFFLOAD_ENABLED: bool = False
+    DOWNLOAD_STAGING_DIR: str = "/app/downloads"
+    DOWNLOAD_ACCEL_PREFIX: str = "/protected-downloads/"  # Location « internal » de Nginx
+    DOWNLOAD_URL_TTL_SECONDS: int = 60
     
     # RGPD/HDS
     DATA_RETENTION_DAYS: int = 30
     AUTO_DELETE_ENABLED: bool = True
     CODE_EXPIRATION_HOURS: int = 1
+    CLEANUP_INTERVAL_MINUTES: int = 60
+    STATS_RECONCILE_INTERVAL_MINUTES: int = 10
+    
+    # Journal d'audit HDS (tampon mémoire écrit par lots, chaîné par empreintes)
+    AUDIT_ENABLED: bool = True
+    AUDIT_BUFFER_SIZE: int = 10000  # Événements en attente au plus (perte maximale sur crash)
+    AUDIT_FLUSH_INTERVAL_MS: int = 500
+    AUDIT_BATCH_SIZE: int = 500  # Lignes par INSERT multi-lignes
+    AUDIT_PARTITIONS_AHEAD: int = 2  # Partitions mensuelles créées à l'avance (PostgreSQL)
+    
+    # Quotas par pharmacie (0 : illimité ; surchargeables par pharmacie)
+    QUOTA_MAX_STORAGE_MB: int = 2048
+    QUOTA_MAX_DOCUMENTS: int = 10000
+    QUOTA_MAX_UPLOADS_PER_HOUR: int = 200
+    
+    # Compression avant chiffrement (zstd, décidée sur un échantillon du fichier)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ZSTD_LEVEL: int = 3  # Niveau bas : débit d'upload prioritaire
+    COMPRESSION_MIN_RATIO: float = 1.1  # Gain minimal sur l'échantillon
+    
+    # Stockage froid : documents vus ou anciens regroupés en segments d'archive
+    COLD_TIER_ENABLED: bool = False
+    COLD_TIER_DIR: str = "/app/cold"
+    COLD_TIER_VIEWED_AFTER_HOURS: int = 24  # Document vu depuis au moins ce délai
+    COLD_TIER_AFTER_DAYS: int = 7  # Document non vu mais ancien
+    COLD_TIER_INTERVAL_MINUTES: int = 60
+    COLD_TIER_BATCH_SIZE: int = 500
+    COLD_TIER_ZSTD_LEVEL: int = 9
+    
+    # Partitionnement PostgreSQL de la table documents ("", "daily" ou "weekly")
+    DOCUMENTS_PARTITIONING: str = ""
+    DOCUMENTS_PARTITIONS_AHEAD: int = 7
+    
+    # Idempotence (rejeu des requêtes mobiles)
+    IDEMPOTENCY_BACKEND: str = "database"  # "database" (partagé entre workers) ou "memory" (un seul processus)
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_LOCK_SECONDS: int = 120  # Bail d'une requête en cours (worker arrêté en route)
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000  # Store "memory" uniquement
+    
+    # Instrumentation SQL par requête (Server-Timing, logs)
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_QUERY_WARNING_THRESHOLD: int = 15  # Alerte N+1 au-delà de ce nombre de requêtes
+    
+    # Profilage à la demande (en-tête X-Profile ou échantillon aléatoire)
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER_TOKEN: str = ""  # Valeur attendue de l'en-tête X-Profile (vide : désactivé)
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction des requêtes profilées (modifiable à chaud)
+    PROFILING_INTERVAL_MS: int = 5
+    PROFILING_OUTPUT_DIR: str = "/app/profiles"
+    PROFILING_TRACE_MEMORY: bool = True
+    PROFILING_MEMORY_FRAMES: int = 1
+    PROFILING_MEMORY_TOP: int = 25
+    
+    # Comptabilité mémoire par requête (RSS avant/après, tracemalloc optionnel)
+    MEMORY_ACCOUNTING_ENABLED: bool = True
+    MEMORY_TRACEMALLOC_ENABLED: bool = False  # Pic Python par requête (modifiable à chaud)
+    MEMORY_RECENT_REQUESTS: int = 1000  # Historique pour le classement des plus lourdes
+    MEMORY_TOP_REQUESTS: int = 20
+    MEMORY_WARNING_THRESHOLD_MB: int = 50  # Log au-delà (0 : jamais)
+    
+    # Chien de garde de la boucle d'événements (appels bloquants dans async def)
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_MS: int = 100  # Période du battement
+    LOOP_WATCHDOG_THRESHOLD_MS: int = 250  # Blocage au-delà duquel la pile est capturée
+    LOOP_WATCHDOG_STACK_DEPTH: int = 30
     
     # Rate limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
+    # Contrôle d'admission (endpoints coûteux en CPU)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_UPLOAD_CONCURRENCY: int = 4
+    ADMISSION_DOWNLOAD_CONCURRENCY: int = 8
+    ADMISSION_AUTH_CONCURRENCY: int = 4
+    ADMISSION_MAX_QUEUE: int = 32  # Requêtes en attente par classe
+    ADMISSION_QUEUE_TIMEOUT_MS: int = 2000
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+    
+    # Métriques Prometheus (/metrics) : jeton Bearer exigé, sinon boucle locale uniquement
+    METRICS_TOKEN: str = ""
+    
+    # Serveur de production (python -m app.server : Gunicorn + workers Uvicorn)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 : un worker par cœur disponible
+    SERVER_PRELOAD: bool = True  # Application chargée avant le fork (mémoire partagée)
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 75  # Supérieur au keepalive du proxy
+    SERVER_LIMIT_CONCURRENCY: int = 1000  # Connexions simultanées par worker (503 au-delà)
+    SERVER_MAX_REQUESTS: int = 10000  # Recyclage d'un worker après N requêtes (0 : jamais)
+    SERVER_MAX_REQUESTS_JITTER: int = 1000  # Évite le recyclage simultané des workers
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    BACKGROUND_TASKS_ENABLED: bool = True  # Tâches de maintenance dans ce processus
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
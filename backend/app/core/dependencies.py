@@ -3,19 +3,36 @@
 Dépendances FastAPI (injection de dépendances)
 """
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+import hmac
 
-from app.db.session import SessionLocal
+from app.db.routing import replica_router
+from app.db.session import SessionLocal, ReplicaSessionLocal
 from app.core.config import settings
+from app.core.revocation import revocation_cache
+from app.crud.user import UserRepository
 from app.models.user import User
 
 
 # Indique le point d'obtention du token pour Swagger / OAuth2 password flow
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+LOOPBACK_HOSTS = {"127.0.0.1", "::1"}
+
+
+def is_internal_caller(scope: dict) -> bool:
+    """
+    Appelant interne : connexion locale ou administrateur authentifié
+    (marqué par get_current_user dans l'état de la requête)
+    """
+    client = scope.get("client")
+    if client is not None and client[0] in LOOPBACK_HOSTS:
+        return True
+    return bool(scope.get("state", {}).get("is_superuser"))
+
 
 def get_db():
     """Dépendance pour obtenir une session DB"""
@@ -26,31 +43,100 @@ def get_db():
         db.close()
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Récupérer l'utilisateur courant depuis le token JWT"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les identifiants",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    """Claims du token JWT (décodé une fois par requête)"""
     try:
         payload = jwt.decode(
             token, 
             settings.SECRET_KEY, 
             algorithms=[settings.ALGORITHM]
         )
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+
+def _authenticate(request: Request, payload: dict, db: Session) -> User:
+    # Session révoquée (déconnexion) : liste en cache, pas de requête par appel
+    session_id = payload.get("sid")
+    if session_id and revocation_cache.is_revoked(session_id, db):
+        raise _credentials_exception()
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = UserRepository(db).get(payload["sub"])
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
+    # Diagnostics internes (Server-Timing) réservés aux administrateurs
+    request.state.is_superuser = user.is_superuser
     return user
+
+
+async def get_current_user(
+    request: Request,
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+) -> User:
+    """Récupérer l'utilisateur courant depuis le token JWT"""
+    return _authenticate(request, payload, db)
+
+
+async def get_current_superuser(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """Restreindre l'accès aux administrateurs de la plateforme"""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès réservé aux administrateurs"
+        )
+    return current_user
+
+
+def require_metrics_access(request: Request):
+    """Métriques internes : jeton METRICS_TOKEN, ou à défaut connexion locale seulement"""
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}".encode("latin-1")
+        provided = request.headers.get("authorization", "").encode("latin-1")
+        if hmac.compare_digest(provided, expected):
+            return
+    elif request.client is not None and request.client.host in LOOPBACK_HOSTS:
+        return
+    raise HTTPException(status_code=404, detail="Not Found")
+
+
+def get_read_db(
+    payload: dict = Depends(get_token_payload)
+):
+    """
+    Session de lecture pour la pharmacie connectée : réplica si possible, primaire sinon.
+    
+    La pharmacie est lue dans le token (claim pid) : le routage ne coûte aucune
+    requête au primaire. Token émis sans ce claim : primaire.
+    """
+    if "pid" in payload and replica_router.use_replica(payload["pid"]):
+        db = ReplicaSessionLocal()
+    else:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_current_read_user(
+    request: Request,
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_read_db)
+) -> User:
+    """Utilisateur courant lu sur la session de lecture (lectures du tableau de bord)"""
+    return _authenticate(request, payload, db)
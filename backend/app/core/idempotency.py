@@ -0,0 +1,263 @@
+# backend/app/core/idempotency.py
+"""
+Gestion des clés d'idempotence (en-tête Idempotency-Key) pour les requêtes rejouées
+
+Deux stores de même interface :
+- "database" (par défaut) : table idempotency_keys, partagée entre les workers
+  de app.server ; un rejeu arrivé sur un autre worker attend ou rejoue la
+  réponse au lieu d'exécuter la requête une seconde fois ;
+- "memory" : propre au processus, réservé à un serveur mono-worker.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """La clé a déjà été utilisée pour une requête différente"""
+
+
+def fingerprint_request(*parts: Any) -> str:
+    """Empreinte compacte des éléments significatifs d'une requête"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class _Entry:
+    """Entrée du store : requête en cours puis réponse mémorisée"""
+
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: str, future: asyncio.Future):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires_at = float("inf")
+
+
+class IdempotencyStore:
+    """Store mémoire borné (TTL + capacité) empreinte -> réponse"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple[str, str], _Entry]" = OrderedDict()
+
+    def _evict(self, now: float):
+        """
+        Retirer les entrées expirées puis les plus anciennes pour laisser la place
+        à une nouvelle entrée sans dépasser la capacité.
+
+        Les réponses sont rangées par ordre d'expiration (placées en fin à la
+        mémorisation, TTL constant) : seules les entrées de tête sont examinées.
+        """
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            over_capacity = len(self._entries) >= self.max_entries
+            if not entry.future.done() or (entry.expires_at > now and not over_capacity):
+                break
+            del self._entries[key]
+
+    async def execute(
+        self,
+        scope: str,
+        key: Optional[str],
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]],
+    ) -> tuple[Any, bool]:
+        """Exécuter le handler une seule fois par clé ; retourne (résultat, rejoué)"""
+        if not key:
+            return await handler(), False
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValueError("Idempotency-Key trop longue")
+
+        now = time.monotonic()
+        self._evict(now)
+
+        store_key = (scope, key)
+        entry = self._entries.get(store_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyConflict(
+                    "Idempotency-Key déjà utilisée pour une requête différente"
+                )
+            # Attendre la requête en cours ou rejouer la réponse mémorisée
+            return await asyncio.shield(entry.future), True
+
+        entry = _Entry(fingerprint, asyncio.get_running_loop().create_future())
+        self._entries[store_key] = entry
+        try:
+            result = await handler()
+        except BaseException as exc:
+            # Les échecs ne sont pas mémorisés : le client peut réessayer
+            self._entries.pop(store_key, None)
+            if isinstance(exc, Exception):
+                entry.future.set_exception(exc)
+                entry.future.exception()  # évite l'avertissement si personne n'attend
+            else:
+                entry.future.cancel()
+            raise
+
+        entry.future.set_result(result)
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        if store_key in self._entries:
+            self._entries.move_to_end(store_key)
+        return result, False
+
+
+class _Claim(NamedTuple):
+    """Issue d'une réclamation : clé obtenue, ou état de la requête qui la détient"""
+    claimed: bool
+    fingerprint: Optional[str] = None
+    response: Any = None
+
+
+class DatabaseIdempotencyStore:
+    """
+    Store partagé en base : la première requête insère la clé (bail de
+    lock_seconds), les suivantes attendent sa réponse en interrogeant la table.
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, ttl_seconds: int, lock_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+
+    def _claim(self, scope: str, key: str, fingerprint: str) -> _Claim:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            # Réponse échue ou bail d'un worker arrêté en cours de route : clé libérée
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at <= now
+            ))
+            db.add(IdempotencyKey(
+                scope=scope,
+                key=key,
+                fingerprint=fingerprint,
+                expires_at=now + timedelta(seconds=self.lock_seconds)
+            ))
+            try:
+                db.commit()
+                return _Claim(True)
+            except IntegrityError:
+                db.rollback()
+            record = db.get(IdempotencyKey, (scope, key))
+            if record is None:
+                # Libérée entre-temps (échec de la requête) : nouvelle tentative
+                return self._claim(scope, key, fingerprint)
+            return _Claim(False, record.fingerprint, record.response)
+        finally:
+            db.close()
+
+    def _complete(self, scope: str, key: str, result: Any):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                .values(
+                    response=result,
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _release(self, scope: str, key: str):
+        db = SessionLocal()
+        try:
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.response.is_(None)
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    async def execute(
+        self,
+        scope: str,
+        key: Optional[str],
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]],
+    ) -> tuple[Any, bool]:
+        """Exécuter le handler une seule fois par clé, tous workers confondus ; retourne (résultat, rejoué)"""
+        if not key:
+            return await handler(), False
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValueError("Idempotency-Key trop longue")
+
+        while True:
+            claim = await asyncio.to_thread(self._claim, scope, key, fingerprint)
+            if claim.claimed:
+                break
+            if claim.fingerprint != fingerprint:
+                raise IdempotencyConflict(
+                    "Idempotency-Key déjà utilisée pour une requête différente"
+                )
+            if claim.response is not None:
+                return claim.response, True
+            # Requête en cours (ce worker ou un autre) : attendre sa réponse
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+        try:
+            result = await handler()
+        except BaseException:
+            # Les échecs ne sont pas mémorisés : le client peut réessayer
+            await asyncio.shield(asyncio.to_thread(self._release, scope, key))
+            raise
+
+        await asyncio.to_thread(self._complete, scope, key, result)
+        return result, False
+
+    def purge_expired(self) -> int:
+        """Supprimer les clés échues (tâche de maintenance)"""
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+
+def create_store():
+    if settings.IDEMPOTENCY_BACKEND == "memory":
+        return IdempotencyStore(
+            ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+            max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+        )
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore(
+            ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+            lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+        )
+    raise ValueError("IDEMPOTENCY_BACKEND doit valoir 'database' ou 'memory'")
+
+
+idempotency_store = create_store()
@@ -0,0 +1,134 @@
+# backend/app/core/loop_watchdog.py
+"""
+Surveillance du retard de la boucle d'événements
+
+Une tâche « battement » dort LOOP_WATCHDOG_INTERVAL_MS et mesure de combien
+elle se réveille en retard (histogramme santhium_event_loop_lag_seconds). Un
+thread de garde vérifie que les battements continuent : si la boucle est
+bloquée depuis plus de LOOP_WATCHDOG_THRESHOLD_MS, il relève la pile du thread
+de la boucle (sys._current_frames) et la route de la requête en cours, puis
+journalise l'appel bloquant (SQL synchrone, bcrypt, chiffrement...).
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.security import redact_path
+
+logger = logging.getLogger("santhium.loop")
+
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LOOP_LAG = registry.histogram(
+    "santhium_event_loop_lag_seconds",
+    "Retard de réveil de la boucle d'événements",
+    buckets=LAG_BUCKETS,
+)
+LOOP_STALLS = registry.histogram(
+    "santhium_event_loop_stall_seconds",
+    "Durée des blocages de la boucle au-delà du seuil, par route",
+    buckets=LAG_BUCKETS,
+)
+
+
+class LoopWatchdog:
+    """Battement dans la boucle et thread de garde qui capture les piles bloquantes"""
+
+    def __init__(self, interval: float, threshold: float, stack_depth: int):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        # Tâche asyncio -> scope ASGI de la requête (voir LoopWatchdogMiddleware)
+        self._requests: dict[asyncio.Task, dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._stall_route: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Requêtes en cours (appelé depuis la boucle)
+
+    def register(self, task: Optional[asyncio.Task], scope: dict):
+        if task is not None:
+            self._requests[task] = scope
+
+    def unregister(self, task: Optional[asyncio.Task]):
+        if task is not None:
+            self._requests.pop(task, None)
+
+    def _current_route(self) -> str:
+        """Route de la tâche en cours d'exécution dans la boucle (lu depuis le thread de garde)"""
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return "inconnue"
+        scope = self._requests.get(task)
+        if scope is None:
+            return f"tâche {task.get_name()}" if task is not None else "hors tâche"
+        route = scope.get("route")
+        return f"{scope['method']} {getattr(route, 'path', None) or redact_path(scope['path'])}"
+
+    # Battement
+
+    async def run(self):
+        """Battement de la boucle ; démarre le thread de garde"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                started = time.monotonic()
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(now - started - self.interval, 0.0)
+                LOOP_LAG.observe(lag)
+                stall_route, self._stall_route = self._stall_route, None
+                if stall_route is not None:
+                    LOOP_STALLS.observe(lag, route=stall_route)
+                    logger.warning("Boucle bloquée %.0f ms au total (%s)", lag * 1000, stall_route)
+                self._last_beat = now
+        finally:
+            self._stop.set()
+
+    # Thread de garde
+
+    def _watch(self):
+        captured_beat = None
+        while not self._stop.wait(self.interval / 2):
+            last_beat = self._last_beat
+            blocked = time.monotonic() - last_beat - self.interval
+            # Une seule capture par blocage
+            if blocked < self.threshold or captured_beat == last_beat:
+                continue
+            captured_beat = last_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            route = self._current_route()
+            self._stall_route = route
+            stack = "".join(traceback.format_stack(frame, limit=self.stack_depth))
+            del frame
+            logger.warning(
+                "Boucle d'événements bloquée depuis %.0f ms (%s) ; pile du thread de la boucle :\n%s",
+                blocked * 1000,
+                route,
+                stack,
+            )
+
+
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL_MS / 1000,
+    threshold=settings.LOOP_WATCHDOG_THRESHOLD_MS / 1000,
+    stack_depth=settings.LOOP_WATCHDOG_STACK_DEPTH,
+)
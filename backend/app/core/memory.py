@@ -0,0 +1,190 @@
+# backend/app/core/memory.py
+"""
+Comptabilité mémoire par requête (diagnostic des OOM)
+
+Pour chaque requête : RSS du processus avant et après, croissance du pic RSS
+(ru_maxrss : la requête a-t-elle repoussé le plafond du processus ?), blocs
+alloués nets et, en option, pic tracemalloc pendant la requête. Les requêtes
+récentes sont conservées dans un tampon borné pour en extraire les plus lourdes.
+
+Le pic tracemalloc est exact pour une requête seule ; en cas de requêtes
+simultanées (exclusive = False), il inclut leurs allocations et n'est qu'un
+majorant. Toutes les valeurs sont propres au processus (un worker).
+"""
+
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.profiling import memory_tracing
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+MEMORY_BUCKETS = tuple(float(2 ** exponent) for exponent in range(16, 30, 2))  # 64 KiB .. 256 MiB
+
+REQUEST_RSS_GROWTH = registry.histogram(
+    "santhium_request_rss_growth_bytes",
+    "Augmentation du RSS du processus pendant une requête",
+    buckets=MEMORY_BUCKETS,
+)
+REQUEST_TRACED_PEAK = registry.histogram(
+    "santhium_request_traced_peak_bytes",
+    "Pic d'allocations Python (tracemalloc) pendant une requête",
+    buckets=MEMORY_BUCKETS,
+)
+PROCESS_RSS = registry.gauge("santhium_process_rss_bytes", "RSS courant du processus")
+PROCESS_PEAK_RSS = registry.gauge("santhium_process_peak_rss_bytes", "Pic de RSS du processus")
+
+
+def current_rss() -> int:
+    """RSS courant (Linux : /proc/self/statm, sans appel système coûteux)"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    """Pic de RSS depuis le démarrage du processus"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kio sous Linux, octets sous macOS
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+class RequestMemory(NamedTuple):
+    """Mesures mémoire d'une requête terminée"""
+    finished_at: datetime
+    method: str
+    route: str
+    status_code: int
+    request_bytes: Optional[int]
+    response_bytes: int
+    duration_ms: float
+    rss_before: int
+    rss_after: int
+    peak_rss_growth: int
+    allocated_blocks: int
+    traced_peak: Optional[int]
+    exclusive: bool
+
+    @property
+    def weight(self) -> int:
+        """Critère de classement : la plus forte des mesures disponibles"""
+        return max(self.traced_peak or 0, self.rss_after - self.rss_before, self.peak_rss_growth)
+
+
+class _Measure(NamedTuple):
+    started: float
+    sequence: int
+    concurrent: int
+    rss: int
+    peak_rss: int
+    blocks: int
+    traced: Optional[int]
+
+
+class MemoryAccountant:
+    """Mesures par requête et historique borné des requêtes récentes"""
+
+    def __init__(self, history: int, tracing: bool = False):
+        self._recent: deque[RequestMemory] = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._sequence = 0
+        self._tracing = False
+        if tracing:
+            self.set_tracing(True)
+
+    @property
+    def tracing(self) -> bool:
+        return self._tracing
+
+    def set_tracing(self, enabled: bool):
+        """Activer ou non le pic tracemalloc par requête (coût : allocations ~2x plus lentes)"""
+        with self._lock:
+            if enabled == self._tracing:
+                return
+            if enabled:
+                memory_tracing.acquire(snapshot=False)
+            else:
+                memory_tracing.release(snapshot=False)
+            self._tracing = enabled
+
+    def begin(self, clock: float) -> _Measure:
+        with self._lock:
+            concurrent = self._inflight
+            self._inflight += 1
+            self._sequence += 1
+            sequence = self._sequence
+            traced = None
+            if self._tracing:
+                # Pic remis à zéro seulement quand aucune autre requête n'est mesurée
+                if concurrent == 0:
+                    tracemalloc.reset_peak()
+                traced = tracemalloc.get_traced_memory()[0]
+        return _Measure(clock, sequence, concurrent, current_rss(), peak_rss(), sys.getallocatedblocks(), traced)
+
+    def end(
+        self,
+        measure: _Measure,
+        clock: float,
+        method: str,
+        route: str,
+        status_code: int,
+        request_bytes: Optional[int],
+        response_bytes: int
+    ) -> RequestMemory:
+        rss = current_rss()
+        peak = peak_rss()
+        blocks = sys.getallocatedblocks()
+        with self._lock:
+            self._inflight -= 1
+            exclusive = measure.concurrent == 0 and self._sequence == measure.sequence
+            traced_peak = None
+            if measure.traced is not None and self._tracing:
+                traced_peak = max(tracemalloc.get_traced_memory()[1] - measure.traced, 0)
+
+        record = RequestMemory(
+            finished_at=datetime.utcnow(),
+            method=method,
+            route=route,
+            status_code=status_code,
+            request_bytes=request_bytes,
+            response_bytes=response_bytes,
+            duration_ms=round((clock - measure.started) * 1000, 2),
+            rss_before=measure.rss,
+            rss_after=rss,
+            peak_rss_growth=peak - measure.peak_rss,
+            allocated_blocks=blocks - measure.blocks,
+            traced_peak=traced_peak,
+            exclusive=exclusive,
+        )
+        self._recent.append(record)
+
+        REQUEST_RSS_GROWTH.observe(max(rss - measure.rss, 0), route=route)
+        if traced_peak is not None:
+            REQUEST_TRACED_PEAK.observe(traced_peak, route=route)
+        PROCESS_RSS.set(rss)
+        PROCESS_PEAK_RSS.set(peak)
+        return record
+
+    def heaviest(self, limit: int) -> list[RequestMemory]:
+        """Requêtes récentes les plus lourdes en mémoire"""
+        return sorted(list(self._recent), key=lambda record: record.weight, reverse=True)[:limit]
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+
+memory_accountant = MemoryAccountant(
+    history=settings.MEMORY_RECENT_REQUESTS,
+    tracing=settings.MEMORY_TRACEMALLOC_ENABLED,
+)
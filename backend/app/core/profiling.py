@@ -0,0 +1,207 @@
+# backend/app/core/profiling.py
+"""
+Profilage à la demande par échantillonnage des piles Python
+
+Un thread échantillonneur relève périodiquement les piles (sys._current_frames)
+pendant la requête profilée. Le résultat est écrit au format « collapsed stacks »
+(flamegraph.pl, speedscope) accompagné d'un résumé JSON : temps mur, temps CPU
+du processus et allocations mémoire (tracemalloc) par ligne de code.
+"""
+
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+
+
+APP_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles pour la durée d'une requête"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _stack(frame) -> list[str]:
+        """Pile de la racine vers le sommet, au format fonction (fichier:ligne)"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    @staticmethod
+    def _in_app(frame) -> bool:
+        """Le thread exécute-t-il du code de l'application (et non une attente inactive) ?"""
+        while frame is not None:
+            if frame.f_code.co_filename.startswith(APP_PACKAGE_DIR):
+                return True
+            frame = frame.f_back
+        return False
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            # Les threads du pool inactifs et les autres échantillonneurs sont ignorés
+            if thread_id == own or not self._in_app(frame):
+                continue
+            stack = [names.get(thread_id, str(thread_id))] + self._stack(frame)
+            self.samples[";".join(stack)] += 1
+        self.sample_count += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class _MemoryTracing:
+    """tracemalloc partagé entre les requêtes profilées simultanées (et app.core.memory)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._started_here = False
+
+    def acquire(self, snapshot: bool = True):
+        """Démarrer le traçage si besoin ; instantané de référence (None : référence vide)"""
+        with self._lock:
+            fresh = self._users == 0 and not tracemalloc.is_tracing()
+            if fresh:
+                tracemalloc.start(settings.PROFILING_MEMORY_FRAMES)
+                self._started_here = True
+            self._users += 1
+            # Traçage démarré à l'instant : rien n'est encore tracé, inutile de l'instantaner
+            return tracemalloc.take_snapshot() if snapshot and not fresh else None
+
+    def release(self, snapshot: bool = True):
+        with self._lock:
+            taken = tracemalloc.take_snapshot() if snapshot else None
+            _, peak = tracemalloc.get_traced_memory()
+            self._users -= 1
+            if self._users == 0 and self._started_here:
+                tracemalloc.stop()
+                self._started_here = False
+            return taken, peak
+
+
+memory_tracing = _MemoryTracing()
+
+
+class ProfileSession:
+    """Profil d'une requête : piles échantillonnées, temps CPU/mur et mémoire"""
+
+    def __init__(self, label: str, trace_memory: bool):
+        self.label = label
+        self.trace_memory = trace_memory
+        self.profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000)
+        self._snapshot = None
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")[:80]
+        self.name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{slug}"
+
+    def start(self):
+        """Démarrer le profilage (instantané tracemalloc éventuel : hors de la boucle)"""
+        if self.trace_memory:
+            self._snapshot = memory_tracing.acquire()
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self.profiler.start()
+
+    def stop(self) -> str:
+        """Arrêter le profilage et écrire les fichiers ; retourne leur préfixe"""
+        self.profiler.stop()
+        wall = time.perf_counter() - self._wall_started
+        cpu = time.process_time() - self._cpu_started
+
+        summary = {
+            "label": self.label,
+            "wall_ms": round(wall * 1000, 2),
+            # Temps CPU du processus entier : inclut les autres requêtes concurrentes
+            "cpu_ms": round(cpu * 1000, 2),
+            "samples": self.profiler.sample_count,
+            "interval_ms": settings.PROFILING_INTERVAL_MS,
+        }
+        if self.trace_memory:
+            snapshot, peak = memory_tracing.release()
+            baseline = self._snapshot or tracemalloc.Snapshot([], snapshot.traceback_limit)
+            stats = snapshot.compare_to(baseline, "lineno")
+            summary["memory"] = {
+                "allocated_bytes": sum(max(stat.size_diff, 0) for stat in stats),
+                "traced_peak_bytes": peak,
+                "top_allocations": [
+                    {
+                        "location": str(stat.traceback[0]),
+                        "size_diff_bytes": stat.size_diff,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in stats[:settings.PROFILING_MEMORY_TOP]
+                    if stat.size_diff > 0
+                ],
+            }
+
+        os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+        prefix = os.path.join(settings.PROFILING_OUTPUT_DIR, self.name)
+        with open(f"{prefix}.folded", "w") as f:
+            f.write(self.profiler.collapsed())
+        with open(f"{prefix}.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        return prefix
+
+
+class ProfilingControl:
+    """Réglages modifiables à chaud (endpoint d'administration)"""
+
+    def __init__(self, sample_rate: float, header_token: str):
+        self.sample_rate = sample_rate
+        self.header_token = header_token
+
+    def should_profile(self, header_value: Optional[bytes]) -> bool:
+        """
+        Profiler sur demande explicite (jeton partagé) ou par tirage aléatoire.
+
+        L'en-tête est comparé tel que reçu, en octets : compare_digest refuse les
+        chaînes non ASCII, qu'un client pourrait envoyer pour provoquer une erreur.
+        """
+        if (
+            header_value
+            and self.header_token
+            and hmac.compare_digest(header_value, self.header_token.encode())
+        ):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+profiling_control = ProfilingControl(
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    header_token=settings.PROFILING_HEADER_TOKEN,
+)
@@ -0,0 +1,62 @@
+# backend/app/core/revocation.py
+"""
+Liste de révocation des sessions, mise en cache pour la vérification des tokens d'accès
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+
+
+class RevocationCache:
+    """
+    Familles de sessions révoquées dont les tokens d'accès peuvent encore être valides.
+    
+    Le cache local est alimenté immédiatement lors d'une révocation et rechargé
+    périodiquement depuis la base pour suivre les révocations des autres workers.
+    """
+    
+    def __init__(self, reload_seconds: int):
+        self.reload_seconds = reload_seconds
+        self._revoked: dict[str, float] = {}  # family_id -> expiration (monotonic)
+        self._loaded_at = float("-inf")
+        self._lock = threading.Lock()
+    
+    def add(self, family_id: str):
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        with self._lock:
+            self._revoked[family_id] = time.monotonic() + ttl
+    
+    def _reload(self, db: Session):
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        since = datetime.utcnow() - timedelta(seconds=ttl)
+        rows = db.execute(
+            select(RefreshToken.family_id, RefreshToken.revoked_at)
+            .where(RefreshToken.revoked_at > since)
+            .distinct()
+        ).all()
+        now_utc = datetime.utcnow()
+        now = time.monotonic()
+        revoked = {
+            family_id: now + ttl - (now_utc - revoked_at).total_seconds()
+            for family_id, revoked_at in rows
+        }
+        with self._lock:
+            self._revoked = revoked
+            self._loaded_at = now
+    
+    def is_revoked(self, family_id: str, db: Session) -> bool:
+        now = time.monotonic()
+        if now - self._loaded_at > self.reload_seconds:
+            self._reload(db)
+        expires_at = self._revoked.get(family_id)
+        return expires_at is not None and expires_at > now
+
+
+revocation_cache = RevocationCache(settings.REVOCATION_CACHE_SECONDS)
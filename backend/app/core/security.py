@@ -3,19 +3,133 @@
 Fonctions de sécurité : JWT, hachage, chiffrement
 """
 
+from concurrent.futures import Executor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, NamedTuple, Optional
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import struct
+import threading
+import time
 from jose import jwt
 from passlib.context import CryptContext
-from cryptography.fernet import Fernet
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 from app.core.config import settings
+from app.core.metrics import registry
+
+PASSWORD_HASH_SECONDS = registry.histogram(
+    "santhium_password_hash_seconds",
+    "Durée des opérations de hachage de mot de passe",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
+
+def build_password_context(
+    schemes: Optional[list[str]] = None,
+    bcrypt_rounds: Optional[int] = None,
+    argon2_time_cost: Optional[int] = None,
+    argon2_memory_cost_kb: Optional[int] = None,
+    argon2_parallelism: Optional[int] = None
+) -> CryptContext:
+    """Construire le contexte de hachage ; tout hash d'un autre schéma ou coût est à mettre à jour"""
+    if schemes is None:
+        schemes = [s.strip() for s in settings.PASSWORD_HASH_SCHEMES.split(",") if s.strip()]
+    options = {}
+    if "bcrypt" in schemes:
+        rounds = bcrypt_rounds or settings.BCRYPT_ROUNDS
+        options.update(
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+    if "argon2" in schemes:
+        options.update(
+            argon2__time_cost=argon2_time_cost or settings.ARGON2_TIME_COST,
+            argon2__memory_cost=argon2_memory_cost_kb or settings.ARGON2_MEMORY_COST_KB,
+            argon2__parallelism=argon2_parallelism or settings.ARGON2_PARALLELISM,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
 
 # Hachage de mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_password_context()
+
+
+DEFAULT_KEY_ID = "default"
+
+
+class EncryptedPayload(NamedTuple):
+    """Contenu chiffré par une clé de données, elle-même chiffrée par une clé maîtresse"""
+    ciphertext: bytes
+    key_id: str
+    wrapped_key: bytes
+
+
+class Keyring:
+    """Trousseau de clés maîtresses versionnées (chiffrement d'enveloppe)"""
+    
+    def __init__(self, keys: dict[str, str], active_key_id: str):
+        if active_key_id not in keys:
+            raise ValueError(f"Clé de chiffrement active inconnue: {active_key_id}")
+        self.active_key_id = active_key_id
+        self._fernets = {
+            key_id: Fernet(key.encode()) for key_id, key in keys.items()
+        }
+        # MultiFernet : chiffre avec la clé active, déchiffre avec toutes
+        self._multi = MultiFernet(
+            [self._fernets[active_key_id]]
+            + [f for key_id, f in self._fernets.items() if key_id != active_key_id]
+        )
+    
+    @property
+    def key_ids(self) -> list[str]:
+        return list(self._fernets)
+    
+    def wrap(self, data_key: bytes) -> tuple[str, bytes]:
+        """Chiffrer une clé de données avec la clé maîtresse active"""
+        return self.active_key_id, self._fernets[self.active_key_id].encrypt(data_key)
+    
+    def unwrap(self, key_id: str, wrapped_key: bytes) -> bytes:
+        """Déchiffrer une clé de données"""
+        fernet = self._fernets.get(key_id)
+        if fernet is None:
+            raise ValueError(f"Clé de chiffrement inconnue: {key_id}")
+        return fernet.decrypt(wrapped_key)
+    
+    def encrypt(self, content: bytes) -> bytes:
+        return self._multi.encrypt(content)
+    
+    def decrypt(self, token: bytes) -> bytes:
+        return self._multi.decrypt(token)
+
+
+def load_keyring() -> Keyring:
+    """Construire le trousseau depuis ENCRYPTION_KEYS ("id:clé,id:clé") et ENCRYPTION_KEY"""
+    keys: dict[str, str] = {}
+    for entry in filter(None, (e.strip() for e in settings.ENCRYPTION_KEYS.split(","))):
+        key_id, _, key = entry.partition(":")
+        if not key:
+            raise ValueError("ENCRYPTION_KEYS doit être au format id:clé")
+        keys[key_id.strip()] = key.strip()
+    
+    # La clé historique reste disponible pour les données existantes
+    if settings.ENCRYPTION_KEY not in keys.values():
+        keys.setdefault(DEFAULT_KEY_ID, settings.ENCRYPTION_KEY)
+    
+    active_key_id = settings.ENCRYPTION_ACTIVE_KEY_ID or next(iter(keys))
+    return Keyring(keys, active_key_id)
+
 
 # Chiffrement de fichiers
-cipher_suite = Fernet(settings.ENCRYPTION_KEY.encode())
+keyring = load_keyring()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -38,21 +152,252 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def generate_refresh_token() -> str:
+    """Générer un refresh token opaque"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_token(token: str) -> str:
+    """Empreinte SHA-256 d'un token (seule forme stockée en base)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _signing_key(purpose: str) -> bytes:
+    """Clé HMAC dérivée de SECRET_KEY, distincte par usage"""
+    return hashlib.sha256(f"{purpose}:{settings.SECRET_KEY}".encode()).digest()
+
+
+def create_signed_token(payload: dict, expires_in: int, purpose: str) -> str:
+    """Jeton compact signé HMAC-SHA256 et expirant (ex : URL de téléchargement)"""
+    body = base64.urlsafe_b64encode(
+        json.dumps({**payload, "exp": int(time.time()) + expires_in}, separators=(",", ":")).encode()
+    ).rstrip(b"=")
+    signature = base64.urlsafe_b64encode(
+        hmac.new(_signing_key(purpose), body, hashlib.sha256).digest()
+    ).rstrip(b"=")
+    return f"{body.decode()}.{signature.decode()}"
+
+
+def verify_signed_token(token: str, purpose: str) -> Optional[dict]:
+    """Contenu du jeton si la signature est valide et non expirée, None sinon"""
+    try:
+        body, signature = token.encode().split(b".")
+        expected = base64.urlsafe_b64encode(
+            hmac.new(_signing_key(purpose), body, hashlib.sha256).digest()
+        ).rstrip(b"=")
+        if not hmac.compare_digest(signature, expected):
+            return None
+        payload = json.loads(base64.urlsafe_b64decode(body + b"=" * (-len(body) % 4)))
+    except (ValueError, UnicodeError):
+        return None
+    if payload.get("exp", 0) < time.time():
+        return None
+    return payload
+
+
+# Segment de chemin portant un jeton signé (valant autorisation) : jamais journalisé
+SIGNED_TOKEN_PATH = re.compile(r"(/signed/)[^/]+")
+
+
+def redact_path(path: str) -> str:
+    """Chemin journalisable : le jeton des URLs de téléchargement signées est masqué"""
+    return SIGNED_TOKEN_PATH.sub(r"\1***", path)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Vérifier un mot de passe"""
-    return pwd_context.verify(plain_password, hashed_password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation="verify")
+
+
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Vérifier un mot de passe et retourner un nouveau hash si le stocké est obsolète"""
+    started = time.perf_counter()
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation="verify")
 
 
 def get_password_hash(password: str) -> str:
     """Hasher un mot de passe"""
-    return pwd_context.hash(password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation="hash")
+
+
+FERNET_VERSION = b"\x80"
+
+
+def _to_token(encrypted_content: bytes) -> bytes:
+    """Jeton Fernet base64 à partir du format stocké (binaire ou base64 historique)"""
+    if encrypted_content[:1] == FERNET_VERSION:
+        return base64.urlsafe_b64encode(encrypted_content)
+    return encrypted_content
+
+
+# Format segmenté : en-tête (version, taille de segment, taille en clair) puis
+# les segments AES-GCM bout à bout, chacun suivi de son tag d'authentification
+SEGMENTED_VERSION = b"\x91"
+SEGMENT_HEADER = struct.Struct(">cIQ")
+SEGMENT_TAG_SIZE = 16
+
+_segment_executor: Optional[ThreadPoolExecutor] = None
+_segment_executor_lock = threading.Lock()
+
+
+def _segment_workers() -> int:
+    return settings.ENCRYPTION_WORKERS or os.cpu_count() or 1
+
+
+def _segment_pool() -> ThreadPoolExecutor:
+    """Pool partagé par toutes les requêtes (OpenSSL relâche le GIL)"""
+    global _segment_executor
+    if _segment_executor is None:
+        with _segment_executor_lock:
+            if _segment_executor is None:
+                _segment_executor = ThreadPoolExecutor(
+                    max_workers=_segment_workers(),
+                    thread_name_prefix="segment-crypto"
+                )
+    return _segment_executor
+
+
+def _map_segments(
+    func: Callable[[int], bytes],
+    count: int,
+    executor: Optional[Executor]
+) -> list[bytes]:
+    """Appliquer func à chaque indice de segment, en parallèle si utile ; ordre conservé"""
+    if executor is None and count > 1 and _segment_workers() > 1:
+        executor = _segment_pool()
+    if executor is None or count == 1:
+        return [func(index) for index in range(count)]
+    return list(executor.map(func, range(count)))
+
+
+def _segment_cipher(data_key: bytes) -> AESGCM:
+    # Clé de données Fernet : 32 octets aléatoires -> AES-256
+    return AESGCM(base64.urlsafe_b64decode(data_key))
+
+
+def _segment_nonce(index: int) -> bytes:
+    # Nonce = indice : unique car chaque contenu a sa propre clé de données
+    return index.to_bytes(12, "big")
+
+
+def _segment_aad(header: bytes, index: int) -> bytes:
+    # L'en-tête et la position sont authentifiés : ni troncature ni permutation
+    return header + index.to_bytes(8, "big")
+
+
+def _segment_count(size: int, segment_size: int) -> int:
+    return max(1, -(-size // segment_size))
+
+
+def encrypt_segments(
+    content: bytes,
+    data_key: bytes,
+    segment_size: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> bytes:
+    """
+    Chiffrer un contenu en segments AES-GCM indépendants, en parallèle.
+    
+    Le résultat ne dépend que du contenu, de la clé et de la taille de segment
+    (pas du nombre de workers) : il est reproductible et vérifiable.
+    """
+    segment_size = segment_size or settings.ENCRYPTION_SEGMENT_SIZE_KB * 1024
+    header = SEGMENT_HEADER.pack(SEGMENTED_VERSION, segment_size, len(content))
+    cipher = _segment_cipher(data_key)
+    view = memoryview(content)
+    
+    def seal(index: int) -> bytes:
+        start = index * segment_size
+        return cipher.encrypt(
+            _segment_nonce(index),
+            view[start:start + segment_size],
+            _segment_aad(header, index)
+        )
+    
+    count = _segment_count(len(content), segment_size)
+    return b"".join([header, *_map_segments(seal, count, executor)])
+
+
+def decrypt_segments(
+    encrypted_content: bytes,
+    data_key: bytes,
+    executor: Optional[Executor] = None
+) -> bytes:
+    """Déchiffrer et vérifier un contenu segmenté (InvalidToken si altéré)"""
+    if len(encrypted_content) < SEGMENT_HEADER.size:
+        raise InvalidToken
+    version, segment_size, size = SEGMENT_HEADER.unpack_from(encrypted_content)
+    count = _segment_count(size, segment_size) if segment_size else 0
+    if (
+        version != SEGMENTED_VERSION
+        or not segment_size
+        or len(encrypted_content) != SEGMENT_HEADER.size + size + count * SEGMENT_TAG_SIZE
+    ):
+        raise InvalidToken
+    
+    header = bytes(encrypted_content[:SEGMENT_HEADER.size])
+    cipher = _segment_cipher(data_key)
+    view = memoryview(encrypted_content)
+    
+    def open_segment(index: int) -> bytes:
+        start = SEGMENT_HEADER.size + index * (segment_size + SEGMENT_TAG_SIZE)
+        length = min(segment_size, size - index * segment_size) + SEGMENT_TAG_SIZE
+        return cipher.decrypt(
+            _segment_nonce(index),
+            view[start:start + length],
+            _segment_aad(header, index)
+        )
+    
+    try:
+        return b"".join(_map_segments(open_segment, count, executor))
+    except InvalidTag:
+        raise InvalidToken from None
+
+
+def encrypt_file(file_content: bytes) -> EncryptedPayload:
+    """
+    Chiffrer un fichier avec une clé de données dédiée.
+    
+    Le jeton Fernet est conservé sous forme binaire (décodé du base64) : un tiers
+    de stockage en moins. Au-delà de ENCRYPTION_PARALLEL_THRESHOLD_KB, le contenu
+    est chiffré en segments sur le pool partagé. decrypt_file accepte tous les formats.
+    """
+    data_key = Fernet.generate_key()
+    key_id, wrapped_key = keyring.wrap(data_key)
+    if len(file_content) >= settings.ENCRYPTION_PARALLEL_THRESHOLD_KB * 1024:
+        return EncryptedPayload(encrypt_segments(file_content, data_key), key_id, wrapped_key)
+    token = Fernet(data_key).encrypt(file_content)
+    return EncryptedPayload(base64.urlsafe_b64decode(token), key_id, wrapped_key)
 
 
-def encrypt_file(file_content: bytes) -> bytes:
-    """Chiffrer un fichier"""
-    return cipher_suite.encrypt(file_content)
+def decrypt_file(
+    encrypted_content: bytes,
+    key_id: Optional[str] = None,
+    wrapped_key: Optional[bytes] = None
+) -> bytes:
+    """Déchiffrer un fichier (format enveloppe ou format historique sans clé de données)"""
+    if wrapped_key is None:
+        return keyring.decrypt(_to_token(encrypted_content))
+    data_key = keyring.unwrap(key_id, wrapped_key)
+    if encrypted_content[:1] == SEGMENTED_VERSION:
+        return decrypt_segments(encrypted_content, data_key)
+    return Fernet(data_key).decrypt(_to_token(encrypted_content))
 
 
-def decrypt_file(encrypted_content: bytes) -> bytes:
-    """Déchiffrer un fichier"""
-    return cipher_suite.decrypt(encrypted_content)
\ No newline at end of file
+def rewrap_key(key_id: str, wrapped_key: bytes) -> tuple[str, bytes]:
+    """Rechiffrer une clé de données avec la clé maîtresse active (rotation)"""
+    return keyring.wrap(keyring.unwrap(key_id, wrapped_key))
\ No newline at end of file
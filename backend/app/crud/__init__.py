@@ -1,3 +1,15 @@
 """
 Module CRUD - Opérations base de données
-"""
\ No newline at end of file
+"""
+
+from app.crud.code import CodeRepository
+from app.crud.document import DocumentRepository
+from app.crud.pharmacy import PharmacyRepository
+from app.crud.user import UserRepository
+
+__all__ = [
+    "CodeRepository",
+    "DocumentRepository",
+    "PharmacyRepository",
+    "UserRepository"
+]
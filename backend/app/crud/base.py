@@ -0,0 +1,31 @@
+# backend/app/crud/base.py
+"""
+Base des dépôts : requêtes chaudes construites une seule fois
+
+Les instructions sont des constantes de module paramétrées par bindparam. Une
+requête ORM query().filter().first() reconstruit l'instruction et recalcule sa
+clé de cache à chaque appel ; ici la construction est faite à l'import et la
+clé de cache (mémorisée sur l'instruction) une seule fois, seule la valeur des
+paramètres change. Voir scripts/benchmark_queries.py.
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+
+class BaseRepository:
+    """Accès aux requêtes précompilées d'un modèle"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _first(self, statement: Executable, **params) -> Optional[Any]:
+        """Première entité (ou valeur) du résultat"""
+        return self.db.execute(statement, params).scalars().first()
+    
+    def _row(self, statement: Executable, **params) -> Optional[Row]:
+        """Première ligne du résultat (sélection de colonnes)"""
+        return self.db.execute(statement, params).first()
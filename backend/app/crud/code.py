@@ -0,0 +1,25 @@
+# backend/app/crud/code.py
+"""
+Requêtes chaudes sur les codes de transfert (upload, validation, génération)
+"""
+
+from typing import Optional
+
+from sqlalchemy import bindparam, select
+
+from app.crud.base import BaseRepository
+from app.models.code import Code
+
+_BY_CODE = select(Code).where(Code.code == bindparam("code"))
+_ID_BY_CODE = select(Code.id).where(Code.code == bindparam("code"))
+
+
+class CodeRepository(BaseRepository):
+    """Dépôt des codes"""
+    
+    def get_by_code(self, code: str) -> Optional[Code]:
+        return self._first(_BY_CODE, code=code)
+    
+    def exists(self, code: str) -> bool:
+        """Contrôle d'unicité à la génération : seul l'identifiant est lu"""
+        return self._first(_ID_BY_CODE, code=code) is not None
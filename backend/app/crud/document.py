@@ -0,0 +1,33 @@
+# backend/app/crud/document.py
+"""
+Requêtes chaudes sur les documents (téléchargement, suppression)
+"""
+
+from typing import Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import joinedload
+
+from app.crud.base import BaseRepository
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+
+_FOR_PHARMACY = select(Document).where(
+    Document.id == bindparam("document_id"),
+    Document.pharmacy_id == bindparam("pharmacy_id")
+)
+
+# Document, blob et segment d'archive en une requête
+_WITH_CONTENT = _FOR_PHARMACY.options(
+    joinedload(Document.blob).joinedload(DocumentBlob.segment)
+)
+
+
+class DocumentRepository(BaseRepository):
+    """Dépôt des documents (toujours restreints à la pharmacie)"""
+    
+    def get_for_pharmacy(self, document_id: int, pharmacy_id: int) -> Optional[Document]:
+        return self._first(_FOR_PHARMACY, document_id=document_id, pharmacy_id=pharmacy_id)
+    
+    def get_with_content(self, document_id: int, pharmacy_id: int) -> Optional[Document]:
+        return self._first(_WITH_CONTENT, document_id=document_id, pharmacy_id=pharmacy_id)
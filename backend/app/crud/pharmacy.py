@@ -0,0 +1,23 @@
+# backend/app/crud/pharmacy.py
+"""
+Requêtes chaudes sur les pharmacies (inscription par code pharmacie)
+"""
+
+from typing import Optional
+
+from sqlalchemy import Row, bindparam, select
+
+from app.crud.base import BaseRepository
+from app.models.pharmacy import Pharmacy
+
+_TENANT_BY_CODE = select(Pharmacy.id, Pharmacy.is_active).where(
+    Pharmacy.tenant_code == bindparam("tenant_code")
+)
+
+
+class PharmacyRepository(BaseRepository):
+    """Dépôt des pharmacies"""
+    
+    def get_tenant(self, tenant_code: str) -> Optional[Row]:
+        """(id, is_active) de la pharmacie : l'inscription n'a besoin de rien d'autre"""
+        return self._row(_TENANT_BY_CODE, tenant_code=tenant_code)
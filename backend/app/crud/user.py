@@ -0,0 +1,29 @@
+# backend/app/crud/user.py
+"""
+Requêtes chaudes sur les utilisateurs (authentification de chaque requête, connexion)
+"""
+
+from typing import Optional
+
+from sqlalchemy import bindparam, select
+
+from app.crud.base import BaseRepository
+from app.models.user import User
+
+_BY_ID = select(User).where(User.id == bindparam("user_id"))
+_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_ID_BY_EMAIL = select(User.id).where(User.email == bindparam("email"))
+
+
+class UserRepository(BaseRepository):
+    """Dépôt des utilisateurs"""
+    
+    def get(self, user_id: int) -> Optional[User]:
+        return self._first(_BY_ID, user_id=user_id)
+    
+    def get_by_email(self, email: str) -> Optional[User]:
+        return self._first(_BY_EMAIL, email=email)
+    
+    def email_exists(self, email: str) -> bool:
+        """Contrôle d'unicité : seul l'identifiant est lu"""
+        return self._first(_ID_BY_EMAIL, email=email) is not None
@@ -0,0 +1,93 @@
+# backend/app/db/instrumentation.py
+"""
+Instrumentation SQL par requête : nombre de requêtes, temps passé en base et
+lignes retournées, via les événements SQLAlchemy
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """Compteurs SQL d'une requête HTTP (ou d'un bloc de test)"""
+
+    __slots__ = ("queries", "db_time", "rows", "statements")
+
+    def __init__(self, keep_statements: bool = False):
+        self.queries = 0
+        self.db_time = 0.0  # En secondes
+        self.rows = 0
+        self.statements: Optional[list[str]] = [] if keep_statements else None
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Collecteurs globaux (tests) : comptent les requêtes de tous les contextes suivis
+# (requêtes HTTP, quel que soit le thread), jamais celles des tâches de fond
+_global_collectors: list[QueryStats] = []
+
+
+def start_tracking(keep_statements: bool = False) -> tuple[QueryStats, object]:
+    """Activer le suivi pour le contexte courant (propagé au threadpool)"""
+    stats = QueryStats(keep_statements)
+    return stats, _current_stats.set(stats)
+
+
+def stop_tracking(token):
+    _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current_stats.get()
+    if current is None:
+        return
+    started_at = conn.info.get("query_started_at")
+    elapsed = time.perf_counter() - started_at.pop() if started_at else 0.0
+    # rowcount vaut -1 pour les SELECT sous SQLite ; exact sous PostgreSQL
+    rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+
+    for stats in [current] + [stats for stats in _global_collectors if stats is not current]:
+        stats.queries += 1
+        stats.db_time += elapsed
+        stats.rows += rows
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Helper de test : échoue si le bloc exécute plus de `max_queries` requêtes SQL.
+
+    Sont comptées les requêtes du bloc lui-même et celles des requêtes HTTP
+    traitées pendant le bloc, même dans un autre thread (ex. TestClient) ; pas
+    celles des tâches de fond (flush des consultations, audit...).
+
+        with assert_max_queries(3):
+            client.get("/api/documents", headers=headers)
+    """
+    stats = QueryStats(keep_statements=True)
+    token = _current_stats.set(stats)
+    _global_collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _global_collectors.remove(stats)
+        _current_stats.reset(token)
+    if stats.queries > max_queries:
+        raise AssertionError(
+            f"{stats.queries} requêtes SQL exécutées (maximum {max_queries}):\n"
+            + "\n".join(stats.statements)
+        )
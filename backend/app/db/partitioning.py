@@ -0,0 +1,236 @@
+# backend/app/db/partitioning.py
+"""
+Partitionnement natif PostgreSQL de la table documents par date d'upload
+
+Optionnel (DOCUMENTS_PARTITIONING = "daily" ou "weekly"). Les partitions sont
+créées à l'avance ; celles dont tous les documents ont dépassé la durée de
+rétention sont détachées puis supprimées d'un bloc, au lieu d'une purge ligne
+à ligne. Le modèle ORM reste identique : seule la DDL de la table change.
+
+Le journal d'audit (audit_events) est, lui, toujours partitionné par mois sous
+PostgreSQL : les consultations par plage de dates ne lisent que les partitions
+concernées. Une partition par défaut reçoit les événements hors plage.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import PrimaryKeyConstraint, inspect, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.audit_event import AuditEvent
+from app.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "documents_p"
+AUDIT_PARTITION_PREFIX = "audit_events_p"
+AUDIT_DEFAULT_PARTITION = "audit_events_default"
+
+
+def is_configured(engine: Engine) -> bool:
+    return bool(settings.DOCUMENTS_PARTITIONING) and engine.dialect.name == "postgresql"
+
+
+def _documents_partitioned(engine: Engine) -> bool:
+    """La table documents existe-t-elle en tant que table partitionnée ?"""
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as connection:
+        return connection.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('documents')"
+        )).first() is not None
+
+
+def is_enabled(engine: Engine) -> bool:
+    """Partitionnement configuré et effectif (une table existante n'est jamais convertie)"""
+    return is_configured(engine) and _documents_partitioned(engine)
+
+
+def _interval() -> timedelta:
+    if settings.DOCUMENTS_PARTITIONING == "daily":
+        return timedelta(days=1)
+    if settings.DOCUMENTS_PARTITIONING == "weekly":
+        return timedelta(weeks=1)
+    raise ValueError("DOCUMENTS_PARTITIONING doit valoir 'daily' ou 'weekly'")
+
+
+def _period_start(day: date) -> date:
+    """Début de la période contenant `day` (lundi pour un découpage hebdomadaire)"""
+    if settings.DOCUMENTS_PARTITIONING == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _partition_name(start: date) -> str:
+    return f"{PARTITION_PREFIX}{start:%Y%m%d}"
+
+
+def _partition_start(name: str) -> Optional[date]:
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def prepare_documents_table(engine: Engine):
+    """
+    Adapter la DDL de documents avant create_all : clé primaire (id, uploaded_at)
+    et PARTITION BY RANGE. L'identité ORM reste `id` (voir Document.__mapper_args__).
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    if inspect(engine).has_table(Document.__tablename__):
+        partitioned = _documents_partitioned(engine)
+        if partitioned and not settings.DOCUMENTS_PARTITIONING:
+            # Sans découpage connu, plus aucune partition ne serait créée : uploads refusés
+            raise RuntimeError(
+                "La table documents est partitionnée : DOCUMENTS_PARTITIONING doit valoir "
+                "'daily' ou 'weekly'"
+            )
+        if partitioned:
+            _interval()  # Valider la configuration au démarrage
+        elif settings.DOCUMENTS_PARTITIONING:
+            logger.error(
+                "La table documents existe déjà sans partitionnement : DOCUMENTS_PARTITIONING "
+                "est ignoré (purge ligne à ligne) jusqu'à une migration manuelle"
+            )
+        return
+
+    if not is_configured(engine):
+        return
+    _interval()  # Valider la configuration au démarrage
+
+    table = Document.__table__
+    table.c.uploaded_at.primary_key = True
+    table.append_constraint(PrimaryKeyConstraint(table.c.id, table.c.uploaded_at))
+    table.dialect_options["postgresql"]["partition_by"] = "RANGE (uploaded_at)"
+
+
+def _existing_partitions(connection, parent: str = "documents") -> list[str]:
+    return connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        f"WHERE i.inhparent = '{parent}'::regclass"
+    )).scalars().all()
+
+
+def create_partitions(engine: Engine, today: Optional[date] = None) -> list[str]:
+    """Créer les partitions de la période courante et des DOCUMENTS_PARTITIONS_AHEAD suivantes"""
+    interval = _interval()
+    start = _period_start(today or datetime.utcnow().date())
+    created = []
+    with engine.begin() as connection:
+        existing = set(_existing_partitions(connection))
+        for _ in range(settings.DOCUMENTS_PARTITIONS_AHEAD + 1):
+            name = _partition_name(start)
+            if name not in existing:
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF documents "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + interval).isoformat()}')"
+                ))
+                created.append(name)
+            start += interval
+    return created
+
+
+def drop_expired_partitions(engine: Engine, now: Optional[datetime] = None) -> list[str]:
+    """
+    Détacher et supprimer les partitions entièrement au-delà de la rétention.
+
+    Dans la même transaction, les blobs partagés sont déréférencés et les
+    compteurs du tableau de bord corrigés à partir de la partition détachée.
+    Les blobs orphelins ne sont supprimés qu'après le DROP : une partition
+    détachée conserve sa clé étrangère blob_id -> document_blobs.id.
+    """
+    interval = _interval()
+    cutoff = (now or datetime.utcnow()) - timedelta(days=settings.DATA_RETENTION_DAYS)
+    dropped = []
+    with engine.connect() as connection:
+        names = _existing_partitions(connection)
+
+    for name in sorted(names):
+        start = _partition_start(name)
+        if start is None or datetime.combine(start + interval, datetime.min.time()) > cutoff:
+            continue
+
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE documents DETACH PARTITION {name}"))
+            connection.execute(text(
+                f"UPDATE document_blobs b SET ref_count = b.ref_count - d.refs "
+                f"FROM (SELECT blob_id, count(*) AS refs FROM {name} "
+                f"WHERE blob_id IS NOT NULL GROUP BY blob_id) d "
+                f"WHERE b.id = d.blob_id"
+            ))
+            connection.execute(text(
+                f"UPDATE pharmacy_stats s "
+                f"SET total_documents = s.total_documents - d.total, "
+                f"unviewed_documents = s.unviewed_documents - d.unviewed, "
+                f"stored_bytes = s.stored_bytes - d.bytes "
+                f"FROM (SELECT pharmacy_id, count(*) AS total, "
+                f"count(*) FILTER (WHERE NOT is_viewed) AS unviewed, "
+                f"coalesce(sum(file_size), 0) AS bytes "
+                f"FROM {name} GROUP BY pharmacy_id) d "
+                f"WHERE s.pharmacy_id = d.pharmacy_id"
+            ))
+            connection.execute(text(f"DROP TABLE {name}"))
+            connection.execute(text("DELETE FROM document_blobs WHERE ref_count <= 0"))
+        dropped.append(name)
+        logger.info("Partition %s supprimée (rétention dépassée)", name)
+    return dropped
+
+
+# Journal d'audit
+
+
+def audit_is_partitioned(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def prepare_audit_table(engine: Engine):
+    """Clé primaire (sequence, occurred_at) et PARTITION BY RANGE avant create_all"""
+    if not audit_is_partitioned(engine) or inspect(engine).has_table(AuditEvent.__tablename__):
+        return
+    table = AuditEvent.__table__
+    table.c.occurred_at.primary_key = True
+    table.append_constraint(PrimaryKeyConstraint(table.c.sequence, table.c.occurred_at))
+    table.dialect_options["postgresql"]["partition_by"] = "RANGE (occurred_at)"
+
+
+def create_audit_partitions(engine: Engine, today: Optional[date] = None) -> list[str]:
+    """Créer la partition du mois courant, des AUDIT_PARTITIONS_AHEAD suivants et la partition par défaut"""
+    if not audit_is_partitioned(engine):
+        return []
+    start = _month_start(today or datetime.utcnow().date())
+    created = []
+    with engine.begin() as connection:
+        existing = set(_existing_partitions(connection, AuditEvent.__tablename__))
+        for _ in range(settings.AUDIT_PARTITIONS_AHEAD + 1):
+            end = _next_month(start)
+            name = f"{AUDIT_PARTITION_PREFIX}{start:%Y%m}"
+            if name not in existing:
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_events "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+                created.append(name)
+            start = end
+        if AUDIT_DEFAULT_PARTITION not in existing:
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {AUDIT_DEFAULT_PARTITION} PARTITION OF audit_events DEFAULT"
+            ))
+            created.append(AUDIT_DEFAULT_PARTITION)
+    return created
@@ -0,0 +1,137 @@
+# backend/app/db/routing.py
+"""
+Routage des lectures du tableau de bord vers un réplica PostgreSQL
+
+Une lecture part sur le réplica si celui-ci est configuré, si son retard de
+réplication est sous le seuil et si la pharmacie n'a pas écrit récemment
+(lecture de ses propres écritures juste après un upload). Sinon : primaire.
+
+Le marqueur d'écriture récente est stocké sur le primaire (table
+replica_write_markers) : un upload traité par un worker de app.server
+renvoie vers le primaire les lectures servies par tous les autres. Chaque
+worker recharge les marqueurs récents d'un bloc au plus toutes les
+REPLICA_MARKER_REFRESH_SECONDS, quel que soit le nombre de lectures : une
+écriture d'un autre worker est vue avec ce délai au plus. Sans réplica
+configuré, aucun marqueur n'est écrit.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.session import engine, replica_engine
+from app.models.replica_write_marker import ReplicaWriteMarker
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """Décide, par pharmacie, si une lecture peut partir sur le réplica"""
+    
+    def __init__(self):
+        # Écritures de ce processus : évite la lecture du marqueur partagé
+        self._last_writes: dict[int, float] = {}
+        self._lag: float = float("inf")
+        self._lag_checked_at = float("-inf")
+        self._lock = threading.Lock()
+        # Écritures récentes de tous les workers (marqueurs partagés rechargés en bloc)
+        self._shared_writes: dict[int, datetime] = {}
+        self._markers_loaded_at = float("-inf")
+        self._markers_lock = threading.Lock()
+    
+    def record_write(self, pharmacy_id: Optional[int]):
+        """Forcer les lectures de la pharmacie sur le primaire pendant la fenêtre de cohérence"""
+        if pharmacy_id is None or replica_engine is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._last_writes[pharmacy_id] = now
+            # Purge paresseuse des marqueurs échus
+            if len(self._last_writes) > 10000:
+                window = settings.READ_YOUR_WRITES_SECONDS
+                self._last_writes = {
+                    pid: at for pid, at in self._last_writes.items() if now - at < window
+                }
+        try:
+            self._store_marker(pharmacy_id, datetime.utcnow())
+        except Exception:
+            # L'écriture métier est déjà validée : seul ce processus garantit la cohérence
+            logger.warning("Marqueur d'écriture non enregistré (pharmacie %s)", pharmacy_id, exc_info=True)
+    
+    @staticmethod
+    def _store_marker(pharmacy_id: int, written_at: datetime):
+        """Marqueur partagé entre les processus (UPDATE puis INSERT : portable)"""
+        marker = ReplicaWriteMarker.__table__
+        with engine.begin() as connection:
+            updated = connection.execute(
+                update(marker).where(marker.c.pharmacy_id == pharmacy_id).values(written_at=written_at)
+            ).rowcount
+            if updated:
+                return
+            try:
+                with connection.begin_nested():
+                    connection.execute(insert(marker).values(pharmacy_id=pharmacy_id, written_at=written_at))
+            except IntegrityError:
+                # Inséré entre-temps par un autre worker
+                connection.execute(
+                    update(marker).where(marker.c.pharmacy_id == pharmacy_id).values(written_at=written_at)
+                )
+    
+    def _load_markers(self):
+        marker = ReplicaWriteMarker.__table__
+        since = datetime.utcnow() - timedelta(seconds=settings.READ_YOUR_WRITES_SECONDS)
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(marker.c.pharmacy_id, marker.c.written_at).where(marker.c.written_at > since)
+            ).all()
+        self._shared_writes = dict(rows)
+        self._markers_loaded_at = time.monotonic()
+    
+    def _written_recently(self, pharmacy_id: int) -> bool:
+        """Écriture récente par un worker quelconque (marqueurs en cache)"""
+        if time.monotonic() - self._markers_loaded_at >= settings.REPLICA_MARKER_REFRESH_SECONDS:
+            with self._markers_lock:
+                if time.monotonic() - self._markers_loaded_at >= settings.REPLICA_MARKER_REFRESH_SECONDS:
+                    self._load_markers()
+        written_at = self._shared_writes.get(pharmacy_id)
+        window = timedelta(seconds=settings.READ_YOUR_WRITES_SECONDS)
+        return written_at is not None and datetime.utcnow() - written_at < window
+    
+    def replica_lag(self) -> float:
+        """Retard de réplication en secondes (mis en cache, infini si indisponible)"""
+        now = time.monotonic()
+        if now - self._lag_checked_at < settings.REPLICA_LAG_CHECK_SECONDS:
+            return self._lag
+        
+        self._lag_checked_at = now
+        try:
+            with replica_engine.connect() as connection:
+                lag = connection.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )).scalar()
+            self._lag = float(lag or 0)
+        except Exception:
+            logger.warning("Réplica indisponible, lectures redirigées vers le primaire")
+            self._lag = float("inf")
+        return self._lag
+    
+    def use_replica(self, pharmacy_id: Optional[int]) -> bool:
+        if replica_engine is None:
+            return False
+        last_write = self._last_writes.get(pharmacy_id)
+        if last_write is not None and time.monotonic() - last_write < settings.READ_YOUR_WRITES_SECONDS:
+            return False
+        if self.replica_lag() > settings.REPLICA_MAX_LAG_SECONDS:
+            return False
+        # Écriture récente par un autre worker
+        return pharmacy_id is None or not self._written_recently(pharmacy_id)
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,111 @@
+# backend/app/db/upgrade.py
+"""
+Mise à niveau des tables existantes, exécutée après create_all au démarrage
+
+create_all crée les tables manquantes mais ne modifie jamais une table
+existante. Cette étape idempotente complète le schéma d'une base créée par une
+version antérieure :
+- colonnes ajoutées depuis (toujours nullables : documents.content_hash,
+  documents.blob_id, pharmacies.quota_*...) ;
+- index déclarés par les modèles et absents de la base ;
+- NOT NULL ajoutés depuis, après remplissage des valeurs manquantes
+  (PostgreSQL ; SQLite ne sait pas modifier une colonne).
+Un index ou une contrainte impossible à créer (ex. doublons existants) est
+signalé dans les logs sans bloquer le démarrage.
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+# Valeur des lignes existantes pour les colonnes devenues NOT NULL
+NOT_NULL_BACKFILLS = {
+    ("documents", "uploaded_at"): "CURRENT_TIMESTAMP",
+}
+
+
+def _column_ddl(engine: Engine, column) -> str:
+    ddl = f"{column.name} {column.type.compile(dialect=engine.dialect)}"
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {target.table.name} ({target.name})"
+    return ddl
+
+
+def _add_missing_columns(engine: Engine, table, existing: set[str]) -> list[str]:
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            raise RuntimeError(
+                f"Colonne {table.name}.{column.name} NOT NULL absente : migration manuelle requise"
+            )
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(engine, column)}"))
+        added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _create_missing_indexes(engine: Engine, table, existing: set[str]) -> list[str]:
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        try:
+            with engine.begin() as connection:
+                ops = index.dialect_options["postgresql"]["ops"] or {}
+                if engine.dialect.name == "postgresql" and "gin_trgm_ops" in ops.values():
+                    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                # checkfirst et ddl_if respectés (index propre à PostgreSQL ignoré sous SQLite)
+                index.create(connection, checkfirst=True)
+        except DBAPIError as exc:
+            logger.error("Index %s non créé : %s", index.name, exc.orig)
+    created = {index["name"] for index in inspect(engine).get_indexes(table.name)} - existing
+    return sorted(created)
+
+
+def _enforce_not_null(engine: Engine, table, columns: dict) -> list[str]:
+    enforced = []
+    for column in table.columns:
+        if column.nullable or column.primary_key or not columns[column.name]["nullable"]:
+            continue
+        backfill = NOT_NULL_BACKFILLS.get((table.name, column.name))
+        try:
+            with engine.begin() as connection:
+                if backfill:
+                    connection.execute(text(
+                        f"UPDATE {table.name} SET {column.name} = {backfill} WHERE {column.name} IS NULL"
+                    ))
+                if engine.dialect.name == "postgresql":
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ALTER COLUMN {column.name} SET NOT NULL"
+                    ))
+        except DBAPIError as exc:
+            logger.error("NOT NULL non appliqué à %s.%s : %s", table.name, column.name, exc.orig)
+            continue
+        if engine.dialect.name == "postgresql":
+            enforced.append(f"{table.name}.{column.name}")
+    return enforced
+
+
+def upgrade_schema(engine: Engine) -> list[str]:
+    """Compléter les tables existantes ; retourne les modifications appliquées"""
+    changes = []
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        changes += _add_missing_columns(engine, table, set(columns))
+        changes += _create_missing_indexes(engine, table, indexes)
+        changes += _enforce_not_null(engine, table, columns)
+    for change in changes:
+        logger.info("Schéma mis à niveau : %s", change)
+    return changes
@@ -4,24 +4,115 @@ Point d'entrée de l'application Santhium
 Initialise FastAPI, les routes, middlewares et la base de données
 """
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.core.config import settings
+from app.core.dependencies import require_metrics_access
+from app.core.loop_watchdog import loop_watchdog
 from app.api.router import api_router
+from app.core.metrics import registry
+from app.db import partitioning
 from app.db.session import engine
+from app.db.upgrade import upgrade_schema
+from app.middleware.logging import RequestLoggingMiddleware
+from app.middleware.loop_watchdog import LoopWatchdogMiddleware
+from app.middleware.memory import MemoryAccountingMiddleware
+from app.middleware.profiling import ProfilingMiddleware
 from app.models import Base
+from app.tasks.audit_log import run_audit_flusher, run_audit_partitioning
+from app.tasks.cleanup import (
+    run_documents_partitioning,
+    run_idempotency_cleanup,
+    run_periodic_cleanup,
+    run_refresh_token_cleanup,
+    run_staging_cleanup,
+)
+from app.tasks.stats import run_periodic_reconciliation
+from app.tasks.tiering import run_periodic_tiering
+from app.tasks.view_tracking import run_view_flusher
+
+
+_database_initialized = False
+
+
+def init_database():
+    """Créer les tables (documents éventuellement partitionnée) et mettre à niveau les existantes, une fois par processus"""
+    global _database_initialized
+    if _database_initialized:
+        return
+    partitioning.prepare_documents_table(engine)
+    partitioning.prepare_audit_table(engine)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    if partitioning.is_enabled(engine):
+        partitioning.create_partitions(engine)
+    partitioning.create_audit_partitions(engine)
+    _database_initialized = True
+    print("✅ Base de données initialisée")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application"""
-    # Startup: Créer les tables
-    Base.metadata.create_all(bind=engine)
-    print("✅ Base de données initialisée")
+    # Startup: déjà fait par le processus maître avec app.server (hérité au fork)
+    init_database()
+    
+    # Écriture groupée des consultations de documents
+    view_flusher_task = asyncio.create_task(run_view_flusher())
+    
+    # Journal d'audit écrit par lots (tampon propre à chaque processus)
+    audit_flusher_task = asyncio.create_task(run_audit_flusher())
+    
+    # Mesure du retard de la boucle et capture des appels bloquants
+    watchdog_task = None
+    if settings.LOOP_WATCHDOG_ENABLED:
+        watchdog_task = asyncio.create_task(loop_watchdog.run())
+    
+    # Tâches de maintenance : un seul worker les exécute (voir app.server)
+    maintenance_tasks = []
+    if settings.BACKGROUND_TASKS_ENABLED:
+        # Recalcul périodique des compteurs du tableau de bord
+        maintenance_tasks.append(asyncio.create_task(run_periodic_reconciliation()))
+        
+        # Partitions mensuelles à venir du journal d'audit
+        maintenance_tasks.append(asyncio.create_task(run_audit_partitioning()))
+        
+        # Partitions de documents à venir (même sans purge automatique)
+        if partitioning.is_enabled(engine):
+            maintenance_tasks.append(asyncio.create_task(run_documents_partitioning()))
+        
+        # Effacement des téléchargements déchiffrés en transit (durée de vie courte)
+        maintenance_tasks.append(asyncio.create_task(run_staging_cleanup()))
+        
+        # Clés d'idempotence échues (store partagé entre les workers)
+        if settings.IDEMPOTENCY_BACKEND == "database":
+            maintenance_tasks.append(asyncio.create_task(run_idempotency_cleanup()))
+        
+        # Refresh tokens périmés (une ligne par connexion et par rotation)
+        maintenance_tasks.append(asyncio.create_task(run_refresh_token_cleanup()))
+        
+        # Archivage des documents froids (segments compressés et chiffrés)
+        if settings.COLD_TIER_ENABLED:
+            maintenance_tasks.append(asyncio.create_task(run_periodic_tiering()))
+        
+        # Purge automatique des documents expirés
+        if settings.AUTO_DELETE_ENABLED:
+            maintenance_tasks.append(asyncio.create_task(run_periodic_cleanup()))
     yield
     # Shutdown: Nettoyage si nécessaire
+    for task in maintenance_tasks:
+        task.cancel()
+    if watchdog_task:
+        watchdog_task.cancel()
+    view_flusher_task.cancel()
+    await asyncio.gather(view_flusher_task, return_exceptions=True)
+    # En dernier : les événements des tâches arrêtées ci-dessus sont écrits
+    audit_flusher_task.cancel()
+    await asyncio.gather(audit_flusher_task, return_exceptions=True)
     print("👋 Arrêt de l'application")
 
 
@@ -37,6 +128,22 @@ app = FastAPI(
     openapi_url="/openapi.json",
 )
 
+# Compteurs SQL par requête (Server-Timing et logs)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(RequestLoggingMiddleware)
+
+# Mémoire par requête (RSS, pic tracemalloc optionnel)
+if settings.MEMORY_ACCOUNTING_ENABLED:
+    app.add_middleware(MemoryAccountingMiddleware)
+
+# Attribution des blocages de la boucle d'événements à leur route
+if settings.LOOP_WATCHDOG_ENABLED:
+    app.add_middleware(LoopWatchdogMiddleware)
+
+# Profilage à la demande (désactivé par défaut)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Configuration CORS
 app.add_middleware(
     CORSMiddleware,
@@ -65,3 +172,9 @@ async def root():
 async def health_check():
     """Healthcheck pour Docker"""
     return {"status": "healthy", "service": "santhium-api"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(_: None = Depends(require_metrics_access)):
+    """Métriques au format Prometheus (files d'admission, mémoire, audit...)"""
+    return registry.render()
@@ -0,0 +1,76 @@
+# backend/app/middleware/logging.py
+"""
+Journalisation des requêtes avec leur coût SQL (en-tête Server-Timing)
+
+Server-Timing n'est envoyé qu'aux appelants internes (boucle locale,
+administrateurs) : il révèle le nombre de requêtes SQL et le temps passé en base.
+"""
+
+import logging
+import time
+
+from app.core.config import settings
+from app.core.dependencies import is_internal_caller
+from app.core.metrics import registry
+from app.core.security import redact_path
+from app.db.instrumentation import start_tracking, stop_tracking
+
+logger = logging.getLogger("santhium.requests")
+
+REQUEST_QUERIES = registry.histogram(
+    "santhium_request_sql_queries",
+    "Nombre de requêtes SQL par requête HTTP",
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+
+
+class RequestLoggingMiddleware:
+    """Middleware ASGI : compteurs SQL par requête, Server-Timing et logs"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        started = time.perf_counter()
+        stats, token = start_tracking()
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            if message["type"] == "http.response.start" and is_internal_caller(scope):
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                server_timing = (
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries, {stats.rows} rows", '
+                    f"app;dur={elapsed_ms:.1f}"
+                )
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", server_timing.encode())
+                ]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_tracking(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            route_name = getattr(route, "path", "unmatched")
+            REQUEST_QUERIES.observe(stats.queries, route=route_name)
+            
+            log = logger.warning if stats.queries > settings.SQL_QUERY_WARNING_THRESHOLD else logger.info
+            log(
+                "%s %s %d %.1fms sql=%d sql_time=%.1fms rows=%d",
+                scope["method"],
+                redact_path(scope["path"]),
+                status_code,
+                elapsed_ms,
+                stats.queries,
+                stats.db_time * 1000,
+                stats.rows,
+            )
@@ -0,0 +1,28 @@
+# backend/app/middleware/loop_watchdog.py
+"""
+Association tâche asyncio -> requête pour le chien de garde de la boucle
+"""
+
+import asyncio
+
+from app.core.loop_watchdog import loop_watchdog
+
+
+class LoopWatchdogMiddleware:
+    """Middleware ASGI : permet d'attribuer un blocage de la boucle à sa route"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        # La route (scope["route"]) n'est connue qu'après le routage : le scope
+        # est conservé et lu au moment de la capture
+        task = asyncio.current_task()
+        loop_watchdog.register(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_watchdog.unregister(task)
@@ -0,0 +1,64 @@
+# backend/app/middleware/memory.py
+"""
+Comptabilité mémoire par requête (RSS, pic tracemalloc optionnel)
+"""
+
+import logging
+import time
+
+from app.core.config import settings
+from app.core.memory import memory_accountant
+
+logger = logging.getLogger("santhium.memory")
+
+
+class MemoryAccountingMiddleware:
+    """Middleware ASGI : mesure mémoire de chaque requête (voir app.core.memory)"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.warning_bytes = settings.MEMORY_WARNING_THRESHOLD_MB * 1024 * 1024
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        content_length = dict(scope["headers"]).get(b"content-length")
+        request_bytes = int(content_length) if content_length and content_length.isdigit() else None
+        status_code = 500
+        response_bytes = 0
+        
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+        
+        measure = memory_accountant.begin(time.perf_counter())
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            record = memory_accountant.end(
+                measure,
+                time.perf_counter(),
+                scope["method"],
+                route,
+                status_code,
+                request_bytes,
+                response_bytes,
+            )
+            if self.warning_bytes and record.weight > self.warning_bytes:
+                logger.warning(
+                    "%s %s mémoire: rss %+.1f MiB, pic rss %+.1f MiB, tracemalloc %s, "
+                    "requête %s octets, réponse %d octets",
+                    record.method,
+                    route,
+                    (record.rss_after - record.rss_before) / 1048576,
+                    record.peak_rss_growth / 1048576,
+                    f"{record.traced_peak / 1048576:.1f} MiB" if record.traced_peak is not None else "-",
+                    record.request_bytes if record.request_bytes is not None else "?",
+                    record.response_bytes,
+                )
@@ -0,0 +1,52 @@
+# backend/app/middleware/profiling.py
+"""
+Activation du profilage par requête (en-tête X-Profile ou échantillon aléatoire)
+"""
+
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.profiling import ProfileSession, profiling_control
+from app.core.security import redact_path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI : profile la requête et renvoie le nom du profil (X-Profile-Id)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        header_value = dict(scope["headers"]).get(PROFILE_HEADER)
+        if not profiling_control.should_profile(header_value):
+            return await self.app(scope, receive, send)
+
+        session = ProfileSession(
+            f"{scope['method']} {redact_path(scope['path'])}",
+            trace_memory=settings.PROFILING_TRACE_MEMORY,
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", session.name.encode())
+                ]
+            await send(message)
+
+        # Démarrage (instantané mémoire compris) dans le pool de threads
+        await run_in_threadpool(session.start)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Arrêt de l'échantillonneur, diff tracemalloc et écriture hors de la boucle
+            prefix = await run_in_threadpool(session.stop)
+            logger.info("Profil de %s écrit dans %s.folded", session.label, prefix)
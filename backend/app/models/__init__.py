@@ -7,11 +7,26 @@ from app.models.user import User
 from app.models.pharmacy import Pharmacy
 from app.models.code import Code
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.archive_segment import ArchiveSegment
+from app.models.refresh_token import RefreshToken
+from app.models.pharmacy_stats import PharmacyStats
+from app.models.audit_event import AuditEvent, AuditChainHead
+from app.models.idempotency_key import IdempotencyKey
+from app.models.replica_write_marker import ReplicaWriteMarker
 
 __all__ = [
     "Base",
     "User",
     "Pharmacy", 
     "Code",
-    "Document"
+    "Document",
+    "DocumentBlob",
+    "ArchiveSegment",
+    "RefreshToken",
+    "PharmacyStats",
+    "AuditEvent",
+    "AuditChainHead",
+    "IdempotencyKey",
+    "ReplicaWriteMarker"
 ]
\ No newline at end of file
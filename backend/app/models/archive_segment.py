@@ -0,0 +1,39 @@
+# backend/app/models/archive_segment.py
+"""
+Modèle pour les segments d'archive du stockage froid
+"""
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class ArchiveSegment(Base):
+    """
+    Fichier en ajout seul regroupant les contenus froids d'une pharmacie dont
+    la rétention expire le même jour : il est supprimé d'un bloc à l'expiration.
+    """
+    
+    __tablename__ = "archive_segments"
+    __table_args__ = (
+        UniqueConstraint("pharmacy_id", "expiry_day", name="uq_archive_segments_pharmacy_day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id"), nullable=False)
+    expiry_day = Column(Date, nullable=False)
+    
+    # Chemin relatif à COLD_TIER_DIR
+    path = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False, default=0)  # Octets écrits (fin du dernier contenu)
+    entry_count = Column(Integer, nullable=False, default=0)
+    
+    # Date de suppression la plus tardive des documents archivés
+    expires_at = Column(DateTime, index=True)
+    
+    blobs = relationship("DocumentBlob", back_populates="segment")
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
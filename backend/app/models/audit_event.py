@@ -0,0 +1,55 @@
+# backend/app/models/audit_event.py
+"""
+Modèles du journal d'audit HDS (ajout seul, chaîné par empreintes)
+"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, JSON, String
+
+from app.models.base import Base
+
+
+class AuditEvent(Base):
+    """
+    Événement d'audit : qui a fait quoi sur quel code ou document.
+
+    Chaque événement porte l'empreinte du précédent : toute modification ou
+    suppression d'une ligne rompt la chaîne (voir AuditService.verify). Pas de
+    clé étrangère : le journal survit aux documents purgés.
+    """
+    
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        # Consultation par pharmacie sur une plage de dates
+        Index("ix_audit_events_pharmacy_occurred", "pharmacy_id", "occurred_at"),
+    )
+    
+    # Position dans la chaîne, attribuée à l'écriture (croissante, sans trou)
+    sequence = Column(BigInteger, primary_key=True, autoincrement=False)
+    
+    # Identité ORM fixée sur sequence quand la table partitionnée a pour clé
+    # primaire (sequence, occurred_at) (voir app/db/partitioning.py)
+    __mapper_args__ = {"primary_key": [sequence]}
+    
+    occurred_at = Column(DateTime, nullable=False, index=True)
+    action = Column(String(64), nullable=False)
+    
+    # Auteur (utilisateur ou code patient) et objet de l'action
+    user_id = Column(Integer)
+    code_id = Column(Integer)
+    pharmacy_id = Column(Integer)
+    document_id = Column(Integer)
+    details = Column(JSON)
+    
+    # SHA-256 (hex) de l'empreinte précédente et du contenu de l'événement
+    prev_hash = Column(String(64), nullable=False)
+    hash = Column(String(64), nullable=False)
+
+
+class AuditChainHead(Base):
+    """Dernier maillon de la chaîne (une ligne, verrouillée à chaque écriture de lot)"""
+    
+    __tablename__ = "audit_chain_head"
+    
+    id = Column(Integer, primary_key=True)
+    sequence = Column(BigInteger, nullable=False, default=0)
+    hash = Column(String(64), nullable=False)
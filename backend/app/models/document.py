@@ -3,8 +3,8 @@
 Modèle pour les documents téléchargés
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Boolean, ForeignKey, Index, DDL, event
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime, timedelta
 
 from app.models.base import Base
@@ -14,8 +14,23 @@ class Document(Base):
     """Modèle Document médical"""
     
     __tablename__ = "documents"
+    __table_args__ = (
+        # Listes et recherche par pharmacie, triées par date (pagination par curseur)
+        Index("ix_documents_pharmacy_uploaded", "pharmacy_id", "uploaded_at", "id"),
+        # Recherche par fragment de nom de fichier (PostgreSQL, extension pg_trgm)
+        Index(
+            "ix_documents_original_filename_trgm",
+            "original_filename",
+            postgresql_using="gin",
+            postgresql_ops={"original_filename": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # Identité ORM fixée sur id, y compris quand la table partitionnée a pour
+    # clé primaire (id, uploaded_at) (voir app/db/partitioning.py)
+    __mapper_args__ = {"primary_key": [id]}
     
     # Informations fichier
     filename = Column(String, nullable=False)
@@ -24,11 +39,16 @@ class Document(Base):
     file_type = Column(String)  # Extension
     mime_type = Column(String)
     
-    # Contenu chiffré
-    encrypted_content = Column(LargeBinary)
+    # Contenu chiffré (documents antérieurs à la déduplication), chargé à la demande
+    encrypted_content = deferred(Column(LargeBinary))
+    
+    # Contenu dédupliqué
+    content_hash = Column(String(64), index=True)  # SHA-256 du contenu en clair
+    blob_id = Column(Integer, ForeignKey("document_blobs.id"), index=True)
+    blob = relationship("DocumentBlob", back_populates="documents")
     
     # Relations
-    code_id = Column(Integer, ForeignKey("codes.id"))
+    code_id = Column(Integer, ForeignKey("codes.id"), index=True)
     code = relationship("Code", back_populates="documents")
     
     pharmacy_id = Column(Integer, ForeignKey("pharmacies.id"))
@@ -40,8 +60,16 @@ class Document(Base):
     deletion_date = Column(DateTime)  # Date de suppression auto
     
     # Timestamps
-    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    uploaded_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Clé de partitionnement
     
     def calculate_deletion_date(self, retention_days: int = 30):
         """Calculer la date de suppression automatique"""
-        self.deletion_date = datetime.utcnow() + timedelta(days=retention_days)
\ No newline at end of file
+        self.deletion_date = datetime.utcnow() + timedelta(days=retention_days)
+
+
+# L'index trigramme nécessite l'extension pg_trgm
+event.listen(
+    Document.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -0,0 +1,51 @@
+# backend/app/models/document_blob.py
+"""
+Modèle pour les contenus chiffrés dédupliqués (un blob par empreinte et par pharmacie)
+"""
+
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, LargeBinary, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class DocumentBlob(Base):
+    """Contenu chiffré partagé entre les documents identiques d'une pharmacie"""
+    
+    __tablename__ = "document_blobs"
+    __table_args__ = (
+        UniqueConstraint("pharmacy_id", "content_hash", name="uq_document_blobs_pharmacy_hash"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Empreinte SHA-256 (hex) du contenu en clair
+    content_hash = Column(String(64), nullable=False)
+    size = Column(Integer)  # En bytes (contenu en clair)
+    
+    # Contenu chiffré par une clé de données propre au blob (NULL : stockage froid)
+    encrypted_content = Column(LargeBinary)
+    
+    # Compression appliquée avant chiffrement (NULL : aucune)
+    codec = Column(String(16))
+    
+    # Emplacement dans un segment d'archive (stockage froid)
+    segment_id = Column(Integer, ForeignKey("archive_segments.id"), index=True)
+    segment_offset = Column(BigInteger)
+    segment_length = Column(Integer)
+    segment = relationship("ArchiveSegment", back_populates="blobs")
+    
+    # Clé de données chiffrée par la clé maîtresse key_id (NULL : format historique)
+    key_id = Column(String(64), index=True)
+    wrapped_key = Column(LargeBinary)
+    
+    # Nombre de documents qui référencent ce blob
+    ref_count = Column(Integer, nullable=False, default=1)
+    
+    # Relations
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id"), nullable=False)
+    documents = relationship("Document", back_populates="blob")
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,27 @@
+# backend/app/models/idempotency_key.py
+"""
+Clés d'idempotence partagées entre les workers (requêtes rejouées)
+"""
+
+from sqlalchemy import Column, DateTime, JSON, String
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Requête idempotente : en cours (response vide, bail jusqu'à expires_at)
+    puis réponse mémorisée jusqu'à expires_at
+    """
+    
+    __tablename__ = "idempotency_keys"
+    
+    scope = Column(String(100), primary_key=True)  # Endpoint (et utilisateur le cas échéant)
+    key = Column(String(255), primary_key=True)  # En-tête Idempotency-Key
+    fingerprint = Column(String(64), nullable=False)
+    response = Column(JSON(none_as_null=True))  # NULL tant que la requête est en cours
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
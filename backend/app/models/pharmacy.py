@@ -3,7 +3,7 @@
 Modèle SQLAlchemy pour les pharmacies
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import secrets
@@ -34,11 +34,16 @@ class Pharmacy(Base):
     address = Column(String)
     city = Column(String)
     postal_code = Column(String)
-    phone = Column(String)
-    email = Column(String)
+    phone = Column(String, unique=True, index=True)
+    email = Column(String, unique=True, index=True)
     
     is_active = Column(Boolean, default=True)
     
+    # Quotas propres à la pharmacie (NULL : valeurs par défaut de la configuration, 0 : illimité)
+    quota_max_bytes = Column(BigInteger)
+    quota_max_documents = Column(Integer)
+    quota_max_uploads_per_hour = Column(Integer)
+    
     # Relations
     users = relationship("User", back_populates="pharmacy")
     codes = relationship("Code", back_populates="pharmacy")
@@ -0,0 +1,30 @@
+# backend/app/models/pharmacy_stats.py
+"""
+Compteurs du tableau de bord, maintenus incrémentalement par pharmacie
+"""
+
+from sqlalchemy import BigInteger, Column, Integer, DateTime, ForeignKey
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class PharmacyStats(Base):
+    """Compteurs agrégés d'une pharmacie (lecture O(1))"""
+    
+    __tablename__ = "pharmacy_stats"
+    
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id", ondelete="CASCADE"), primary_key=True)
+    
+    total_documents = Column(Integer, nullable=False, default=0)
+    unviewed_documents = Column(Integer, nullable=False, default=0)
+    active_codes = Column(Integer, nullable=False, default=0)  # Actifs et non épuisés
+    stored_bytes = Column(BigInteger, nullable=False, default=0)  # Taille cumulée des documents
+    
+    # Fenêtre fixe d'une heure pour le quota d'uploads
+    uploads_window_start = Column(DateTime)
+    uploads_in_window = Column(Integer, nullable=False, default=0)
+    
+    # Dernier recalcul complet (corrige les dérives et les codes expirés)
+    reconciled_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,29 @@
+# backend/app/models/refresh_token.py
+"""
+Modèle pour les refresh tokens (rotation et révocation des sessions)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class RefreshToken(Base):
+    """Refresh token opaque, stocké uniquement sous forme d'empreinte"""
+    
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256
+    
+    # Session : tous les tokens issus d'une même connexion partagent la famille
+    family_id = Column(String(32), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime)  # Remplacé par un nouveau token (rotation)
+    revoked_at = Column(DateTime, index=True)  # Session révoquée (déconnexion, réutilisation)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
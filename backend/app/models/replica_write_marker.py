@@ -0,0 +1,17 @@
+# backend/app/models/replica_write_marker.py
+"""
+Dernière écriture par pharmacie (lecture de ses écritures malgré le réplica)
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from app.models.base import Base
+
+
+class ReplicaWriteMarker(Base):
+    """Tant que written_at est récent, les lectures de la pharmacie vont au primaire"""
+    
+    __tablename__ = "replica_write_markers"
+    
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id", ondelete="CASCADE"), primary_key=True)
+    written_at = Column(DateTime, nullable=False)
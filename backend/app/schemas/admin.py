@@ -0,0 +1,72 @@
+"""Schémas Pydantic pour l'administration de la plateforme."""
+
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProfilingSettings(BaseModel):
+    sample_rate: float = Field(..., ge=0.0, le=1.0)
+
+
+class ProfilingStatus(BaseModel):
+    enabled: bool
+    sample_rate: float
+    header_enabled: bool
+    output_dir: str
+    recent_profiles: list[str]
+
+
+class AuditEventResponse(BaseModel):
+    sequence: int
+    occurred_at: datetime
+    action: str
+    user_id: Optional[int] = None
+    code_id: Optional[int] = None
+    pharmacy_id: Optional[int] = None
+    document_id: Optional[int] = None
+    details: Optional[dict[str, Any]] = None
+    hash: str
+
+    class Config:
+        from_attributes = True
+
+
+class AuditVerification(BaseModel):
+    checked: int
+    head_sequence: int
+    valid: bool
+    first_invalid_sequence: Optional[int] = None
+    reason: Optional[str] = None
+
+
+class MemorySettings(BaseModel):
+    tracemalloc: bool
+
+
+class RequestMemoryResponse(BaseModel):
+    finished_at: datetime
+    method: str
+    route: str
+    status_code: int
+    request_bytes: Optional[int] = None
+    response_bytes: int
+    duration_ms: float
+    rss_before: int
+    rss_after: int
+    peak_rss_growth: int
+    allocated_blocks: int
+    traced_peak: Optional[int] = None
+    exclusive: bool
+
+
+class MemoryReport(BaseModel):
+    pid: int
+    rss_bytes: int
+    peak_rss_bytes: int
+    tracemalloc: bool
+    traced_current_bytes: Optional[int] = None
+    traced_peak_bytes: Optional[int] = None
+    recorded_requests: int
+    heaviest: list[RequestMemoryResponse]
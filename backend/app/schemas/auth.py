@@ -36,9 +36,15 @@ class UserResponse(BaseModel):
 class TokenResponse(BaseModel):
     """Schéma pour la réponse token"""
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
     user: UserResponse
 
 
+class RefreshRequest(BaseModel):
+    """Schéma pour le renouvellement ou la révocation d'une session"""
+    refresh_token: str
+
+
 class UserProfileResponse(UserResponse):
     pharmacy: Optional[PharmacyInfo]
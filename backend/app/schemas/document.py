@@ -31,4 +31,26 @@ class DocumentResponse(BaseModel):
 class DocumentList(BaseModel):
     """Schéma pour une liste de documents"""
     documents: list[DocumentResponse]
-    total: int
\ No newline at end of file
+    total: int
+
+
+class DocumentSearchResponse(BaseModel):
+    """Schéma pour une page de résultats de recherche"""
+    documents: list[DocumentResponse]
+    next_cursor: Optional[str] = None
+
+
+class DocumentDownloadUrl(BaseModel):
+    """Schéma pour une URL de téléchargement signée et temporaire"""
+    url: str
+    expires_at: datetime
+
+
+class DocumentMarkViewed(BaseModel):
+    """Schéma pour marquer plusieurs documents comme vus"""
+    document_ids: list[int] = Field(..., min_length=1, max_length=1000)
+
+
+class DocumentMarkViewedResponse(BaseModel):
+    """Schéma pour la réponse du marquage groupé"""
+    updated: int
\ No newline at end of file
@@ -52,3 +52,44 @@ class PharmacyInfo(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PharmacyImportRow(BaseModel):
+    line: int
+    status: str  # "created" ou "error"
+    tenant_code: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PharmacyImportReport(BaseModel):
+    created: int
+    failed: int
+    rows: list[PharmacyImportRow]
+
+
+class PharmacyQuota(BaseModel):
+    """Quotas effectifs (0 : illimité)"""
+    max_bytes: int
+    max_documents: int
+    max_uploads_per_hour: int
+
+
+class PharmacyQuotaUpdate(BaseModel):
+    """Quotas propres à une pharmacie (None : valeur par défaut, 0 : illimité)"""
+    max_bytes: Optional[int] = Field(None, ge=0)
+    max_documents: Optional[int] = Field(None, ge=0)
+    max_uploads_per_hour: Optional[int] = Field(None, ge=0)
+
+
+class PharmacyStatsResponse(BaseModel):
+    pharmacy_id: int
+    total_documents: int
+    unviewed_documents: int
+    active_codes: int
+    stored_bytes: int
+    uploads_last_hour: int
+    quota: PharmacyQuota
+    reconciled_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,119 @@
+# backend/app/server.py
+"""
+Lanceur de production : Gunicorn supervise N workers Uvicorn (uvloop, httptools)
+
+- un worker par cœur disponible par défaut (SERVER_WORKERS=0) ;
+- application préchargée dans le maître puis partagée en copie sur écriture ;
+- recyclage progressif des workers après SERVER_MAX_REQUESTS requêtes ;
+- schéma créé une seule fois dans le maître, tâches de maintenance confiées à
+  un seul worker (réattribuées si ce worker est recyclé).
+
+État partagé entre les workers : clés d'idempotence et marqueurs de lecture
+de ses écritures sont en base (un rejeu ou une lecture peut arriver sur
+n'importe quel worker) ; IDEMPOTENCY_BACKEND=memory impose un seul worker.
+Restent propres à chaque worker : les limites d'admission (capacité totale =
+workers x ADMISSION_*_CONCURRENCY, file comprise), SERVER_LIMIT_CONCURRENCY,
+le cache de révocation (rechargé toutes les REVOCATION_CACHE_SECONDS), les
+tampons d'audit et de consultations, et les métriques.
+
+Usage : python -m app.server
+"""
+
+import os
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+
+class SanthiumWorker(UvicornWorker):
+    """Worker Uvicorn avec boucle uvloop et parseur HTTP httptools"""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY or None,
+    }
+
+
+def available_cores() -> int:
+    """Cœurs utilisables par ce processus (affinité CPU du conteneur)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    # Endpoints asynchrones : un worker par cœur suffit à occuper la machine
+    workers = settings.SERVER_WORKERS or available_cores()
+    if workers > 1 and settings.IDEMPOTENCY_BACKEND == "memory":
+        raise SystemExit(
+            "IDEMPOTENCY_BACKEND=memory n'est pas partagé entre les workers : "
+            "utiliser IDEMPOTENCY_BACKEND=database ou SERVER_WORKERS=1"
+        )
+    return workers
+
+
+def pre_fork(server, worker):
+    """Dans le maître : désigner le worker de maintenance s'il n'y en a plus"""
+    worker.maintenance = not any(
+        getattr(other, "maintenance", False) for other in server.WORKERS.values()
+    )
+
+
+def post_fork(server, worker):
+    """Dans le worker : connexions propres et rôle de maintenance"""
+    from app.db.session import engine, replica_engine
+
+    # Ne jamais partager une connexion ouverte par le maître entre processus
+    engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+    settings.BACKGROUND_TASKS_ENABLED = settings.BACKGROUND_TASKS_ENABLED and worker.maintenance
+
+
+class SanthiumApplication(BaseApplication):
+    """Application Gunicorn configurée depuis Settings"""
+
+    def __init__(self):
+        self.application = None
+        super().__init__()
+
+    def load_config(self):
+        options = {
+            "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+            "workers": worker_count(),
+            "worker_class": "app.server.SanthiumWorker",
+            "preload_app": settings.SERVER_PRELOAD,
+            "backlog": settings.SERVER_BACKLOG,
+            "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+            "max_requests": settings.SERVER_MAX_REQUESTS,
+            "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+            "timeout": settings.SERVER_TIMEOUT_SECONDS,
+            "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+            "pre_fork": pre_fork,
+            "post_fork": post_fork,
+            "accesslog": None,
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        if self.application is None:
+            from app.main import app, init_database
+
+            # Avant le fork : une seule création de schéma, héritée par les workers
+            init_database()
+            self.application = app
+        return self.application
+
+
+def main():
+    """Fonction principale"""
+    SanthiumApplication().run()
+
+
+if __name__ == "__main__":
+    main()
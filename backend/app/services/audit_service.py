@@ -0,0 +1,162 @@
+# backend/app/services/audit_service.py
+"""
+Logique métier du journal d'audit HDS
+
+Les événements sont écrits par lots : la tête de chaîne est verrouillée une
+fois par lot, les empreintes sont calculées en mémoire puis toutes les lignes
+partent en un INSERT multi-lignes. Chaque empreinte couvre l'empreinte
+précédente : une ligne modifiée, supprimée ou insérée après coup est détectée
+par verify().
+"""
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Optional
+import hashlib
+import json
+
+from app.models.audit_event import AuditChainHead, AuditEvent
+
+GENESIS_HASH = "0" * 64
+HEAD_ID = 1
+
+HASHED_FIELDS = (
+    "sequence", "occurred_at", "action", "user_id", "code_id", "pharmacy_id", "document_id", "details"
+)
+
+
+def event_hash(prev_hash: str, event: dict[str, Any]) -> str:
+    """Empreinte d'un événement chaînée à la précédente (JSON canonique)"""
+    canonical = json.dumps(
+        [
+            event[field].isoformat() if field == "occurred_at" else event[field]
+            for field in HASHED_FIELDS
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(prev_hash.encode() + canonical.encode()).hexdigest()
+
+
+def _as_dict(event: AuditEvent) -> dict[str, Any]:
+    return {field: getattr(event, field) for field in HASHED_FIELDS}
+
+
+class AuditService:
+    """Service d'écriture et de contrôle du journal d'audit"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _lock_head(self) -> AuditChainHead:
+        """Tête de chaîne, verrouillée : un seul lot est chaîné à la fois"""
+        query = select(AuditChainHead).where(AuditChainHead.id == HEAD_ID).with_for_update()
+        head = self.db.execute(query).scalar_one_or_none()
+        if head is not None:
+            return head
+
+        head = AuditChainHead(id=HEAD_ID, sequence=0, hash=GENESIS_HASH)
+        try:
+            with self.db.begin_nested():
+                self.db.add(head)
+        except IntegrityError:
+            # Tête créée entre-temps par un autre processus
+            head = self.db.execute(query).scalar_one()
+        return head
+
+    def write_batch(self, events: list[dict[str, Any]]) -> int:
+        """Chaîner et insérer un lot d'événements (une transaction)"""
+        if not events:
+            return 0
+        head = self._lock_head()
+        sequence, prev_hash = head.sequence, head.hash
+        rows = []
+        for event in events:
+            sequence += 1
+            row = dict(event, sequence=sequence, prev_hash=prev_hash)
+            row["hash"] = prev_hash = event_hash(prev_hash, row)
+            rows.append(row)
+
+        self.db.execute(insert(AuditEvent), rows)
+        head.sequence, head.hash = sequence, prev_hash
+        self.db.commit()
+        return len(rows)
+
+    def list_events(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        pharmacy_id: Optional[int] = None,
+        action: Optional[str] = None,
+        document_id: Optional[int] = None,
+        limit: int = 100
+    ) -> list[AuditEvent]:
+        """Événements d'une plage de dates (seules les partitions concernées sont lues)"""
+        query = self.db.query(AuditEvent)
+        if start is not None:
+            query = query.filter(AuditEvent.occurred_at >= start)
+        if end is not None:
+            query = query.filter(AuditEvent.occurred_at < end)
+        if pharmacy_id is not None:
+            query = query.filter(AuditEvent.pharmacy_id == pharmacy_id)
+        if action is not None:
+            query = query.filter(AuditEvent.action == action)
+        if document_id is not None:
+            query = query.filter(AuditEvent.document_id == document_id)
+        return query.order_by(AuditEvent.occurred_at.desc(), AuditEvent.sequence.desc()).limit(limit).all()
+
+    def verify(
+        self,
+        from_sequence: Optional[int] = None,
+        to_sequence: Optional[int] = None,
+        batch_size: int = 1000
+    ) -> dict[str, Any]:
+        """
+        Vérifier la chaîne sur un intervalle de séquences (par défaut : en entier).
+
+        Retourne le nombre d'événements contrôlés et, en cas de rupture, la
+        première séquence fautive et la nature du problème.
+        """
+        head = self.db.get(AuditChainHead, HEAD_ID)
+        head_sequence = head.sequence if head else 0
+        last = min(to_sequence or head_sequence, head_sequence)
+        expected_sequence = from_sequence or 1
+        expected_prev: Optional[str] = GENESIS_HASH if expected_sequence == 1 else None
+        checked = 0
+
+        def result(invalid_sequence: Optional[int] = None, reason: Optional[str] = None) -> dict[str, Any]:
+            return {
+                "checked": checked,
+                "head_sequence": head_sequence,
+                "valid": invalid_sequence is None,
+                "first_invalid_sequence": invalid_sequence,
+                "reason": reason,
+            }
+
+        while expected_sequence <= last:
+            events = self.db.query(AuditEvent).filter(
+                AuditEvent.sequence >= expected_sequence,
+                AuditEvent.sequence <= last
+            ).order_by(AuditEvent.sequence).limit(batch_size).all()
+            if not events:
+                return result(expected_sequence, "événements manquants")
+
+            for event in events:
+                if event.sequence != expected_sequence:
+                    return result(expected_sequence, "événement manquant")
+                if expected_prev is not None and event.prev_hash != expected_prev:
+                    return result(event.sequence, "chaînage rompu")
+                if event_hash(event.prev_hash, _as_dict(event)) != event.hash:
+                    return result(event.sequence, "contenu modifié")
+                expected_prev = event.hash
+                expected_sequence += 1
+                checked += 1
+            self.db.expunge_all()
+
+        # La tête doit pointer sur le dernier événement (pas de troncature de fin)
+        if head is not None and last == head_sequence and checked and expected_prev != head.hash:
+            return result(head_sequence, "tête de chaîne incohérente")
+        return result()
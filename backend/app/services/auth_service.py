@@ -1,18 +1,25 @@
 """Logique d'authentification et de gestion des utilisateurs."""
 
-from datetime import timedelta
-from typing import Dict, Any
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+import uuid
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session, joinedload
 
 from app.core.config import settings
 from app.core.security import (
     create_access_token,
+    generate_refresh_token,
     get_password_hash,
-    verify_password,
+    hash_token,
+    verify_and_update_password,
 )
+from app.core.revocation import revocation_cache
+from app.crud.pharmacy import PharmacyRepository
+from app.crud.user import UserRepository
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
-from app.models.pharmacy import Pharmacy
 
 
 class AuthService:
@@ -21,42 +28,151 @@ class AuthService:
     def __init__(self, db: Session):
         self.db = db
 
-    def _create_token_payload(self, user: User) -> Dict[str, Any]:
+    def _issue_refresh_token(self, user_id: int, family_id: str) -> str:
+        """Crée un refresh token (sans commit) et retourne sa valeur en clair."""
+        token = generate_refresh_token()
+        self.db.add(RefreshToken(
+            token_hash=hash_token(token),
+            family_id=family_id,
+            user_id=user_id,
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ))
+        return token
+
+    def _create_token_payload(self, user: User, family_id: Optional[str] = None) -> Dict[str, Any]:
         """Génère la réponse standard attendue par les schemas FastAPI."""
+        if family_id is None:
+            family_id = uuid.uuid4().hex
+        refresh_token = self._issue_refresh_token(user.id, family_id)
+        self.db.commit()
+
         access_token = create_access_token(
-            data={"sub": str(user.id)},
+            # pid : routage des lectures vers le réplica sans requête au primaire
+            data={"sub": str(user.id), "sid": family_id, "pid": user.pharmacy_id},
             expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
         )
         return {
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer",
             "user": user,
         }
 
+    def _revoke_family(self, family_id: str):
+        """Révoque tous les refresh tokens d'une session."""
+        self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        self.db.commit()
+        revocation_cache.add(family_id)
+
+    def refresh(self, refresh_token: str) -> Dict[str, Any]:
+        """Échange un refresh token contre un nouveau couple de tokens (rotation).
+
+        Le token est réclamé par un UPDATE conditionnel : de deux échanges
+        simultanés, un seul obtient la ligne, l'autre est traité comme une
+        réutilisation.
+        """
+        token_hash = hash_token(refresh_token)
+        now = datetime.utcnow()
+        claimed = self.db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_(None),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now,
+            )
+            .values(used_at=now)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        ).first()
+
+        if claimed is None:
+            self.db.rollback()
+            stored = self.db.execute(
+                select(RefreshToken.family_id, RefreshToken.used_at, RefreshToken.revoked_at)
+                .where(RefreshToken.token_hash == token_hash)
+            ).first()
+            # Réutilisation d'un token déjà échangé : la session est compromise
+            if stored and stored.used_at and not stored.revoked_at:
+                self._revoke_family(stored.family_id)
+            raise ValueError("Refresh token invalide ou expiré")
+
+        user = self.db.get(User, claimed.user_id)
+        if not user or not user.is_active:
+            self.db.rollback()
+            raise ValueError("Utilisateur inactif")
+
+        # Le nouveau token est validé avec la réclamation (une transaction)
+        return self._create_token_payload(user, family_id=claimed.family_id)
+
+    def purge_expired_tokens(self) -> int:
+        """Supprime les refresh tokens périmés et retourne leur nombre.
+
+        Sont supprimés les tokens expirés, ainsi que ceux échangés ou révoqués
+        depuis plus longtemps que la durée de vie d'un token d'accès : au-delà,
+        la liste de révocation ne les consulte plus.
+        """
+        now = datetime.utcnow()
+        settled_before = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        result = self.db.execute(
+            delete(RefreshToken).where(or_(
+                RefreshToken.expires_at < now,
+                RefreshToken.used_at < settled_before,
+                RefreshToken.revoked_at < settled_before,
+            ))
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def logout(self, refresh_token: str):
+        """Révoque la session associée au refresh token."""
+        stored = (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.token_hash == hash_token(refresh_token))
+            .first()
+        )
+        if stored:
+            self._revoke_family(stored.family_id)
+
     def authenticate(self, email: str, password: str) -> Dict[str, Any]:
         """Vérifie les identifiants et retourne un token si tout est valide."""
-        user = self.db.query(User).filter(User.email == email).first()
+        user = UserRepository(self.db).get_by_email(email)
+        if not user:
+            raise ValueError("Identifiants invalides")
 
-        if not user or not verify_password(password, user.hashed_password):
+        is_valid, new_hash = verify_and_update_password(password, user.hashed_password)
+        if not is_valid:
             raise ValueError("Identifiants invalides")
 
         if not user.is_active:
             raise ValueError("Utilisateur inactif")
 
+        # Rehachage transparent si le schéma ou le coût a changé
+        if new_hash:
+            user.hashed_password = new_hash
+            self.db.commit()
+
         return self._create_token_payload(user)
 
+    def get_profile(self, user_id: int) -> User:
+        """Charge le pharmacien et sa pharmacie en une requête."""
+        return (
+            self.db.query(User)
+            .options(joinedload(User.pharmacy))
+            .filter(User.id == user_id)
+            .first()
+        )
+
     def register(self, email: str, password: str, full_name: str, pharmacy_code: str) -> Dict[str, Any]:
         """Crée un nouvel utilisateur pharmacien lié à une pharmacie."""
-        existing = self.db.query(User).filter(User.email == email).first()
-        if existing:
+        if UserRepository(self.db).email_exists(email):
             raise ValueError("Un utilisateur avec cet email existe déjà")
 
         normalized_code = pharmacy_code.strip().upper()
-        pharmacy = (
-            self.db.query(Pharmacy)
-            .filter(Pharmacy.tenant_code == normalized_code)
-            .first()
-        )
+        pharmacy = PharmacyRepository(self.db).get_tenant(normalized_code)
         if not pharmacy:
             raise ValueError("Code pharmacie invalide")
         if not pharmacy.is_active:
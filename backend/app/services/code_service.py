@@ -10,6 +10,10 @@ import string
 
 from app.models.code import Code
 from app.core.config import settings
+from app.crud.code import CodeRepository
+from app.db.routing import replica_router
+from app.services.stats_service import StatsService
+from app.tasks.audit_log import audit_log
 
 
 class CodeService:
@@ -26,8 +30,7 @@ class CodeService:
                 for _ in range(length)
             )
             # Vérifier l'unicité
-            existing = self.db.query(Code).filter(Code.code == code).first()
-            if not existing:
+            if not CodeRepository(self.db).exists(code):
                 return code
     
     def create_code(
@@ -49,14 +52,23 @@ class CodeService:
         )
         
         self.db.add(code)
+        StatsService(self.db).increment(pharmacy_id, active_codes=1)
         self.db.commit()
         self.db.refresh(code)
+        replica_router.record_write(pharmacy_id)
+        audit_log.record(
+            "code.generated",
+            user_id=user_id,
+            code_id=code.id,
+            pharmacy_id=pharmacy_id,
+            expiration_hours=expiration_hours
+        )
         
         return code
     
     def validate_code(self, code_str: str) -> bool:
         """Valider un code"""
-        code = self.db.query(Code).filter(Code.code == code_str).first()
+        code = CodeRepository(self.db).get_by_code(code_str)
         
         if not code:
             return False
@@ -65,10 +77,12 @@ class CodeService:
     
     def increment_usage(self, code_str: str):
         """Incrémenter l'utilisation d'un code"""
-        code = self.db.query(Code).filter(Code.code == code_str).first()
+        code = CodeRepository(self.db).get_by_code(code_str)
         if code:
             code.current_uses += 1
             code.last_used_at = datetime.utcnow()
+            if code.current_uses == code.max_uses:
+                StatsService(self.db).increment(code.pharmacy_id, active_codes=-1)
             self.db.commit()
     
     def get_active_codes(self, pharmacy_id: int) -> list[Code]:
@@ -0,0 +1,199 @@
+# backend/app/services/cold_tier_service.py
+"""
+Logique métier du stockage froid (segments d'archive)
+
+Les blobs dont tous les documents sont vus ou anciens sont retirés de la base
+et ajoutés, compressés (zstd) puis chiffrés, à un fichier segment par pharmacie
+et par jour d'expiration. La base ne conserve que (segment, position, longueur) :
+une lecture froide est un unique pread à la bonne position. Un segment est
+supprimé d'un bloc une fois la rétention de tous ses documents expirée.
+"""
+
+from sqlalchemy import case, exists, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from typing import Optional
+import os
+
+from app.core.compression import CODEC_ZSTD, choose_codec, compress, decompress
+from app.core.config import settings
+from app.core.security import decrypt_file, encrypt_file
+from app.models.archive_segment import ArchiveSegment
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+
+
+def _segment_file(segment: ArchiveSegment) -> str:
+    return os.path.join(settings.COLD_TIER_DIR, segment.path)
+
+
+class ColdTierService:
+    """Service d'archivage des contenus froids"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # Lecture
+
+    @staticmethod
+    def read_blob_stored(blob: DocumentBlob) -> bytes:
+        """Lire et déchiffrer un blob archivé (accès direct à sa position), encore compressé"""
+        fd = os.open(_segment_file(blob.segment), os.O_RDONLY)
+        try:
+            raw = os.pread(fd, blob.segment_length, blob.segment_offset)
+        finally:
+            os.close(fd)
+        if len(raw) != blob.segment_length:
+            raise ValueError(f"Segment d'archive tronqué (blob {blob.id})")
+        return decrypt_file(raw, blob.key_id, blob.wrapped_key)
+
+    @classmethod
+    def read_blob(cls, blob: DocumentBlob) -> bytes:
+        """Contenu en clair d'un blob archivé"""
+        return decompress(cls.read_blob_stored(blob), blob.codec)
+
+    def rehydrate(self, blob: DocumentBlob):
+        """Ramener un blob archivé dans la base (nouvelle référence après déduplication)"""
+        content = self.read_blob(blob)
+        blob.codec = choose_codec(content)
+        blob.encrypted_content, blob.key_id, blob.wrapped_key = encrypt_file(
+            compress(content, blob.codec)
+        )
+        blob.segment_id = None
+        blob.segment_offset = None
+        blob.segment_length = None
+
+    # Archivage
+
+    def _eligible_blobs(self, now: datetime, limit: int) -> list[tuple[int, int, datetime]]:
+        """(blob, pharmacie, suppression la plus tardive) des blobs dont tous les documents sont froids"""
+        viewed_before = now - timedelta(hours=settings.COLD_TIER_VIEWED_AFTER_HOURS)
+        uploaded_before = now - timedelta(days=settings.COLD_TIER_AFTER_DAYS)
+        cold = or_(
+            Document.viewed_at < viewed_before,
+            Document.uploaded_at < uploaded_before
+        )
+        return self.db.execute(
+            select(DocumentBlob.id, DocumentBlob.pharmacy_id, func.max(Document.deletion_date))
+            .join(Document, Document.blob_id == DocumentBlob.id)
+            .where(DocumentBlob.segment_id.is_(None), DocumentBlob.encrypted_content.isnot(None))
+            .group_by(DocumentBlob.id, DocumentBlob.pharmacy_id)
+            .having(func.sum(case((cold, 0), else_=1)) == 0)
+            # Les documents en fin de rétention sont laissés à la purge
+            .having(func.max(Document.deletion_date) > now)
+            .order_by(DocumentBlob.id)
+            .limit(limit)
+        ).all()
+
+    def _lock_segment(self, pharmacy_id: int, expiry_day: date) -> ArchiveSegment:
+        """Segment du jour, verrouillé : un seul écrivain ajoute au fichier à la fois"""
+        query = select(ArchiveSegment).where(
+            ArchiveSegment.pharmacy_id == pharmacy_id,
+            ArchiveSegment.expiry_day == expiry_day
+        ).with_for_update()
+        segment = self.db.execute(query).scalar_one_or_none()
+        if segment is not None:
+            return segment
+
+        segment = ArchiveSegment(
+            pharmacy_id=pharmacy_id,
+            expiry_day=expiry_day,
+            path=os.path.join(str(pharmacy_id), f"{expiry_day:%Y%m%d}.seg"),
+            size=0,
+            entry_count=0
+        )
+        try:
+            with self.db.begin_nested():
+                self.db.add(segment)
+        except IntegrityError:
+            # Segment créé entre-temps par un autre archiveur
+            segment = self.db.execute(query).scalar_one()
+        return segment
+
+    def _pack_group(self, pharmacy_id: int, expiry_day: date, blob_ids: list[int], expires_at: datetime) -> int:
+        """Ajouter des blobs au segment (pharmacie, jour) ; retourne le nombre archivé"""
+        segment = self._lock_segment(pharmacy_id, expiry_day)
+        blobs = self.db.query(DocumentBlob).filter(
+            DocumentBlob.id.in_(blob_ids),
+            DocumentBlob.segment_id.is_(None),
+            DocumentBlob.encrypted_content.isnot(None)
+        ).order_by(DocumentBlob.id).with_for_update().all()
+        if not blobs:
+            return 0
+
+        path = _segment_file(segment)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            # Reprise après un ajout non validé : on écrit après les octets orphelins
+            offset = f.tell()
+            for blob in blobs:
+                content = decompress(
+                    decrypt_file(blob.encrypted_content, blob.key_id, blob.wrapped_key),
+                    blob.codec
+                )
+                payload = encrypt_file(compress(content, CODEC_ZSTD, settings.COLD_TIER_ZSTD_LEVEL))
+                raw = payload.ciphertext
+                f.write(raw)
+
+                blob.key_id = payload.key_id
+                blob.wrapped_key = payload.wrapped_key
+                blob.codec = CODEC_ZSTD
+                blob.segment_id = segment.id
+                blob.segment_offset = offset
+                blob.segment_length = len(raw)
+                blob.encrypted_content = None
+                offset += len(raw)
+            # Les octets sont durables avant que la base ne les référence
+            f.flush()
+            os.fsync(f.fileno())
+
+        segment.size = offset
+        segment.entry_count += len(blobs)
+        if segment.expires_at is None or expires_at > segment.expires_at:
+            segment.expires_at = expires_at
+        self.db.commit()
+        return len(blobs)
+
+    def pack(self, batch_size: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """Archiver un lot de blobs froids, groupés par pharmacie et jour d'expiration"""
+        now = now or datetime.utcnow()
+        rows = self._eligible_blobs(now, batch_size or settings.COLD_TIER_BATCH_SIZE)
+
+        groups: dict[tuple[int, date], list] = {}
+        for blob_id, pharmacy_id, expires_at in rows:
+            groups.setdefault((pharmacy_id, expires_at.date()), []).append((blob_id, expires_at))
+
+        packed = 0
+        for (pharmacy_id, expiry_day), entries in groups.items():
+            try:
+                packed += self._pack_group(
+                    pharmacy_id,
+                    expiry_day,
+                    [blob_id for blob_id, _ in entries],
+                    max(expires_at for _, expires_at in entries)
+                )
+            except Exception:
+                self.db.rollback()
+                raise
+        return packed
+
+    def drop_expired_segments(self, now: Optional[datetime] = None) -> int:
+        """Supprimer les segments expirés que plus aucun blob ne référence"""
+        now = now or datetime.utcnow()
+        segments = self.db.query(ArchiveSegment).filter(
+            ArchiveSegment.expires_at <= now,
+            ~exists().where(DocumentBlob.segment_id == ArchiveSegment.id)
+        ).all()
+
+        paths = [_segment_file(segment) for segment in segments]
+        for segment in segments:
+            self.db.delete(segment)
+        self.db.commit()
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(segments)
@@ -3,14 +3,31 @@
 Logique métier pour la gestion des documents
 """
 
+from sqlalchemy import case, update, delete, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from collections import Counter
 from datetime import datetime
+from typing import Iterator, Mapping, Optional, Union
+import base64
+import hashlib
 import os
 
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
 from app.models.code import Code
+from app.models.pharmacy import Pharmacy
+from app.core.compression import choose_codec, compress, decompress, decompress_stream
 from app.core.security import encrypt_file, decrypt_file
 from app.core.config import settings
+from app.crud.code import CodeRepository
+from app.crud.document import DocumentRepository
+from app.db.routing import replica_router
+from app.services.cold_tier_service import ColdTierService
+from app.services.stats_service import QuotaLimits, StatsService
+from app.tasks.audit_log import audit_log
+from app.tasks.view_tracking import view_tracker
+from app.utils.file_handler import SNIFF_BYTES, stage_file, validate_file
 
 
 class DocumentService:
@@ -24,12 +41,16 @@ class DocumentService:
         code: str,
         filename: str,
         content: bytes,
-        content_type: str
+        content_hash: Optional[str] = None
     ) -> Document:
-        """Upload et chiffrement d'un document"""
+        """
+        Upload et chiffrement d'un document
+        
+        content_hash : empreinte SHA-256 déjà calculée à la lecture (sinon calculée ici).
+        """
         
         # Valider le code
-        code_obj = self.db.query(Code).filter(Code.code == code).first()
+        code_obj = CodeRepository(self.db).get_by_code(code)
         if not code_obj or not code_obj.can_be_used():
             raise ValueError("Code invalide ou expiré")
         
@@ -38,14 +59,22 @@ class DocumentService:
         if len(content) > max_size:
             raise ValueError(f"Fichier trop volumineux (max {settings.MAX_FILE_SIZE_MB}MB)")
         
-        # Valider le type
-        file_ext = filename.split('.')[-1].lower()
-        allowed = settings.ALLOWED_EXTENSIONS.split(',')
-        if file_ext not in allowed:
-            raise ValueError(f"Type de fichier non autorisé. Autorisés: {allowed}")
+        # Valider le type d'après le contenu (le type annoncé par le client est ignoré)
+        file_ext, mime_type = validate_file(
+            filename, content[:SNIFF_BYTES], settings.ALLOWED_EXTENSIONS.split(',')
+        )
+        
+        # Quotas de la pharmacie : refus immédiat, avant le coût du chiffrement
+        stats_service = StatsService(self.db)
+        limits = QuotaLimits.for_pharmacy(self.db.get(Pharmacy, code_obj.pharmacy_id))
+        stats_service.check_quota(code_obj.pharmacy_id, len(content), limits)
+        
+        # Empreinte du contenu puis chiffrement (ou réutilisation d'un blob identique)
+        content_hash = content_hash or self.compute_content_hash(content)
+        blob = self._acquire_blob(code_obj.pharmacy_id, content_hash, content, mime_type)
         
-        # Chiffrer le contenu
-        encrypted_content = encrypt_file(content)
+        # Réservation atomique sur les compteurs (documents, octets, uploads/heure)
+        stats_service.reserve_upload(code_obj.pharmacy_id, len(content), limits)
         
         # Créer le document
         document = Document(
@@ -53,8 +82,9 @@ class DocumentService:
             original_filename=filename,
             file_size=len(content),
             file_type=file_ext,
-            mime_type=content_type,
-            encrypted_content=encrypted_content,
+            mime_type=mime_type,
+            content_hash=content_hash,
+            blob_id=blob.id,
             code_id=code_obj.id,
             pharmacy_id=code_obj.pharmacy_id
         )
@@ -68,51 +98,343 @@ class DocumentService:
         code_obj.current_uses += 1
         code_obj.last_used_at = datetime.utcnow()
         
+        # Code épuisé : un code actif de moins sur le tableau de bord
+        if code_obj.current_uses >= code_obj.max_uses:
+            stats_service.increment(code_obj.pharmacy_id, active_codes=-1)
+        
         self.db.commit()
         self.db.refresh(document)
+        replica_router.record_write(document.pharmacy_id)
+        audit_log.record(
+            "document.uploaded",
+            code_id=code_obj.id,
+            pharmacy_id=document.pharmacy_id,
+            document_id=document.id,
+            size=document.file_size,
+            mime_type=mime_type
+        )
         
         return document
     
+    @staticmethod
+    def compute_content_hash(content: bytes, chunk_size: int = 1024 * 1024) -> str:
+        """Calculer l'empreinte SHA-256 du contenu par blocs"""
+        digest = hashlib.sha256()
+        view = memoryview(content)
+        for offset in range(0, len(view), chunk_size):
+            digest.update(view[offset:offset + chunk_size])
+        return digest.hexdigest()
+    
+    def _acquire_blob(
+        self,
+        pharmacy_id: int,
+        content_hash: str,
+        content: bytes,
+        mime_type: Optional[str] = None
+    ) -> DocumentBlob:
+        """Réutiliser le blob d'un contenu identique ou en créer un nouveau"""
+        blob = self._increment_blob(pharmacy_id, content_hash)
+        if blob:
+            if blob.segment_id is not None:
+                # Le nouveau document a sa propre rétention : le contenu quitte l'archive
+                ColdTierService(self.db).rehydrate(blob)
+            return blob
+        
+        # Compression avant chiffrement si l'échantillon s'y prête
+        codec = choose_codec(content, mime_type)
+        payload = encrypt_file(compress(content, codec))
+        blob = DocumentBlob(
+            pharmacy_id=pharmacy_id,
+            content_hash=content_hash,
+            size=len(content),
+            codec=codec,
+            encrypted_content=payload.ciphertext,
+            key_id=payload.key_id,
+            wrapped_key=payload.wrapped_key,
+            ref_count=1
+        )
+        try:
+            with self.db.begin_nested():
+                self.db.add(blob)
+        except IntegrityError:
+            # Upload concurrent du même contenu : on référence le blob gagnant
+            blob = self._increment_blob(pharmacy_id, content_hash)
+            if not blob:
+                raise
+        return blob
+    
+    def _increment_blob(self, pharmacy_id: int, content_hash: str):
+        """Incrémenter atomiquement le compteur de références d'un blob existant"""
+        blob_id = self.db.execute(
+            update(DocumentBlob)
+            .where(
+                DocumentBlob.pharmacy_id == pharmacy_id,
+                DocumentBlob.content_hash == content_hash
+            )
+            .values(ref_count=DocumentBlob.ref_count + 1)
+            .returning(DocumentBlob.id)
+        ).scalar()
+        if blob_id is None:
+            return None
+        return self.db.get(DocumentBlob, blob_id)
+    
+    def _release_blob(self, blob_id: int):
+        """Décrémenter le compteur de références et supprimer le blob orphelin"""
+        self.db.execute(
+            update(DocumentBlob)
+            .where(DocumentBlob.id == blob_id)
+            .values(ref_count=DocumentBlob.ref_count - 1)
+        )
+        self.db.execute(
+            delete(DocumentBlob).where(
+                DocumentBlob.id == blob_id,
+                DocumentBlob.ref_count <= 0
+            )
+        )
+    
+    def _remove_document(self, document: Document) -> Counter:
+        """Supprimer un document en libérant son blob (sans commit) ; retourne les deltas de compteurs"""
+        blob_id = document.blob_id
+        deltas = Counter(
+            total_documents=-1,
+            unviewed_documents=0 if document.is_viewed else -1,
+            stored_bytes=-(document.file_size or 0)
+        )
+        self.db.delete(document)
+        self.db.flush()
+        if blob_id is not None:
+            self._release_blob(blob_id)
+        return deltas
+    
+    def migrate_to_blob(self, document: Document) -> int:
+        """Migrer un document au format historique vers un blob chiffré par enveloppe (sans commit)"""
+        content = decrypt_file(document.encrypted_content)
+        content_hash = self.compute_content_hash(content)
+        blob = self._acquire_blob(document.pharmacy_id, content_hash, content, document.mime_type)
+        document.content_hash = content_hash
+        document.blob_id = blob.id
+        document.encrypted_content = None
+        return len(content)
+    
     def get_pharmacy_documents(self, pharmacy_id: int) -> list[Document]:
         """Récupérer tous les documents d'une pharmacie"""
         return self.db.query(Document).filter(
             Document.pharmacy_id == pharmacy_id
         ).order_by(Document.uploaded_at.desc()).all()
     
+    @staticmethod
+    def _encode_cursor(document: Document) -> str:
+        raw = f"{document.uploaded_at.isoformat()}|{document.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            uploaded_at, document_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(uploaded_at), int(document_id)
+        except ValueError:
+            raise ValueError("Curseur de pagination invalide")
+    
+    def search_documents(
+        self,
+        pharmacy_id: int,
+        filename: Optional[str] = None,
+        file_type: Optional[str] = None,
+        uploaded_from: Optional[datetime] = None,
+        uploaded_to: Optional[datetime] = None,
+        is_viewed: Optional[bool] = None,
+        code: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> tuple[list[Document], Optional[str]]:
+        """Rechercher dans les métadonnées des documents (pagination par curseur)"""
+        query = self.db.query(Document).filter(Document.pharmacy_id == pharmacy_id)
+        
+        if filename:
+            escaped = filename.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.filter(Document.original_filename.ilike(f"%{escaped}%", escape="\\"))
+        if file_type:
+            query = query.filter(Document.file_type == file_type.lower())
+        if uploaded_from:
+            query = query.filter(Document.uploaded_at >= uploaded_from)
+        if uploaded_to:
+            query = query.filter(Document.uploaded_at < uploaded_to)
+        if is_viewed is not None:
+            query = query.filter(Document.is_viewed == is_viewed)
+        if code:
+            query = query.join(Code, Document.code_id == Code.id).filter(Code.code == code.upper())
+        if cursor:
+            query = query.filter(
+                tuple_(Document.uploaded_at, Document.id) < self._decode_cursor(cursor)
+            )
+        
+        documents = query.order_by(
+            Document.uploaded_at.desc(), Document.id.desc()
+        ).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = self._encode_cursor(documents[-1])
+        return documents, next_cursor
+    
+    def _get_document_for_download(
+        self,
+        document_id: int,
+        pharmacy_id: int,
+        user_id: Optional[int] = None
+    ) -> Document:
+        """Charger un document et son contenu en une requête, et enregistrer la consultation"""
+        document = DocumentRepository(self.db).get_with_content(document_id, pharmacy_id)
+        
+        if not document:
+            raise ValueError("Document non trouvé")
+        
+        # Marquer comme vu (écriture différée et groupée, hors du chemin de lecture)
+        if not document.is_viewed:
+            view_tracker.record(document.id)
+        audit_log.record(
+            "document.downloaded",
+            user_id=user_id,
+            pharmacy_id=pharmacy_id,
+            document_id=document.id
+        )
+        return document
+    
+    @staticmethod
+    def _decrypt_stored(document: Document) -> tuple[bytes, Optional[str]]:
+        """Contenu déchiffré tel que stocké, et son codec de compression"""
+        if document.blob_id:
+            blob = document.blob
+            if blob.segment_id is not None:
+                return ColdTierService.read_blob_stored(blob), blob.codec
+            return decrypt_file(blob.encrypted_content, blob.key_id, blob.wrapped_key), blob.codec
+        return decrypt_file(document.encrypted_content), None
+    
     def download_document(
         self, 
         document_id: int, 
-        pharmacy_id: int
+        pharmacy_id: int,
+        user_id: Optional[int] = None
     ) -> tuple[Document, bytes]:
         """Récupérer et déchiffrer un document"""
-        document = self.db.query(Document).filter(
-            Document.id == document_id,
-            Document.pharmacy_id == pharmacy_id
-        ).first()
+        document = self._get_document_for_download(document_id, pharmacy_id, user_id)
+        stored, codec = self._decrypt_stored(document)
+        return document, decompress(stored, codec)
+    
+    def stream_document(
+        self,
+        document_id: int,
+        pharmacy_id: int,
+        user_id: Optional[int] = None
+    ) -> tuple[Document, Iterator[bytes]]:
+        """Déchiffrer un document ; la décompression se fait par blocs à la lecture"""
+        document = self._get_document_for_download(document_id, pharmacy_id, user_id)
+        stored, codec = self._decrypt_stored(document)
+        return document, decompress_stream(stored, codec)
+    
+    def stage_download(
+        self,
+        document_id: int,
+        pharmacy_id: int,
+        user_id: Optional[int] = None
+    ) -> tuple[Document, str]:
+        """Déchiffrer un document dans le répertoire de transit ; retourne (document, nom du fichier)"""
+        document, chunks = self.stream_document(document_id, pharmacy_id, user_id)
+        return document, stage_file(settings.DOWNLOAD_STAGING_DIR, chunks)
+    
+    def mark_viewed(
+        self,
+        document_ids: list[int],
+        pharmacy_id: Optional[int] = None,
+        viewed_at: Union[datetime, Mapping[int, datetime], None] = None,
+        user_id: Optional[int] = None
+    ) -> int:
+        """
+        Marquer plusieurs documents comme vus en une seule requête.
         
-        if not document:
-            raise ValueError("Document non trouvé")
+        viewed_at peut donner la date propre à chaque document (id -> date) :
+        chacun garde sa première consultation.
+        """
+        if not document_ids:
+            return 0
+        if viewed_at is None:
+            viewed_at = datetime.utcnow()
+        elif isinstance(viewed_at, Mapping):
+            viewed_at = case(dict(viewed_at), value=Document.id)
         
-        # Déchiffrer
-        decrypted_content = decrypt_file(document.encrypted_content)
+        statement = update(Document).where(
+            Document.id.in_(document_ids),
+            Document.is_viewed == False
+        )
+        if pharmacy_id is not None:
+            statement = statement.where(Document.pharmacy_id == pharmacy_id)
         
-        # Marquer comme vu
-        if not document.is_viewed:
-            document.is_viewed = True
-            document.viewed_at = datetime.utcnow()
-            self.db.commit()
+        viewed = self.db.execute(
+            statement
+            .values(is_viewed=True, viewed_at=viewed_at)
+            .returning(Document.id, Document.pharmacy_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        pharmacy_ids = [viewed_pharmacy_id for _, viewed_pharmacy_id in viewed]
+        
+        stats_service = StatsService(self.db)
+        for viewed_pharmacy_id, count in Counter(pharmacy_ids).items():
+            stats_service.increment(viewed_pharmacy_id, unviewed_documents=-count)
         
-        return document, decrypted_content
+        self.db.commit()
+        for viewed_pharmacy_id in set(pharmacy_ids):
+            replica_router.record_write(viewed_pharmacy_id)
+        # Marquage explicite par un utilisateur (les téléchargements sont déjà tracés)
+        if user_id is not None:
+            for document_id, viewed_pharmacy_id in viewed:
+                audit_log.record(
+                    "document.viewed",
+                    user_id=user_id,
+                    pharmacy_id=viewed_pharmacy_id,
+                    document_id=document_id
+                )
+        return len(viewed)
     
-    def delete_document(self, document_id: int, pharmacy_id: int):
+    def delete_document(self, document_id: int, pharmacy_id: int, user_id: Optional[int] = None):
         """Supprimer un document"""
-        document = self.db.query(Document).filter(
-            Document.id == document_id,
-            Document.pharmacy_id == pharmacy_id
-        ).first()
+        document = DocumentRepository(self.db).get_for_pharmacy(document_id, pharmacy_id)
         
         if not document:
             raise ValueError("Document non trouvé")
         
-        self.db.delete(document)
-        self.db.commit()
\ No newline at end of file
+        StatsService(self.db).increment(document.pharmacy_id, **self._remove_document(document))
+        self.db.commit()
+        replica_router.record_write(pharmacy_id)
+        audit_log.record(
+            "document.deleted",
+            user_id=user_id,
+            pharmacy_id=pharmacy_id,
+            document_id=document_id
+        )
+    
+    def purge_expired_documents(self, batch_size: int = 500) -> int:
+        """Supprimer les documents dont la date de rétention est dépassée"""
+        purged = 0
+        while True:
+            documents = self.db.query(Document).filter(
+                Document.deletion_date <= datetime.utcnow()
+            ).order_by(Document.id).limit(batch_size).all()
+            
+            if not documents:
+                return purged
+            
+            deltas: dict[int, Counter] = {}
+            removed = []
+            for document in documents:
+                pharmacy_id = document.pharmacy_id
+                removed.append((document.id, pharmacy_id))
+                deltas.setdefault(pharmacy_id, Counter()).update(self._remove_document(document))
+            
+            stats_service = StatsService(self.db)
+            for pharmacy_id, pharmacy_deltas in deltas.items():
+                stats_service.increment(pharmacy_id, **pharmacy_deltas)
+            self.db.commit()
+            for document_id, pharmacy_id in removed:
+                audit_log.record("document.purged", pharmacy_id=pharmacy_id, document_id=document_id)
+            purged += len(documents)
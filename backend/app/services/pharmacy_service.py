@@ -1,11 +1,25 @@
 """Service de gestion des pharmacies."""
 
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Optional
+import os
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash
 from app.models.pharmacy import Pharmacy, generate_tenant_code
 from app.models.user import User
-from app.schemas.pharmacy import PharmacyCreate
+from app.schemas.pharmacy import PharmacyCreate, PharmacyQuotaUpdate
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
 
 
 class PharmacyService:
@@ -14,21 +28,8 @@ class PharmacyService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_pharmacy(self, data: PharmacyCreate) -> Pharmacy:
-        """Créer une nouvelle pharmacie (tenant) avec son compte administrateur."""
-        if data.email:
-            existing_email = self.db.query(Pharmacy).filter(Pharmacy.email == data.email).first()
-            if existing_email:
-                raise ValueError("Une pharmacie avec cet email existe déjà")
-
-        existing_phone = self.db.query(Pharmacy).filter(Pharmacy.phone == data.phone).first()
-        if existing_phone:
-            raise ValueError("Une pharmacie avec ce numéro existe déjà")
-
-        existing_user = self.db.query(User).filter(User.email == data.owner_email).first()
-        if existing_user:
-            raise ValueError("Un compte existe déjà avec cet email")
-
+    def _build_tenant(self, data: PharmacyCreate, hashed_password: str) -> tuple[Pharmacy, User]:
+        """Construire la pharmacie et son compte administrateur (sans commit)."""
         pharmacy = Pharmacy(
             name=data.name,
             email=data.email,
@@ -39,20 +40,159 @@ class PharmacyService:
             tenant_code=generate_tenant_code(),
             is_active=True,
         )
-
-        self.db.add(pharmacy)
-        self.db.commit()
-        self.db.refresh(pharmacy)
-
         user = User(
             email=data.owner_email,
-            hashed_password=get_password_hash(data.owner_password),
+            hashed_password=hashed_password,
             full_name=data.owner_full_name,
-            pharmacy_id=pharmacy.id,
+            pharmacy=pharmacy,
             is_active=True,
             is_superuser=False,
         )
-        self.db.add(user)
-        self.db.commit()
+        return pharmacy, user
+
+    def _find_conflict(self, data: PharmacyCreate) -> Optional[str]:
+        """Pharmacie ou compte existant avec les mêmes identifiants (None sinon)."""
+        if data.email and self.db.query(Pharmacy.id).filter(Pharmacy.email == data.email).first():
+            return "Une pharmacie avec cet email existe déjà"
+        if self.db.query(Pharmacy.id).filter(Pharmacy.phone == data.phone).first():
+            return "Une pharmacie avec ce numéro existe déjà"
+        if self.db.query(User.id).filter(User.email == data.owner_email).first():
+            return "Un compte existe déjà avec cet email"
+        return None
+
+    def _conflict_reason(self, data: PharmacyCreate) -> str:
+        """Identifier la contrainte d'unicité violée (uniquement en cas d'échec)."""
+        return self._find_conflict(data) or "Pharmacie déjà existante"
+
+    def create_pharmacy(self, data: PharmacyCreate) -> Pharmacy:
+        """Créer une nouvelle pharmacie (tenant) avec son compte administrateur.
+
+        Pharmacie et compte sont créés dans une seule transaction ; l'unicité
+        est garantie par les contraintes de la base. La vérification préalable
+        couvre les bases où les index d'unicité des pharmacies n'ont pas pu
+        être créés (doublons antérieurs, voir app/db/upgrade.py).
+        """
+        conflict = self._find_conflict(data)
+        if conflict:
+            raise ValueError(conflict)
+
+        hashed_password = get_password_hash(data.owner_password)
+        pharmacy, user = self._build_tenant(data, hashed_password)
 
+        self.db.add_all([pharmacy, user])
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError(self._conflict_reason(data))
+
+        self.db.refresh(pharmacy)
         return pharmacy
+
+    def update_quota(self, pharmacy_id: int, data: PharmacyQuotaUpdate) -> Pharmacy:
+        """Définir les quotas propres à une pharmacie (None : valeurs par défaut)."""
+        pharmacy = self.db.get(Pharmacy, pharmacy_id)
+        if pharmacy is None:
+            raise ValueError("Pharmacie non trouvée")
+        pharmacy.quota_max_bytes = data.max_bytes
+        pharmacy.quota_max_documents = data.max_documents
+        pharmacy.quota_max_uploads_per_hour = data.max_uploads_per_hour
+        self.db.commit()
+        return pharmacy
+
+    def bulk_import(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int = 100,
+        hash_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Importer des pharmacies et leurs comptes depuis des lignes CSV (dictionnaires).
+
+        Les lignes sont traitées par lots : validation, détection des doublons
+        en une requête par contrainte, hachage des mots de passe en parallèle
+        puis insertion groupée. Retourne un rapport ligne par ligne.
+        """
+        report = []
+        numbered = enumerate(rows, start=2)  # ligne 1 : en-tête CSV
+        with ThreadPoolExecutor(max_workers=hash_workers or os.cpu_count()) as pool:
+            for batch in iter(lambda: list(islice(numbered, batch_size)), []):
+                report.extend(self._import_batch(batch, pool))
+
+        created = sum(1 for row in report if row["status"] == "created")
+        return {"created": created, "failed": len(report) - created, "rows": report}
+
+    def _import_batch(self, batch: list, pool: ThreadPoolExecutor) -> list[Dict[str, Any]]:
+        results: Dict[int, Dict[str, Any]] = {}
+        valid: list[tuple[int, PharmacyCreate]] = []
+
+        for line, raw in batch:
+            cleaned = {key: (value.strip() or None) for key, value in raw.items() if key and isinstance(value, str)}
+            try:
+                valid.append((line, PharmacyCreate(**cleaned)))
+            except ValidationError as exc:
+                results[line] = {"line": line, "status": "error", "error": _format_validation_error(exc)}
+
+        valid = self._reject_duplicates(valid, results)
+
+        hashes = pool.map(get_password_hash, [data.owner_password for _, data in valid])
+        tenants = [
+            (line, data, *self._build_tenant(data, hashed))
+            for (line, data), hashed in zip(valid, hashes)
+        ]
+
+        # Relevés avant le commit, qui expire les objets
+        tenant_codes = {line: pharmacy.tenant_code for line, _, pharmacy, _ in tenants}
+
+        try:
+            for _, _, pharmacy, user in tenants:
+                self.db.add_all([pharmacy, user])
+            self.db.commit()
+        except IntegrityError:
+            # Conflit concurrent : repli ligne par ligne avec points de sauvegarde
+            self.db.rollback()
+            tenants = self._insert_one_by_one(tenants, results)
+
+        for line, _, _, _ in tenants:
+            results[line] = {"line": line, "status": "created", "tenant_code": tenant_codes[line]}
+
+        return [results[line] for line, _ in batch]
+
+    def _reject_duplicates(self, valid: list, results: Dict[int, Dict[str, Any]]) -> list:
+        """Écarter les lignes en conflit avec la base ou avec une ligne précédente du lot."""
+        emails = {data.email for _, data in valid if data.email}
+        phones = {data.phone for _, data in valid}
+        owner_emails = {data.owner_email for _, data in valid}
+
+        taken_emails = {e for (e,) in self.db.query(Pharmacy.email).filter(Pharmacy.email.in_(emails))} if emails else set()
+        taken_phones = {p for (p,) in self.db.query(Pharmacy.phone).filter(Pharmacy.phone.in_(phones))} if phones else set()
+        taken_owners = {e for (e,) in self.db.query(User.email).filter(User.email.in_(owner_emails))} if owner_emails else set()
+
+        accepted = []
+        for line, data in valid:
+            if data.email and data.email in taken_emails:
+                error = "Une pharmacie avec cet email existe déjà"
+            elif data.phone in taken_phones:
+                error = "Une pharmacie avec ce numéro existe déjà"
+            elif data.owner_email in taken_owners:
+                error = "Un compte existe déjà avec cet email"
+            else:
+                accepted.append((line, data))
+                if data.email:
+                    taken_emails.add(data.email)
+                taken_phones.add(data.phone)
+                taken_owners.add(data.owner_email)
+                continue
+            results[line] = {"line": line, "status": "error", "error": error}
+        return accepted
+
+    def _insert_one_by_one(self, tenants: list, results: Dict[int, Dict[str, Any]]) -> list:
+        inserted = []
+        for line, data, pharmacy, user in tenants:
+            try:
+                with self.db.begin_nested():
+                    self.db.add_all([pharmacy, user])
+                inserted.append((line, data, pharmacy, user))
+            except IntegrityError:
+                results[line] = {"line": line, "status": "error", "error": self._conflict_reason(data)}
+        self.db.commit()
+        return inserted
@@ -0,0 +1,256 @@
+# backend/app/services/stats_service.py
+"""
+Logique métier pour les compteurs du tableau de bord
+"""
+
+from sqlalchemy import and_, case, func, not_, or_, update, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.models.code import Code
+from app.models.document import Document
+from app.models.pharmacy import Pharmacy
+from app.models.pharmacy_stats import PharmacyStats
+
+
+COUNTERS = ("total_documents", "unviewed_documents", "active_codes", "stored_bytes")
+
+UPLOAD_WINDOW = timedelta(hours=1)
+
+
+class QuotaLimits(NamedTuple):
+    """Quotas effectifs d'une pharmacie (0 : illimité)"""
+    max_bytes: int
+    max_documents: int
+    max_uploads_per_hour: int
+    
+    @classmethod
+    def for_pharmacy(cls, pharmacy: Pharmacy) -> "QuotaLimits":
+        """Quotas propres à la pharmacie, à défaut ceux de la configuration"""
+        def pick(value, default):
+            return default if value is None else value
+        return cls(
+            max_bytes=pick(pharmacy.quota_max_bytes, settings.QUOTA_MAX_STORAGE_MB * 1024 * 1024),
+            max_documents=pick(pharmacy.quota_max_documents, settings.QUOTA_MAX_DOCUMENTS),
+            max_uploads_per_hour=pick(pharmacy.quota_max_uploads_per_hour, settings.QUOTA_MAX_UPLOADS_PER_HOUR),
+        )
+
+
+class QuotaExceededError(ValueError):
+    """Un quota de la pharmacie serait dépassé par l'upload"""
+    
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # Renseigné pour le quota horaire
+
+
+class StatsService:
+    """Service de gestion des compteurs par pharmacie"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def increment(self, pharmacy_id: Optional[int], **deltas: int):
+        """Appliquer des deltas aux compteurs (sans commit, dans la transaction en cours)"""
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if pharmacy_id is None or not deltas:
+            return
+        
+        values = {
+            name: getattr(PharmacyStats, name) + delta for name, delta in deltas.items()
+        }
+        result = self.db.execute(
+            update(PharmacyStats)
+            .where(PharmacyStats.pharmacy_id == pharmacy_id)
+            .values(**values),
+            execution_options={"synchronize_session": False}
+        )
+        if result.rowcount:
+            return
+        
+        # Première écriture : on part d'un recalcul complet, qui inclut déjà les
+        # changements de la transaction en cours
+        if not self._create_row(pharmacy_id):
+            # Ligne créée entre-temps par une autre transaction
+            self.db.execute(
+                update(PharmacyStats)
+                .where(PharmacyStats.pharmacy_id == pharmacy_id)
+                .values(**values),
+                execution_options={"synchronize_session": False}
+            )
+    
+    def _create_row(self, pharmacy_id: int) -> bool:
+        """Insérer la ligne de compteurs recalculée ; False si elle existe déjà"""
+        self.db.flush()
+        try:
+            with self.db.begin_nested():
+                self.db.add(self._compute(pharmacy_id))
+        except IntegrityError:
+            return False
+        return True
+    
+    @staticmethod
+    def quota_violation(
+        stats: PharmacyStats,
+        size: int,
+        limits: QuotaLimits,
+        now: datetime
+    ) -> Optional[QuotaExceededError]:
+        """Quota dépassé si l'on ajoutait un document de `size` octets (None sinon)"""
+        if limits.max_documents and stats.total_documents + 1 > limits.max_documents:
+            return QuotaExceededError(
+                f"Quota de documents atteint ({limits.max_documents} documents)"
+            )
+        if limits.max_bytes and (stats.stored_bytes or 0) + size > limits.max_bytes:
+            return QuotaExceededError(
+                f"Quota de stockage atteint ({limits.max_bytes // (1024 * 1024)} MB)"
+            )
+        window_start = stats.uploads_window_start
+        if (
+            limits.max_uploads_per_hour
+            and window_start is not None
+            and window_start > now - UPLOAD_WINDOW
+            and stats.uploads_in_window + 1 > limits.max_uploads_per_hour
+        ):
+            retry_after = int((window_start + UPLOAD_WINDOW - now).total_seconds()) + 1
+            return QuotaExceededError(
+                f"Quota d'uploads atteint ({limits.max_uploads_per_hour} par heure)",
+                retry_after=retry_after
+            )
+        return None
+    
+    def check_quota(self, pharmacy_id: int, size: int, limits: QuotaLimits):
+        """Contrôle préalable sans verrou, pour refuser avant le chiffrement"""
+        stats = self.db.get(PharmacyStats, pharmacy_id)
+        if stats is not None:
+            violation = self.quota_violation(stats, size, limits, datetime.utcnow())
+            if violation is not None:
+                raise violation
+    
+    def reserve_upload(self, pharmacy_id: int, size: int, limits: QuotaLimits):
+        """
+        Comptabiliser un nouveau document si les quotas le permettent (sans commit).
+        
+        Un seul UPDATE conditionnel vérifie et incrémente les compteurs : deux
+        uploads concurrents ne peuvent pas dépasser ensemble un quota.
+        """
+        for _ in range(3):
+            now = datetime.utcnow()
+            window_open = and_(
+                PharmacyStats.uploads_window_start.is_not(None),
+                PharmacyStats.uploads_window_start > now - UPLOAD_WINDOW
+            )
+            conditions = [PharmacyStats.pharmacy_id == pharmacy_id]
+            if limits.max_documents:
+                conditions.append(PharmacyStats.total_documents + 1 <= limits.max_documents)
+            if limits.max_bytes:
+                conditions.append(PharmacyStats.stored_bytes + size <= limits.max_bytes)
+            if limits.max_uploads_per_hour:
+                conditions.append(or_(
+                    not_(window_open),
+                    PharmacyStats.uploads_in_window + 1 <= limits.max_uploads_per_hour
+                ))
+            
+            result = self.db.execute(
+                update(PharmacyStats)
+                .where(*conditions)
+                .values(
+                    total_documents=PharmacyStats.total_documents + 1,
+                    unviewed_documents=PharmacyStats.unviewed_documents + 1,
+                    stored_bytes=PharmacyStats.stored_bytes + size,
+                    uploads_in_window=case(
+                        (window_open, PharmacyStats.uploads_in_window + 1), else_=1
+                    ),
+                    uploads_window_start=case(
+                        (window_open, PharmacyStats.uploads_window_start), else_=now
+                    ),
+                ),
+                execution_options={"synchronize_session": False}
+            )
+            if result.rowcount:
+                return
+            
+            stats = self.db.execute(
+                select(PharmacyStats)
+                .where(PharmacyStats.pharmacy_id == pharmacy_id)
+                .execution_options(populate_existing=True)
+            ).scalar_one_or_none()
+            if stats is None:
+                # Première écriture : le recalcul n'inclut pas encore ce document
+                self._create_row(pharmacy_id)
+                continue
+            violation = self.quota_violation(stats, size, limits, now)
+            if violation is not None:
+                raise violation
+        raise RuntimeError("Impossible de réserver le quota d'upload")
+    
+    def _compute(self, pharmacy_id: int) -> PharmacyStats:
+        """Recalculer les compteurs d'une pharmacie depuis les tables sources"""
+        total, unviewed, stored_bytes = self.db.execute(
+            select(
+                func.count(Document.id),
+                func.count(Document.id).filter(Document.is_viewed == False),
+                func.coalesce(func.sum(Document.file_size), 0)
+            ).where(Document.pharmacy_id == pharmacy_id)
+        ).one()
+        active_codes = self.db.execute(
+            select(func.count(Code.id)).where(
+                Code.pharmacy_id == pharmacy_id,
+                Code.is_active == True,
+                Code.expiration_date > datetime.utcnow(),
+                Code.current_uses < Code.max_uses
+            )
+        ).scalar()
+        return PharmacyStats(
+            pharmacy_id=pharmacy_id,
+            total_documents=total,
+            unviewed_documents=unviewed,
+            active_codes=active_codes,
+            stored_bytes=stored_bytes,
+            reconciled_at=datetime.utcnow()
+        )
+    
+    def get_stats(self, pharmacy_id: int) -> PharmacyStats:
+        """
+        Lire les compteurs d'une pharmacie (calculés à la volée si absents).
+        
+        Aucune écriture : la session peut être celle du réplica. La ligne est
+        créée par le premier upload ou par le recalcul périodique (primaire).
+        """
+        stats = self.db.get(PharmacyStats, pharmacy_id)
+        if stats is None:
+            stats = self._compute(pharmacy_id)
+        return stats
+    
+    def get_usage(self, pharmacy_id: int) -> dict:
+        """Compteurs, consommation et quotas effectifs d'une pharmacie"""
+        stats = self.get_stats(pharmacy_id)
+        limits = QuotaLimits.for_pharmacy(self.db.get(Pharmacy, pharmacy_id))
+        window_start = stats.uploads_window_start
+        window_open = window_start is not None and window_start > datetime.utcnow() - UPLOAD_WINDOW
+        return {
+            "pharmacy_id": pharmacy_id,
+            "total_documents": stats.total_documents,
+            "unviewed_documents": stats.unviewed_documents,
+            "active_codes": stats.active_codes,
+            "stored_bytes": stats.stored_bytes or 0,
+            "uploads_last_hour": stats.uploads_in_window if window_open else 0,
+            "quota": limits._asdict(),
+            "reconciled_at": stats.reconciled_at,
+        }
+    
+    def reconcile(self, pharmacy_id: int) -> PharmacyStats:
+        """Recalculer et écraser les compteurs d'une pharmacie (la fenêtre d'uploads est conservée)"""
+        stats = self.db.merge(self._compute(pharmacy_id))
+        self.db.commit()
+        return stats
+    
+    def reconcile_all(self) -> int:
+        """Recalculer les compteurs de toutes les pharmacies"""
+        pharmacy_ids = self.db.execute(select(Pharmacy.id)).scalars().all()
+        for pharmacy_id in pharmacy_ids:
+            self.reconcile(pharmacy_id)
+        return len(pharmacy_ids)
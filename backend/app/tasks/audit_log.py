@@ -0,0 +1,167 @@
+# backend/app/tasks/audit_log.py
+"""
+Écriture différée du journal d'audit HDS
+
+Les services enregistrent les événements dans un tampon circulaire en mémoire
+(sans requête SQL) ; une tâche de fond les écrit par lots chaînés. Garanties :
+- arrêt normal : le tampon est vidé avant la fin du processus ;
+- arrêt brutal : au plus AUDIT_BUFFER_SIZE événements (≈ AUDIT_FLUSH_INTERVAL_MS
+  d'activité) sont perdus ;
+- tampon plein (base indisponible) : les plus anciens sont écartés et un
+  événement « audit.events_dropped » inscrit la perte dans la chaîne.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db import partitioning
+from app.db.session import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+DROPPED_ACTION = "audit.events_dropped"
+
+AUDIT_EVENTS = registry.counter(
+    "santhium_audit_events_total", "Événements d'audit enregistrés, écrits ou perdus"
+)
+AUDIT_BUFFERED = registry.gauge(
+    "santhium_audit_buffered_events", "Événements d'audit en attente d'écriture"
+)
+
+
+class AuditLog:
+    """Tampon circulaire borné des événements d'audit, vidé par lots"""
+
+    def __init__(self, capacity: int = 10000, batch_size: int = 500):
+        self.batch_size = batch_size
+        self._buffer: deque[dict[str, Any]] = deque(maxlen=capacity)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        action: str,
+        *,
+        user_id: Optional[int] = None,
+        code_id: Optional[int] = None,
+        pharmacy_id: Optional[int] = None,
+        document_id: Optional[int] = None,
+        **details
+    ):
+        """Enregistrer un événement (après validation de l'action en base)"""
+        if not settings.AUDIT_ENABLED:
+            return
+        event = {
+            "occurred_at": datetime.utcnow(),
+            "action": action,
+            "user_id": user_id,
+            "code_id": code_id,
+            "pharmacy_id": pharmacy_id,
+            "document_id": document_id,
+            "details": details or None,
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped += 1
+                AUDIT_EVENTS.inc(outcome="dropped")
+            self._buffer.append(event)
+        AUDIT_EVENTS.inc(outcome="recorded")
+
+    def __len__(self) -> int:
+        return len(self._buffer) + (1 if self._dropped else 0)
+
+    def _drain(self) -> tuple[list[dict[str, Any]], int]:
+        with self._lock:
+            events = list(self._buffer)
+            self._buffer.clear()
+            dropped, self._dropped = self._dropped, 0
+        return events, dropped
+
+    def _requeue(self, events: list[dict[str, Any]], dropped: int):
+        """Remettre en tête les événements non écrits (les plus anciens cèdent si plein)"""
+        with self._lock:
+            pending = events + list(self._buffer)
+            overflow = max(0, len(pending) - self._buffer.maxlen)
+            if overflow:
+                AUDIT_EVENTS.inc(overflow, outcome="dropped")
+            self._buffer = deque(pending[overflow:], maxlen=self._buffer.maxlen)
+            self._dropped += dropped + overflow
+
+    def flush(self) -> int:
+        """Écrire en base les événements en attente"""
+        events, dropped = self._drain()
+        batch = list(events)
+        if dropped:
+            # La perte elle-même est tracée dans la chaîne
+            batch.insert(0, {
+                "occurred_at": datetime.utcnow(),
+                "action": DROPPED_ACTION,
+                "user_id": None,
+                "code_id": None,
+                "pharmacy_id": None,
+                "document_id": None,
+                "details": {"count": dropped},
+            })
+        if not batch:
+            AUDIT_BUFFERED.set(0)
+            return 0
+
+        # Import local : les services métier dépendent de ce module
+        from app.services.audit_service import AuditService
+
+        written = 0
+        db = SessionLocal()
+        try:
+            service = AuditService(db)
+            for start in range(0, len(batch), self.batch_size):
+                written += service.write_batch(batch[start:start + self.batch_size])
+        except Exception:
+            db.rollback()
+            # Réinjecter les événements pour la prochaine tentative
+            unwritten_gap = dropped if dropped and written == 0 else 0
+            offset = 1 if dropped else 0
+            self._requeue(events[max(written - offset, 0):], unwritten_gap)
+            raise
+        finally:
+            db.close()
+            AUDIT_BUFFERED.set(len(self._buffer))
+        AUDIT_EVENTS.inc(written, outcome="written")
+        return written
+
+
+audit_log = AuditLog(settings.AUDIT_BUFFER_SIZE, settings.AUDIT_BATCH_SIZE)
+
+
+async def run_audit_flusher():
+    """Boucle d'écriture du journal d'audit"""
+    interval = settings.AUDIT_FLUSH_INTERVAL_MS / 1000
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            if len(audit_log):
+                try:
+                    await asyncio.to_thread(audit_log.flush)
+                except Exception:
+                    logger.exception("Erreur lors de l'écriture du journal d'audit")
+    finally:
+        # Arrêt : écrire les derniers événements
+        try:
+            audit_log.flush()
+        except Exception:
+            logger.exception("Journal d'audit : %d événement(s) non écrit(s) à l'arrêt", len(audit_log))
+
+
+async def run_audit_partitioning():
+    """Création quotidienne des partitions mensuelles à venir du journal d'audit"""
+    while True:
+        try:
+            await asyncio.to_thread(partitioning.create_audit_partitions, engine)
+        except Exception:
+            logger.exception("Erreur lors de la création des partitions du journal d'audit")
+        await asyncio.sleep(24 * 3600)
@@ -0,0 +1,122 @@
+# backend/app/tasks/cleanup.py
+"""
+Suppression automatique des documents arrivés au terme de leur rétention (RGPD/HDS)
+et des fichiers déchiffrés en transit pour les téléchargements, création à
+l'avance des partitions de documents, purge des clés d'idempotence et des
+refresh tokens échus
+"""
+
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.idempotency import idempotency_store
+from app.db import partitioning
+from app.db.session import SessionLocal, engine
+from app.services.auth_service import AuthService
+from app.services.cold_tier_service import ColdTierService
+from app.services.document_service import DocumentService
+from app.tasks.audit_log import audit_log
+from app.utils.file_handler import purge_staged_files
+
+logger = logging.getLogger(__name__)
+
+PARTITION_CHECK_SECONDS = 3600
+IDEMPOTENCY_PURGE_SECONDS = 3600
+REFRESH_TOKEN_PURGE_SECONDS = 3600
+
+
+def purge_expired_documents() -> int:
+    """Purger les documents expirés en respectant les blobs partagés"""
+    if partitioning.is_enabled(engine):
+        # Table partitionnée : suppression par partition entière
+        dropped = partitioning.drop_expired_partitions(engine)
+        for name in dropped:
+            audit_log.record("documents.partition_purged", partition=name)
+        purged = len(dropped)
+    else:
+        db = SessionLocal()
+        try:
+            purged = DocumentService(db).purge_expired_documents()
+        finally:
+            db.close()
+    
+    # Segments d'archive dont tous les contenus ont été libérés par la purge
+    db = SessionLocal()
+    try:
+        ColdTierService(db).drop_expired_segments()
+    finally:
+        db.close()
+    return purged
+
+
+async def run_periodic_cleanup():
+    """Boucle de purge exécutée en tâche de fond pendant la vie de l'application"""
+    interval = settings.CLEANUP_INTERVAL_MINUTES * 60
+    while True:
+        try:
+            purged = await asyncio.to_thread(purge_expired_documents)
+            if purged:
+                logger.info("Purge RGPD: %d document(s) ou partition(s) supprimé(s)", purged)
+        except Exception:
+            logger.exception("Erreur lors de la purge des documents expirés")
+        await asyncio.sleep(interval)
+
+
+async def run_documents_partitioning():
+    """
+    Création des partitions de documents à venir, indépendante de la purge :
+    sans elles, les uploads échoueraient même avec AUTO_DELETE_ENABLED=false
+    """
+    while True:
+        try:
+            created = await asyncio.to_thread(partitioning.create_partitions, engine)
+            if created:
+                logger.info("Partitions de documents créées : %s", ", ".join(created))
+        except Exception:
+            logger.exception("Erreur lors de la création des partitions de documents")
+        await asyncio.sleep(PARTITION_CHECK_SECONDS)
+
+
+async def run_idempotency_cleanup():
+    """Purge des clés d'idempotence échues (store partagé en base)"""
+    while True:
+        await asyncio.sleep(IDEMPOTENCY_PURGE_SECONDS)
+        try:
+            purged = await asyncio.to_thread(idempotency_store.purge_expired)
+            if purged:
+                logger.info("Idempotence : %d clé(s) échue(s) supprimée(s)", purged)
+        except Exception:
+            logger.exception("Erreur lors de la purge des clés d'idempotence")
+
+
+def purge_refresh_tokens() -> int:
+    """Supprimer les refresh tokens expirés, échangés ou révoqués"""
+    db = SessionLocal()
+    try:
+        return AuthService(db).purge_expired_tokens()
+    finally:
+        db.close()
+
+
+async def run_refresh_token_cleanup():
+    """Purge des refresh tokens expirés, échangés ou révoqués (une ligne par rotation)"""
+    while True:
+        await asyncio.sleep(REFRESH_TOKEN_PURGE_SECONDS)
+        try:
+            purged = await asyncio.to_thread(purge_refresh_tokens)
+            if purged:
+                logger.info("Sessions : %d refresh token(s) périmé(s) supprimé(s)", purged)
+        except Exception:
+            logger.exception("Erreur lors de la purge des refresh tokens")
+
+
+async def run_staging_cleanup():
+    """Effacer les fichiers déchiffrés en transit dès la fin de leur durée de vie"""
+    ttl = settings.DOWNLOAD_URL_TTL_SECONDS
+    while True:
+        await asyncio.sleep(max(ttl // 4, 1))
+        try:
+            await asyncio.to_thread(purge_staged_files, settings.DOWNLOAD_STAGING_DIR, ttl)
+        except Exception:
+            logger.exception("Erreur lors du nettoyage des téléchargements en transit")
@@ -0,0 +1,185 @@
+# backend/app/tasks/key_rotation.py
+"""
+Rotation des clés de chiffrement : rechiffrement des clés de données et
+rechiffrement complet (reprenable et limité en débit) des contenus
+"""
+
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import settings
+from app.core.security import decrypt_file, encrypt_file, keyring, rewrap_key
+from app.db.session import SessionLocal
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.services.document_service import DocumentService
+
+logger = logging.getLogger(__name__)
+
+
+def rewrap_data_keys(db: Session, batch_size: int = 500) -> int:
+    """Rechiffrer avec la clé active les clés de données encore liées à une ancienne clé"""
+    rewrapped = 0
+    while True:
+        blobs = db.query(DocumentBlob).filter(
+            DocumentBlob.wrapped_key.isnot(None),
+            DocumentBlob.key_id != keyring.active_key_id
+        ).order_by(DocumentBlob.id).limit(batch_size).all()
+        
+        if not blobs:
+            return rewrapped
+        
+        for blob in blobs:
+            blob.key_id, blob.wrapped_key = rewrap_key(blob.key_id, blob.wrapped_key)
+        db.commit()
+        rewrapped += len(blobs)
+        logger.info("Rotation: %d clé(s) de données rechiffrée(s)", rewrapped)
+
+
+class ReencryptionProgress:
+    """Avancement d'un rechiffrement complet"""
+    
+    def __init__(self, total: int):
+        self.total = total
+        self.processed = 0
+        self.bytes_processed = 0
+        self.last_blob_id = 0
+        self.started_at = time.monotonic()
+    
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+    
+    @property
+    def throughput_mb_per_second(self) -> float:
+        return self.bytes_processed / (1024 * 1024) / max(self.elapsed, 1e-9)
+    
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "processed": self.processed,
+            "bytes_processed": self.bytes_processed,
+            "last_blob_id": self.last_blob_id,
+            "elapsed_seconds": round(self.elapsed, 1),
+            "throughput_mb_per_second": round(self.throughput_mb_per_second, 2),
+        }
+
+
+class ReencryptionJob:
+    """
+    Rechiffrement complet des contenus, par lots et limité en débit.
+    
+    Sans `force`, seuls les contenus au format historique (chiffrés directement
+    par la clé maîtresse) sont traités : relancer le job reprend naturellement
+    là où il s'est arrêté. Avec `force`, tous les blobs reçoivent une nouvelle
+    clé de données ; la reprise se fait via `start_after_id`.
+    """
+    
+    def __init__(
+        self,
+        rate_mb_per_second: Optional[float] = None,
+        batch_size: int = 50,
+        force: bool = False,
+        start_after_id: int = 0,
+        session_factory: Callable[[], Session] = SessionLocal,
+        on_progress: Optional[Callable[[ReencryptionProgress], None]] = None
+    ):
+        if rate_mb_per_second is None:
+            rate_mb_per_second = settings.REENCRYPTION_RATE_MB_PER_SECOND
+        self.rate_bytes_per_second = rate_mb_per_second * 1024 * 1024
+        self.batch_size = batch_size
+        self.force = force
+        self.start_after_id = start_after_id
+        self.session_factory = session_factory
+        self.on_progress = on_progress or self._log_progress
+    
+    @staticmethod
+    def _log_progress(progress: ReencryptionProgress):
+        logger.info(
+            "Rechiffrement: %d/%d (%.2f Mo/s, dernier blob %d)",
+            progress.processed,
+            progress.total,
+            progress.throughput_mb_per_second,
+            progress.last_blob_id
+        )
+    
+    def _throttle(self, progress: ReencryptionProgress):
+        """Attendre si le débit cible est dépassé"""
+        if self.rate_bytes_per_second <= 0:
+            return
+        expected = progress.bytes_processed / self.rate_bytes_per_second
+        if expected > progress.elapsed:
+            time.sleep(expected - progress.elapsed)
+    
+    def _blob_query(self, db: Session, after_id: int):
+        # Les blobs archivés (stockage froid) gardent leur clé de données ; seule
+        # leur enveloppe est rechiffrée par rewrap_data_keys
+        query = db.query(DocumentBlob).filter(
+            DocumentBlob.id > after_id,
+            DocumentBlob.segment_id.is_(None)
+        )
+        if not self.force:
+            query = query.filter(DocumentBlob.wrapped_key.is_(None))
+        return query
+    
+    def _legacy_document_query(self, db: Session):
+        return db.query(Document).filter(
+            Document.blob_id.is_(None),
+            Document.encrypted_content.isnot(None)
+        )
+    
+    def run(self) -> ReencryptionProgress:
+        db = self.session_factory()
+        try:
+            progress = ReencryptionProgress(
+                self._blob_query(db, self.start_after_id).count()
+                + self._legacy_document_query(db).count()
+            )
+            progress.last_blob_id = self.start_after_id
+            self._reencrypt_blobs(db, progress)
+            self._migrate_legacy_documents(db, progress)
+            self.on_progress(progress)
+            return progress
+        finally:
+            db.close()
+    
+    def _reencrypt_blobs(self, db: Session, progress: ReencryptionProgress):
+        while True:
+            blobs = self._blob_query(db, progress.last_blob_id).order_by(
+                DocumentBlob.id
+            ).limit(self.batch_size).all()
+            if not blobs:
+                return
+            
+            for blob in blobs:
+                content = decrypt_file(blob.encrypted_content, blob.key_id, blob.wrapped_key)
+                blob.encrypted_content, blob.key_id, blob.wrapped_key = encrypt_file(content)
+                progress.bytes_processed += len(content)
+            db.commit()
+            
+            progress.processed += len(blobs)
+            progress.last_blob_id = blobs[-1].id
+            db.expunge_all()
+            self.on_progress(progress)
+            self._throttle(progress)
+    
+    def _migrate_legacy_documents(self, db: Session, progress: ReencryptionProgress):
+        document_service = DocumentService(db)
+        while True:
+            documents = self._legacy_document_query(db).options(
+                undefer(Document.encrypted_content)
+            ).order_by(Document.id).limit(self.batch_size).all()
+            if not documents:
+                return
+            
+            for document in documents:
+                progress.bytes_processed += document_service.migrate_to_blob(document)
+            db.commit()
+            
+            progress.processed += len(documents)
+            db.expunge_all()
+            self.on_progress(progress)
+            self._throttle(progress)
@@ -0,0 +1,33 @@
+# backend/app/tasks/stats.py
+"""
+Recalcul périodique des compteurs du tableau de bord
+"""
+
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.stats_service import StatsService
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_stats() -> int:
+    """Corriger les dérives des compteurs (codes expirés, écritures concurrentes)"""
+    db = SessionLocal()
+    try:
+        return StatsService(db).reconcile_all()
+    finally:
+        db.close()
+
+
+async def run_periodic_reconciliation():
+    """Boucle de recalcul exécutée en tâche de fond pendant la vie de l'application"""
+    interval = settings.STATS_RECONCILE_INTERVAL_MINUTES * 60
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(reconcile_stats)
+        except Exception:
+            logger.exception("Erreur lors du recalcul des compteurs")
@@ -0,0 +1,41 @@
+# backend/app/tasks/tiering.py
+"""
+Archivage périodique des documents froids dans les segments du stockage froid
+"""
+
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.cold_tier_service import ColdTierService
+
+logger = logging.getLogger(__name__)
+
+
+def pack_cold_documents() -> int:
+    """Archiver les blobs froids par lots jusqu'à épuisement"""
+    db = SessionLocal()
+    try:
+        service = ColdTierService(db)
+        packed = 0
+        while True:
+            batch = service.pack()
+            packed += batch
+            if batch < settings.COLD_TIER_BATCH_SIZE:
+                return packed
+    finally:
+        db.close()
+
+
+async def run_periodic_tiering():
+    """Boucle d'archivage exécutée en tâche de fond pendant la vie de l'application"""
+    interval = settings.COLD_TIER_INTERVAL_MINUTES * 60
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            packed = await asyncio.to_thread(pack_cold_documents)
+            if packed:
+                logger.info("Stockage froid: %d contenu(s) archivé(s)", packed)
+        except Exception:
+            logger.exception("Erreur lors de l'archivage des documents froids")
@@ -0,0 +1,89 @@
+# backend/app/tasks/view_tracking.py
+"""
+Suivi différé des consultations de documents (is_viewed / viewed_at)
+
+Les téléchargements enregistrent l'événement en mémoire ; une tâche de fond
+l'écrit en base par lots (UPDATE ... WHERE id IN (...), date propre à chaque
+document) toutes les quelques centaines de millisecondes, pour que le chemin
+de lecture reste en lecture seule.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class ViewTracker:
+    """Tampon mémoire des documents consultés, vidé par lots"""
+    
+    def __init__(self, max_batch_size: int = 500):
+        self.max_batch_size = max_batch_size
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, document_id: int):
+        """Enregistrer une consultation (on conserve la première date)"""
+        with self._lock:
+            self._pending.setdefault(document_id, datetime.utcnow())
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def _drain(self) -> dict[int, datetime]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+    
+    def flush(self) -> int:
+        """Écrire en base les consultations en attente"""
+        pending = self._drain()
+        if not pending:
+            return 0
+        
+        # Import local : le service documents dépend de ce module
+        from app.services.document_service import DocumentService
+        
+        ids = sorted(pending)
+        updated = 0
+        db = SessionLocal()
+        try:
+            service = DocumentService(db)
+            for start in range(0, len(ids), self.max_batch_size):
+                batch = ids[start:start + self.max_batch_size]
+                updated += service.mark_viewed(
+                    batch, viewed_at={i: pending[i] for i in batch}
+                )
+        except Exception:
+            # Réinjecter les événements pour la prochaine tentative
+            with self._lock:
+                for document_id, viewed_at in pending.items():
+                    self._pending.setdefault(document_id, viewed_at)
+            raise
+        finally:
+            db.close()
+        return updated
+
+
+view_tracker = ViewTracker()
+
+
+async def run_view_flusher():
+    """Boucle de vidage du tampon de consultations"""
+    interval = settings.VIEW_FLUSH_INTERVAL_MS / 1000
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            if len(view_tracker):
+                try:
+                    await asyncio.to_thread(view_tracker.flush)
+                except Exception:
+                    logger.exception("Erreur lors de l'écriture des consultations")
+    finally:
+        # Arrêt : écrire les derniers événements
+        view_tracker.flush()
@@ -0,0 +1,168 @@
+# backend/app/utils/file_handler.py
+"""
+Gestion des fichiers : validation des uploads et transit des téléchargements
+
+Les uploads sont validés par leur contenu (signatures « magic bytes ») : seul le
+début du fichier est inspecté, le coût est constant quelle que soit la taille,
+et un fichier renommé est refusé avant lecture complète et chiffrement.
+
+Les téléchargements déportés vers Nginx passent par un répertoire de transit
+(tmpfs) où le fichier déchiffré ne vit que quelques secondes.
+"""
+
+import hashlib
+import os
+import re
+import secrets
+import time
+from typing import Iterable, NamedTuple, Optional
+
+from fastapi import UploadFile
+
+
+SNIFF_BYTES = 2048
+READ_CHUNK_SIZE = 1024 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOI = b"\xff\xd8\xff"
+PDF_HEADER = re.compile(rb"%PDF-[12]\.\d")
+
+# Type MIME réel -> extensions acceptées
+MIME_EXTENSIONS = {
+    "application/pdf": {"pdf"},
+    "image/jpeg": {"jpg", "jpeg"},
+    "image/png": {"png"},
+}
+
+
+def _is_pdf(head: bytes) -> bool:
+    # La norme tolère quelques octets avant l'en-tête (1024 au plus)
+    index = head.find(b"%PDF-", 0, 1024)
+    return index >= 0 and PDF_HEADER.match(head, index) is not None
+
+
+def _is_jpeg(head: bytes) -> bool:
+    # SOI suivi d'un marqueur de segment valide (APPn, DQT, SOF, DHT, COM...)
+    return head.startswith(JPEG_SOI) and len(head) > 3 and 0xC0 <= head[3] <= 0xFE
+
+
+def _is_png(head: bytes) -> bool:
+    # Signature puis premier chunk IHDR de 13 octets
+    return (
+        head.startswith(PNG_SIGNATURE)
+        and head[8:12] == b"\x00\x00\x00\x0d"
+        and head[12:16] == b"IHDR"
+    )
+
+
+SNIFFERS = (
+    ("application/pdf", _is_pdf),
+    ("image/jpeg", _is_jpeg),
+    ("image/png", _is_png),
+)
+
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """Type MIME détecté d'après les premiers octets (None si inconnu)"""
+    for mime_type, matches in SNIFFERS:
+        if matches(head):
+            return mime_type
+    return None
+
+
+def get_extension(filename: str) -> str:
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def validate_file(filename: str, head: bytes, allowed_extensions: list[str]) -> tuple[str, str]:
+    """
+    Vérifier qu'un fichier est bien du type annoncé par son extension.
+
+    Retourne (extension, type MIME réel) ; lève ValueError sinon.
+    """
+    file_ext = get_extension(filename)
+    if file_ext not in allowed_extensions:
+        raise ValueError(f"Type de fichier non autorisé. Autorisés: {allowed_extensions}")
+
+    mime_type = sniff_mime_type(head[:SNIFF_BYTES])
+    if mime_type is None:
+        raise ValueError("Contenu du fichier non reconnu (PDF, JPEG ou PNG attendu)")
+    if file_ext not in MIME_EXTENSIONS[mime_type]:
+        raise ValueError(f"Le contenu du fichier ({mime_type}) ne correspond pas à l'extension .{file_ext}")
+    return file_ext, mime_type
+
+
+class Upload(NamedTuple):
+    """Contenu d'un upload et son empreinte SHA-256 (hexadécimale)"""
+    content: bytes
+    content_hash: str
+
+
+async def read_upload(
+    file: UploadFile,
+    max_size: int,
+    allowed_extensions: list[str]
+) -> Upload:
+    """
+    Lire un fichier uploadé par blocs : contrôle du contenu sur le premier bloc,
+    puis arrêt dès que la taille maximale est dépassée. L'empreinte est calculée
+    au fil de la lecture (déduplication et idempotence la réutilisent).
+    """
+    head = await file.read(SNIFF_BYTES)
+    validate_file(file.filename or "", head, allowed_extensions)
+
+    digest = hashlib.sha256(head)
+    chunks = [head]
+    size = len(head)
+    while True:
+        chunk = await file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise ValueError(f"Fichier trop volumineux (max {max_size // (1024 * 1024)}MB)")
+        digest.update(chunk)
+        chunks.append(chunk)
+    return Upload(b"".join(chunks), digest.hexdigest())
+
+
+def stage_file(directory: str, chunks: Iterable[bytes]) -> str:
+    """
+    Déposer un fichier déchiffré dans le répertoire de transit (tmpfs partagé avec
+    Nginx) sous un nom aléatoire ; retourne ce nom.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = secrets.token_urlsafe(32)
+    # Lisible par Nginx (autre utilisateur), jamais exécutable ; écrit puis renommé
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, os.path.join(directory, name))
+    return name
+
+
+def staged_file_path(directory: str, name: str) -> Optional[str]:
+    """Chemin d'un fichier en transit s'il existe (nom validé contre la traversée)"""
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+        return None
+    path = os.path.join(directory, name)
+    return path if os.path.isfile(path) else None
+
+
+def purge_staged_files(directory: str, ttl_seconds: int) -> int:
+    """Supprimer les fichiers en transit plus anciens que la durée de vie"""
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - ttl_seconds
+    removed = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
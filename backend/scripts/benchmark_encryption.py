@@ -0,0 +1,86 @@
+# backend/scripts/benchmark_encryption.py
+"""
+Benchmark du chiffrement des fichiers
+
+Compare le jeton Fernet unique au format segmenté (AES-GCM) pour plusieurs
+tailles de fichier et nombres de workers, et vérifie au passage que le résultat
+segmenté est identique quel que soit le parallélisme et qu'il se déchiffre.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter le dossier parent au path pour pouvoir importer les modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cryptography.fernet import Fernet
+
+from app.core.security import decrypt_segments, encrypt_segments
+
+
+def measure(func, samples: int) -> float:
+    """Durée médiane (en secondes) d'un appel"""
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def throughput(size: int, duration: float) -> str:
+    return f"{size / duration / (1024 * 1024):8.0f} MB/s"
+
+
+def main():
+    """Fonction principale"""
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark du chiffrement des fichiers")
+    parser.add_argument("--sizes-mb", default="1,4,10,25", help="Tailles de fichier (Mo)")
+    parser.add_argument("--workers", default=",".join(str(w) for w in sorted({1, 2, 4, cores})),
+                        help="Nombres de workers à comparer")
+    parser.add_argument("--segment-kb", type=int, default=1024)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = [int(float(s) * 1024 * 1024) for s in args.sizes_mb.split(",")]
+    workers = [int(w) for w in args.workers.split(",")]
+    segment_size = args.segment_kb * 1024
+    data_key = Fernet.generate_key()
+    fernet = Fernet(data_key)
+
+    print(f"🔐 Chiffrement de fichiers ({cores} cœurs, segments de {args.segment_kb} KiB)")
+    for size in sizes:
+        content = os.urandom(size)
+        print(f"\n📄 {size / (1024 * 1024):g} Mo")
+
+        duration = measure(lambda: fernet.encrypt(content), args.samples)
+        print(f"   fernet            chiffrement {throughput(size, duration)}")
+
+        reference = encrypt_segments(content, data_key, segment_size, executor=None)
+        for count in workers:
+            with ThreadPoolExecutor(max_workers=count) as pool:
+                executor = pool if count > 1 else None
+                encrypted = encrypt_segments(content, data_key, segment_size, executor)
+                if encrypted != reference:
+                    print(f"❌ Résultat différent avec {count} workers")
+                    sys.exit(1)
+                if decrypt_segments(encrypted, data_key, executor) != content:
+                    print(f"❌ Déchiffrement incorrect avec {count} workers")
+                    sys.exit(1)
+                enc = measure(lambda: encrypt_segments(content, data_key, segment_size, executor), args.samples)
+                dec = measure(lambda: decrypt_segments(encrypted, data_key, executor), args.samples)
+            print(
+                f"   segmenté w={count:<3}   chiffrement {throughput(size, enc)}"
+                f"   déchiffrement {throughput(size, dec)}"
+            )
+
+    print("\n✅ Résultats segmentés identiques pour tous les nombres de workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# backend/scripts/benchmark_queries.py
+"""
+Benchmark des requêtes chaudes : ORM query() contre dépôts app.crud
+
+Pour chaque recherche fréquente (utilisateur de chaque requête authentifiée,
+connexion, validation de code, téléchargement...), compare le coût par appel
+de l'ancienne forme db.query(...).filter(...).first() à celui du dépôt
+(instruction construite une fois). Les valeurs recherchées sont prises dans la
+base configurée (DATABASE_URL) : lancer après init_db.py et un peu d'activité.
+La session est vidée entre deux appels pour mesurer une vraie requête.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Ajouter le dossier parent au path pour pouvoir importer les modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy.orm import joinedload
+
+from app.crud import CodeRepository, DocumentRepository, PharmacyRepository, UserRepository
+from app.db.session import SessionLocal
+from app.models.code import Code
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.pharmacy import Pharmacy
+from app.models.user import User
+
+
+def measure(db, func, iterations: int, rounds: int) -> float:
+    """Coût médian d'un appel (en µs), identity map vidée à chaque appel"""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+            db.expunge_all()
+        timings.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(timings)
+
+
+def cases(db):
+    """(nom, ancienne forme, dépôt) pour chaque requête chaude disposant de données"""
+    user = db.query(User).first()
+    if user is not None:
+        yield (
+            "utilisateur par id",
+            lambda: db.query(User).filter(User.id == user.id).first(),
+            lambda: UserRepository(db).get(user.id),
+        )
+        yield (
+            "utilisateur par email",
+            lambda: db.query(User).filter(User.email == user.email).first(),
+            lambda: UserRepository(db).get_by_email(user.email),
+        )
+        yield (
+            "unicité de l'email",
+            lambda: db.query(User).filter(User.email == user.email).first() is not None,
+            lambda: UserRepository(db).email_exists(user.email),
+        )
+
+    pharmacy = db.query(Pharmacy).first()
+    if pharmacy is not None:
+        yield (
+            "pharmacie par code",
+            lambda: db.query(Pharmacy).filter(Pharmacy.tenant_code == pharmacy.tenant_code).first(),
+            lambda: PharmacyRepository(db).get_tenant(pharmacy.tenant_code),
+        )
+
+    code = db.query(Code).first()
+    if code is not None:
+        yield (
+            "code par valeur",
+            lambda: db.query(Code).filter(Code.code == code.code).first(),
+            lambda: CodeRepository(db).get_by_code(code.code),
+        )
+        yield (
+            "unicité du code",
+            lambda: db.query(Code).filter(Code.code == code.code).first() is not None,
+            lambda: CodeRepository(db).exists(code.code),
+        )
+
+    document = db.query(Document).first()
+    if document is not None:
+        document_id, pharmacy_id = document.id, document.pharmacy_id
+        yield (
+            "document (suppression)",
+            lambda: db.query(Document).filter(
+                Document.id == document_id, Document.pharmacy_id == pharmacy_id
+            ).first(),
+            lambda: DocumentRepository(db).get_for_pharmacy(document_id, pharmacy_id),
+        )
+        yield (
+            "document (téléchargement)",
+            lambda: db.query(Document).options(
+                joinedload(Document.blob).joinedload(DocumentBlob.segment)
+            ).filter(
+                Document.id == document_id, Document.pharmacy_id == pharmacy_id
+            ).first(),
+            lambda: DocumentRepository(db).get_with_content(document_id, pharmacy_id),
+        )
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark des requêtes chaudes")
+    parser.add_argument("--iterations", type=int, default=2000, help="Appels par mesure")
+    parser.add_argument("--rounds", type=int, default=5, help="Mesures (médiane retenue)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"🚀 Benchmark des requêtes ({db.get_bind().dialect.name}, {args.iterations} appels x {args.rounds})")
+        print(f"   {'requête':<28} {'query()':>10} {'dépôt':>10} {'gain':>7}")
+        found = False
+        for name, legacy, repository in cases(db):
+            found = True
+            # Préchauffage : caches de compilation des deux formes
+            for func in (legacy, repository):
+                for _ in range(50):
+                    func()
+                db.expunge_all()
+            before = measure(db, legacy, args.iterations, args.rounds)
+            after = measure(db, repository, args.iterations, args.rounds)
+            print(f"   {name:<28} {before:8.0f}µs {after:8.0f}µs {(1 - after / before) * 100:6.0f}%")
+        if not found:
+            print("❌ Base vide : créer au moins un utilisateur, un code et un document")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# backend/scripts/benchmark_server.py
+"""
+Benchmark du serveur : lanceur de production contre uvicorn mono-processus
+
+Démarre successivement chaque configuration sur un port local, envoie une
+charge concurrente (httpx) sur les chemins demandés et compare le débit et la
+latence (p50/p99). Les variables d'environnement de l'application (.env) sont
+celles du shell courant.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+CONFIGURATIONS = {
+    # Ancienne commande du Dockerfile
+    "uvicorn": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ],
+    "app.server": lambda port, workers: [sys.executable, "-m", "app.server"],
+}
+
+
+def start(name: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, SERVER_HOST="127.0.0.1", SERVER_PORT=str(port), SERVER_WORKERS=str(workers))
+    return subprocess.Popen(
+        CONFIGURATIONS[name](port, workers),
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+
+async def load(base_url: str, paths: list[str], concurrency: int, duration: float) -> tuple[list[float], int]:
+    """Latences (s) des requêtes réussies et nombre d'erreurs"""
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def user(index: int):
+            nonlocal errors
+            count = 0
+            while time.monotonic() < deadline:
+                path = paths[(index + count) % len(paths)]
+                count += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 500:
+                        errors += 1
+                        continue
+                except httpx.TransportError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def report(name: str, latencies: list[float], errors: int, duration: float):
+    if not latencies:
+        print(f"   {name:<12} aucune réponse ({errors} erreurs)")
+        return
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(
+        f"   {name:<12} {len(latencies) / duration:8.0f} req/s"
+        f"   p50 {p50:7.1f} ms   p99 {p99:7.1f} ms   erreurs {errors}"
+    )
+
+
+async def run(args):
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    print(
+        f"🚀 Benchmark serveur ({os.cpu_count()} cœurs, {args.concurrency} clients, "
+        f"{args.duration:g} s, chemins {', '.join(paths)})"
+    )
+    for name in args.configurations.split(","):
+        process = start(name, args.port, args.workers)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            await wait_ready(base_url)
+            # Préchauffage (connexions, imports paresseux)
+            await load(base_url, paths, args.concurrency, 1)
+            latencies, errors = await load(base_url, paths, args.concurrency, args.duration)
+            report(name, latencies, errors, args.duration)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark du serveur de production")
+    parser.add_argument("--paths", default="/health,/openapi.json", help="Chemins interrogés (alternés)")
+    parser.add_argument("--configurations", default="uvicorn,app.server")
+    parser.add_argument("--workers", type=int, default=0, help="Workers de app.server (0 : un par cœur)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# backend/scripts/calibrate_password_hash.py
+"""
+Script de calibration du coût de hachage des mots de passe
+
+Mesure la durée d'un hachage sur la machine cible pour plusieurs coûts et
+recommande le plus élevé qui respecte le budget de latence, en tenant compte
+du nombre de connexions simultanées attendues par cœur (ex : pic de 8h).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Ajouter le dossier parent au path pour pouvoir importer les modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.security import build_password_context
+
+
+def measure(context, samples: int) -> float:
+    """Durée médiane (en secondes) d'un hachage"""
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration-password")
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def calibrate_bcrypt(budget: float, samples: int) -> list[tuple[int, float]]:
+    results = []
+    for rounds in range(8, 17):
+        duration = measure(build_password_context(["bcrypt"], bcrypt_rounds=rounds), samples)
+        results.append((rounds, duration))
+        print(f"   bcrypt rounds={rounds:<2} {duration * 1000:8.1f} ms")
+        if duration > budget * 2:
+            break
+    return results
+
+
+def calibrate_argon2(budget: float, samples: int, memory_kb: int, parallelism: int) -> list[tuple[int, float]]:
+    results = []
+    for time_cost in range(1, 11):
+        context = build_password_context(
+            ["argon2"],
+            argon2_time_cost=time_cost,
+            argon2_memory_cost_kb=memory_kb,
+            argon2_parallelism=parallelism
+        )
+        duration = measure(context, samples)
+        results.append((time_cost, duration))
+        print(f"   argon2 t={time_cost:<2} m={memory_kb}KiB p={parallelism} {duration * 1000:8.1f} ms")
+        if duration > budget * 2:
+            break
+    return results
+
+
+def pick(results: list[tuple[int, float]], budget: float):
+    """Coût le plus élevé dont la durée tient dans le budget"""
+    within = [(cost, duration) for cost, duration in results if duration <= budget]
+    return within[-1] if within else results[0]
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Calibration du hachage des mots de passe")
+    parser.add_argument("--budget-ms", type=float, default=250, help="Budget de latence p99 pour la connexion")
+    parser.add_argument("--concurrent-logins-per-core", type=float, default=1.0,
+                        help="Connexions simultanées attendues par cœur au pic")
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--argon2-memory-kb", type=int, default=65536)
+    parser.add_argument("--argon2-parallelism", type=int, default=2)
+    args = parser.parse_args()
+
+    # Au pic, un hachage partage le cœur avec les autres connexions en cours
+    budget = args.budget_ms / 1000 / max(args.concurrent_logins_per_core, 1.0)
+    print(f"🔧 Calibration {args.scheme} (budget par hachage: {budget * 1000:.0f} ms, {os.cpu_count()} cœurs)")
+
+    if args.scheme == "bcrypt":
+        rounds, duration = pick(calibrate_bcrypt(budget, args.samples), budget)
+        settings_lines = ["PASSWORD_HASH_SCHEMES=bcrypt", f"BCRYPT_ROUNDS={rounds}"]
+    else:
+        time_cost, duration = pick(
+            calibrate_argon2(budget, args.samples, args.argon2_memory_kb, args.argon2_parallelism),
+            budget
+        )
+        settings_lines = [
+            "PASSWORD_HASH_SCHEMES=argon2,bcrypt",
+            f"ARGON2_TIME_COST={time_cost}",
+            f"ARGON2_MEMORY_COST_KB={args.argon2_memory_kb}",
+            f"ARGON2_PARALLELISM={args.argon2_parallelism}",
+        ]
+
+    print()
+    print(f"✅ Recommandation ({duration * 1000:.1f} ms, ~{(os.cpu_count() or 1) / duration:.0f} connexions/s):")
+    for line in settings_lines:
+        print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@
 Script pour initialiser la base de données et créer un utilisateur de test
 """
 
+import argparse
+import csv
 import sys
 import os
 
@@ -11,14 +13,18 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal, engine
+from app.db.upgrade import upgrade_schema
 from app.models import Base, User, Pharmacy
 from app.models.pharmacy import generate_tenant_code
 from app.core.security import get_password_hash
+from app.services.pharmacy_service import PharmacyService
 
 def init_database():
     """Initialiser la base de données et créer les tables"""
     print("🔧 Création des tables...")
     Base.metadata.create_all(bind=engine)
+    for change in upgrade_schema(engine):
+        print(f"🔧 Schéma mis à niveau : {change}")
     print("✅ Tables créées avec succès!")
 
 def ensure_pharmacy(db: Session, name: str, city: str, code: str, phone: str, email: str):
@@ -69,6 +75,28 @@ def create_test_user(db: Session, pharmacy_id: int, full_name: str, email: str):
     print(f"✅ Utilisateur créé: {user.email}")
     return user
 
+def import_pharmacies(csv_path: str, report_path: str = None, batch_size: int = 100):
+    """Importer un groupe de pharmacies et leurs comptes depuis un CSV."""
+    db = SessionLocal()
+    try:
+        with open(csv_path, encoding="utf-8-sig", newline="") as csv_file:
+            report = PharmacyService(db).bulk_import(csv.DictReader(csv_file), batch_size=batch_size)
+    finally:
+        db.close()
+    
+    for row in report["rows"]:
+        if row["status"] == "error":
+            print(f"❌ Ligne {row['line']}: {row['error']}")
+    print(f"✅ {report['created']} pharmacie(s) créée(s), {report['failed']} erreur(s)")
+    
+    if report_path:
+        with open(report_path, "w", encoding="utf-8", newline="") as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=["line", "status", "tenant_code", "error"])
+            writer.writeheader()
+            writer.writerows(report["rows"])
+        print(f"📄 Rapport écrit dans {report_path}")
+
+
 def main():
     """Fonction principale"""
     print("=" * 60)
@@ -131,4 +159,14 @@ def main():
         db.close()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Initialisation de la base Santhium")
+    parser.add_argument("--import-csv", help="CSV de pharmacies à importer (name, city, postal_code, phone, address, email, owner_full_name, owner_email, owner_password)")
+    parser.add_argument("--report", help="Fichier CSV où écrire le rapport d'import")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    
+    if args.import_csv:
+        init_database()
+        import_pharmacies(args.import_csv, args.report, args.batch_size)
+    else:
+        main()
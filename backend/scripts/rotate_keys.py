@@ -0,0 +1,62 @@
+# backend/scripts/rotate_keys.py
+"""
+Script de rotation des clés de chiffrement
+
+Étapes habituelles :
+  1. Ajouter la nouvelle clé en tête de ENCRYPTION_KEYS et redémarrer l'API
+  2. python scripts/rotate_keys.py --rewrap       (rapide : clés de données uniquement)
+  3. python scripts/rotate_keys.py --reencrypt    (contenus au format historique)
+  4. Retirer l'ancienne clé de ENCRYPTION_KEYS une fois les étapes terminées
+"""
+
+import argparse
+import logging
+import sys
+import os
+
+# Ajouter le dossier parent au path pour pouvoir importer les modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.security import keyring
+from app.db.session import SessionLocal
+from app.tasks.key_rotation import ReencryptionJob, rewrap_data_keys
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Rotation des clés de chiffrement Santhium")
+    parser.add_argument("--rewrap", action="store_true", help="Rechiffrer les clés de données avec la clé active")
+    parser.add_argument("--reencrypt", action="store_true", help="Rechiffrer les contenus (format historique)")
+    parser.add_argument("--force", action="store_true", help="Avec --reencrypt : nouvelle clé de données pour tous les blobs")
+    parser.add_argument("--rate", type=float, default=None, help="Débit maximal en Mo/s")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--resume-after", type=int, default=0, help="Reprendre après cet id de blob")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    print(f"🔑 Clé active: {keyring.active_key_id} (trousseau: {', '.join(keyring.key_ids)})")
+    
+    if args.rewrap:
+        db = SessionLocal()
+        try:
+            count = rewrap_data_keys(db)
+        finally:
+            db.close()
+        print(f"✅ {count} clé(s) de données rechiffrée(s)")
+    
+    if args.reencrypt:
+        job = ReencryptionJob(
+            rate_mb_per_second=args.rate,
+            batch_size=args.batch_size,
+            force=args.force,
+            start_after_id=args.resume_after
+        )
+        progress = job.run()
+        print(f"✅ Rechiffrement terminé: {progress.as_dict()}")
+    
+    if not (args.rewrap or args.reencrypt):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# backend/scripts/upgrade_db.py
+"""
+Mettre à niveau le schéma d'une base existante (colonnes, index et contraintes
+ajoutés depuis sa création), sans attendre le redémarrage du backend
+"""
+
+import logging
+import os
+import sys
+
+# Ajouter le dossier parent au path pour pouvoir importer les modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import init_database
+
+
+def main():
+    """Fonction principale"""
+    # Modifications appliquées journalisées par app.db.upgrade
+    logging.basicConfig(level=logging.INFO, format="   %(message)s")
+    print("🔧 Mise à niveau du schéma...")
+    init_database()
+
+
+if __name__ == "__main__":
+    main()
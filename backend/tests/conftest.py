@@ -0,0 +1,108 @@
+# backend/tests/conftest.py
+"""
+Configuration des tests : base SQLite jetable et application complète
+
+Les variables d'environnement sont fixées avant tout import de l'application
+(Settings est instancié à l'import). Les tâches de fond et le journal d'audit
+sont désactivés : aucune écriture concurrente pendant le nettoyage des tables.
+"""
+
+import os
+import tempfile
+
+from cryptography.fernet import Fernet
+
+TEST_DIR = tempfile.mkdtemp(prefix="santhium-tests-")
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{TEST_DIR}/santhium.db",
+    "SECRET_KEY": "test-secret-key-test-secret-key-test",
+    "ENCRYPTION_KEY": Fernet.generate_key().decode(),
+    "ENCRYPTION_KEYS": "",
+    "DEBUG": "false",
+    "BCRYPT_ROUNDS": "4",
+    "BACKGROUND_TASKS_ENABLED": "false",
+    "AUDIT_ENABLED": "false",
+    "LOOP_WATCHDOG_ENABLED": "false",
+    "DOWNLOAD_STAGING_DIR": os.path.join(TEST_DIR, "downloads"),
+    "COLD_TIER_DIR": os.path.join(TEST_DIR, "cold"),
+    "PROFILING_OUTPUT_DIR": os.path.join(TEST_DIR, "profiles"),
+})
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models import Base
+from app.tasks.view_tracking import view_tracker
+
+OWNER_EMAIL = "owner@pharmacie.fr"
+OWNER_PASSWORD = "motdepasse1"
+
+PDF = b"%PDF-1.4\n" + b"ordonnance " * 1000 + b"\n%%EOF"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def clean_database(client):
+    """Tables vidées (clés d'idempotence comprises) et consultations en attente écartées"""
+    yield
+    view_tracker._drain()
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def pharmacy(client) -> dict:
+    response = client.post("/api/pharmacies", json={
+        "name": "Pharmacie du Centre",
+        "city": "Paris",
+        "postal_code": "75001",
+        "phone": "0102030405",
+        "owner_email": OWNER_EMAIL,
+        "owner_password": OWNER_PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def login(client, email: str = OWNER_EMAIL, password: str = OWNER_PASSWORD) -> dict:
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+def auth_headers(client, pharmacy) -> dict:
+    return {"Authorization": f"Bearer {login(client)['access_token']}"}
+
+
+def generate_code(client, headers: dict) -> str:
+    response = client.post("/api/codes/generate", json={}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["code"]
+
+
+def upload(client, code: str, content: bytes = PDF, filename: str = "ordonnance.pdf", headers=None):
+    return client.post(
+        "/api/documents/upload",
+        data={"code": code},
+        files={"file": (filename, content, "application/pdf")},
+        headers=headers or {},
+    )
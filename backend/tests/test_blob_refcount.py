@@ -0,0 +1,76 @@
+# backend/tests/test_blob_refcount.py
+"""
+Blobs dédupliqués : compteur de références libéré à la suppression et à la
+purge RGPD, contenu effacé avec son dernier document
+"""
+
+from datetime import datetime, timedelta
+
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.tasks.cleanup import purge_expired_documents
+from conftest import PDF, generate_code, upload
+
+
+def upload_twice(client, headers) -> list[int]:
+    """Deux documents au contenu identique : un seul blob partagé"""
+    ids = []
+    for _ in range(2):
+        response = upload(client, generate_code(client, headers))
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+def expire(db, *document_ids: int):
+    db.query(Document).filter(Document.id.in_(document_ids)).update(
+        {"deletion_date": datetime.utcnow() - timedelta(minutes=1)}, synchronize_session=False
+    )
+    db.commit()
+
+
+def blob(db) -> DocumentBlob:
+    db.expire_all()
+    return db.query(DocumentBlob).one_or_none()
+
+
+def stats(client, headers) -> dict:
+    return client.get("/api/pharmacies/me/stats", headers=headers).json()
+
+
+def test_identical_uploads_share_blob(client, auth_headers, db):
+    upload_twice(client, auth_headers)
+
+    assert blob(db).ref_count == 2
+    # Quota de stockage : taille cumulée des documents, partage ou non
+    assert stats(client, auth_headers)["stored_bytes"] == 2 * len(PDF)
+
+
+def test_delete_releases_reference(client, auth_headers, db):
+    first, second = upload_twice(client, auth_headers)
+
+    assert client.delete(f"/api/documents/{first}", headers=auth_headers).status_code == 200
+    assert blob(db).ref_count == 1
+    assert stats(client, auth_headers)["stored_bytes"] == len(PDF)
+    response = client.get(f"/api/documents/{second}/download", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.content == PDF
+
+    assert client.delete(f"/api/documents/{second}", headers=auth_headers).status_code == 200
+    assert blob(db) is None
+    assert stats(client, auth_headers)["stored_bytes"] == 0
+
+
+def test_purge_releases_reference(client, auth_headers, db):
+    first, second = upload_twice(client, auth_headers)
+
+    expire(db, first)
+    assert purge_expired_documents() == 1
+    assert blob(db).ref_count == 1
+
+    expire(db, second)
+    assert purge_expired_documents() == 1
+    assert blob(db) is None
+    current = stats(client, auth_headers)
+    assert current["total_documents"] == 0
+    assert current["stored_bytes"] == 0
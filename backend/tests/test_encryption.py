@@ -0,0 +1,111 @@
+# backend/tests/test_encryption.py
+"""
+Chiffrement des fichiers : aller-retour pour chaque format stocké
+
+- enveloppe Fernet (jeton binaire ou base64) ;
+- enveloppe segmentée AES-GCM (au-delà de ENCRYPTION_PARALLEL_THRESHOLD_KB) ;
+- format historique chiffré directement par la clé maîtresse.
+"""
+
+import base64
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import (
+    DEFAULT_KEY_ID,
+    SEGMENTED_VERSION,
+    Keyring,
+    decrypt_file,
+    decrypt_segments,
+    encrypt_file,
+    encrypt_segments,
+)
+
+CONTENT = os.urandom(64 * 1024 + 123)
+
+
+@pytest.fixture
+def segmented(monkeypatch):
+    """Segments de 16 KB dès 32 KB : le contenu de test est segmenté"""
+    monkeypatch.setattr(settings, "ENCRYPTION_PARALLEL_THRESHOLD_KB", 32)
+    monkeypatch.setattr(settings, "ENCRYPTION_SEGMENT_SIZE_KB", 16)
+
+
+def test_fernet_envelope_round_trip():
+    payload = encrypt_file(CONTENT)
+
+    assert payload.ciphertext[:1] == security.FERNET_VERSION
+    assert decrypt_file(*payload) == CONTENT
+
+
+def test_base64_fernet_envelope_round_trip():
+    # Enveloppes stockées avant le passage au jeton binaire
+    payload = encrypt_file(CONTENT)
+    token = base64.urlsafe_b64encode(payload.ciphertext)
+
+    assert decrypt_file(token, payload.key_id, payload.wrapped_key) == CONTENT
+
+
+def test_segmented_envelope_round_trip(segmented):
+    payload = encrypt_file(CONTENT)
+
+    assert payload.ciphertext[:1] == SEGMENTED_VERSION
+    assert decrypt_file(*payload) == CONTENT
+
+
+@pytest.mark.parametrize("content", [b"", b"x", os.urandom(16 * 1024), os.urandom(16 * 1024 + 1)])
+def test_segments_round_trip_at_boundaries(content):
+    data_key = Fernet.generate_key()
+    encrypted = encrypt_segments(content, data_key, segment_size=16 * 1024)
+
+    assert decrypt_segments(encrypted, data_key) == content
+
+
+def test_segments_independent_of_workers():
+    data_key = Fernet.generate_key()
+    sequential = encrypt_segments(CONTENT, data_key, segment_size=4096)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parallel = encrypt_segments(CONTENT, data_key, segment_size=4096, executor=executor)
+        assert decrypt_segments(sequential, data_key, executor=executor) == CONTENT
+
+    assert parallel == sequential
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda data: data[:-1],
+    lambda data: data[:-1] + bytes([data[-1] ^ 1]),
+    lambda data: data[:40] + bytes([data[40] ^ 1]) + data[41:],
+])
+def test_altered_segments_rejected(tamper):
+    data_key = Fernet.generate_key()
+    encrypted = encrypt_segments(CONTENT, data_key, segment_size=4096)
+
+    with pytest.raises(InvalidToken):
+        decrypt_segments(tamper(encrypted), data_key)
+
+
+def test_legacy_master_key_formats_round_trip():
+    # Historique : jeton de la clé maîtresse, sans clé de données, en base64 puis binaire
+    token = security.keyring.encrypt(CONTENT)
+
+    assert decrypt_file(token) == CONTENT
+    assert decrypt_file(base64.urlsafe_b64decode(token)) == CONTENT
+
+
+def test_rotated_keyring_decrypts_and_rewraps(monkeypatch, segmented):
+    payload = encrypt_file(CONTENT)
+    legacy = security.keyring.encrypt(CONTENT)
+    keys = {DEFAULT_KEY_ID: settings.ENCRYPTION_KEY, "v2": Fernet.generate_key().decode()}
+    monkeypatch.setattr(security, "keyring", Keyring(keys, "v2"))
+
+    assert decrypt_file(*payload) == CONTENT
+    assert decrypt_file(legacy) == CONTENT
+
+    key_id, wrapped_key = security.rewrap_key(payload.key_id, payload.wrapped_key)
+    assert key_id == "v2"
+    assert decrypt_file(payload.ciphertext, key_id, wrapped_key) == CONTENT
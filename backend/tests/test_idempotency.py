@@ -0,0 +1,86 @@
+# backend/tests/test_idempotency.py
+"""
+Rejeu des uploads et des générations de codes avec l'en-tête Idempotency-Key
+"""
+
+import asyncio
+
+from app.core.idempotency import IdempotencyStore
+from app.models.document import Document
+from conftest import PDF, generate_code, upload
+
+
+def test_upload_replayed_with_same_key(client, auth_headers, db):
+    code = generate_code(client, auth_headers)
+    headers = {"Idempotency-Key": "upload-1"}
+
+    first = upload(client, code, headers=headers)
+    replay = upload(client, code, headers=headers)
+
+    assert first.status_code == replay.status_code == 200
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert replay.json() == first.json()
+    assert db.query(Document).count() == 1
+
+
+def test_upload_key_reused_for_other_content(client, auth_headers):
+    code = generate_code(client, auth_headers)
+    headers = {"Idempotency-Key": "upload-1"}
+    upload(client, code, headers=headers)
+
+    response = upload(client, code, content=PDF + b" ", headers=headers)
+    assert response.status_code == 422
+
+
+def test_failed_upload_not_memorized(client, auth_headers):
+    headers = {"Idempotency-Key": "upload-1"}
+    assert upload(client, "INCONNU", headers=headers).status_code == 400
+
+    code = generate_code(client, auth_headers)
+    # Même clé, requête différente : la clé a été libérée par l'échec
+    assert upload(client, code, headers=headers).status_code == 200
+
+
+def test_code_generation_replayed(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": "code-1"}
+    first = client.post("/api/codes/generate", json={}, headers=headers)
+    replay = client.post("/api/codes/generate", json={}, headers=headers)
+
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json()["code"] == first.json()["code"]
+
+
+def test_memory_store_runs_handler_once():
+    store = IdempotencyStore(ttl_seconds=60, max_entries=10)
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": len(calls)}
+
+    async def scenario():
+        return await asyncio.gather(*(
+            store.execute("scope", "key", "fingerprint", handler) for _ in range(3)
+        ))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results].count(False) == 1
+    assert all(result == {"id": 1} for result, _ in results)
+
+
+def test_memory_store_evicts_oldest_over_capacity():
+    store = IdempotencyStore(ttl_seconds=60, max_entries=2)
+
+    async def handler():
+        return "ok"
+
+    async def scenario():
+        for key in ("a", "b", "c"):
+            await store.execute("scope", key, "fingerprint", handler)
+        await store.execute("scope", "d", "fingerprint", handler)
+
+    asyncio.run(scenario())
+    assert list(store._entries) == [("scope", "c"), ("scope", "d")]
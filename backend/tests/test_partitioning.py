@@ -0,0 +1,93 @@
+# backend/tests/test_partitioning.py
+"""
+Purge par partition de la table documents (PostgreSQL uniquement)
+
+Exécuté si TEST_POSTGRES_URL désigne une base PostgreSQL jetable : le schéma
+minimal est créé dans un schéma temporaire, supprimé en fin de test.
+"""
+
+import os
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db import partitioning
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL non défini")
+
+RETENTION_DAYS = 30
+
+SCHEMA_DDL = [
+    "CREATE TABLE document_blobs (id integer PRIMARY KEY, ref_count integer NOT NULL)",
+    "CREATE TABLE pharmacy_stats (pharmacy_id integer PRIMARY KEY, "
+    "total_documents integer NOT NULL, unviewed_documents integer NOT NULL, "
+    "stored_bytes bigint NOT NULL)",
+    "CREATE TABLE documents (id integer NOT NULL, uploaded_at timestamp NOT NULL, "
+    "pharmacy_id integer NOT NULL, blob_id integer REFERENCES document_blobs (id), "
+    "is_viewed boolean NOT NULL DEFAULT false, file_size integer, "
+    "PRIMARY KEY (id, uploaded_at)) PARTITION BY RANGE (uploaded_at)",
+]
+
+
+@pytest.fixture
+def pg_engine(monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENTS_PARTITIONING", "daily")
+    monkeypatch.setattr(settings, "DOCUMENTS_PARTITIONS_AHEAD", 0)
+    monkeypatch.setattr(settings, "DATA_RETENTION_DAYS", RETENTION_DAYS)
+
+    schema = f"test_partitions_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        with engine.begin() as connection:
+            for statement in SCHEMA_DDL:
+                connection.execute(text(statement))
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+def test_drop_expired_partition_releases_blobs(pg_engine):
+    today = datetime.utcnow().date()
+    expired_day = today - timedelta(days=RETENTION_DAYS + 5)
+    partitioning.create_partitions(pg_engine, today=expired_day)
+    partitioning.create_partitions(pg_engine, today=today)
+
+    with pg_engine.begin() as connection:
+        # Blob 1 : référencé par la seule partition expirée ; blob 2 : partagé
+        connection.execute(text("INSERT INTO document_blobs VALUES (1, 1), (2, 2)"))
+        connection.execute(text("INSERT INTO pharmacy_stats VALUES (1, 3, 1, 300)"))
+        connection.execute(text(
+            "INSERT INTO documents (id, uploaded_at, pharmacy_id, blob_id, is_viewed, file_size) "
+            "VALUES (1, :expired, 1, 1, false, 100), (2, :expired, 1, 2, true, 100), "
+            "(3, :today, 1, 2, true, 100)"
+        ), {"expired": expired_day, "today": today})
+
+    dropped = partitioning.drop_expired_partitions(pg_engine)
+
+    assert dropped == [partitioning._partition_name(expired_day)]
+    with pg_engine.connect() as connection:
+        blobs = dict(connection.execute(text("SELECT id, ref_count FROM document_blobs")).all())
+        stats = connection.execute(text(
+            "SELECT total_documents, unviewed_documents, stored_bytes FROM pharmacy_stats"
+        )).one()
+        remaining = connection.execute(text("SELECT id FROM documents")).scalars().all()
+    assert blobs == {2: 1}
+    assert tuple(stats) == (1, 0, 100)
+    assert remaining == [3]
+
+
+def test_partitions_within_retention_kept(pg_engine):
+    partitioning.create_partitions(pg_engine, today=date.today())
+
+    assert partitioning.drop_expired_partitions(pg_engine) == []
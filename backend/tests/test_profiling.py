@@ -0,0 +1,31 @@
+# backend/tests/test_profiling.py
+"""
+Profilage à la demande : jeton X-Profile et profil mémoire
+"""
+
+import json
+
+from app.core.config import settings
+from app.core.profiling import ProfileSession, ProfilingControl
+
+
+def test_profile_header_token_compared_as_bytes():
+    control = ProfilingControl(sample_rate=0.0, header_token="jeton-profil")
+    assert control.should_profile(b"jeton-profil")
+    assert not control.should_profile(b"autre-jeton")
+    # Octets non ASCII (en-tête décodé en latin-1 par Starlette) : refus, pas d'erreur
+    assert not control.should_profile("jéton".encode("latin-1"))
+    assert not control.should_profile(None)
+
+
+def test_profile_session_reports_allocations():
+    session = ProfileSession("GET /api/test", trace_memory=True)
+    session.start()
+    payload = [bytes(4096) for _ in range(64)]
+    prefix = session.stop()
+    del payload
+
+    assert prefix.startswith(settings.PROFILING_OUTPUT_DIR)
+    with open(f"{prefix}.json") as f:
+        summary = json.load(f)
+    assert summary["memory"]["allocated_bytes"] >= 64 * 4096
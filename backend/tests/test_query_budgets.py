@@ -0,0 +1,95 @@
+# backend/tests/test_query_budgets.py
+"""
+Budgets de requêtes SQL des endpoints chauds et diagnostics des requêtes
+
+Les budgets sont mesurés avec plusieurs documents en base : une régression
+N+1 (requête par document, par code...) les dépasse immédiatement.
+"""
+
+import logging
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app.db.instrumentation import assert_max_queries
+from app.db.session import engine
+from app.models.user import User
+from conftest import OWNER_EMAIL, generate_code, upload
+
+DOCUMENTS = 5
+
+# (méthode, chemin, budget) ; {document_id} : premier document de la pharmacie
+HOT_ENDPOINTS = [
+    ("GET", "/api/documents", 2),
+    ("GET", "/api/documents/search?filename=ordonnance", 2),
+    ("GET", "/api/codes/active", 2),
+    ("GET", "/api/auth/profile", 2),
+    ("GET", "/api/pharmacies/me/stats", 3),
+    ("GET", "/api/documents/{document_id}/download", 2),
+    ("POST", "/api/codes/generate", 5),
+]
+
+
+@pytest.fixture
+def document_ids(client, auth_headers) -> list[int]:
+    for _ in range(DOCUMENTS):
+        code = generate_code(client, auth_headers)
+        assert upload(client, code).status_code == 200
+    documents = client.get("/api/documents", headers=auth_headers).json()["documents"]
+    return [document["id"] for document in documents]
+
+
+@pytest.mark.parametrize("method,path,budget", HOT_ENDPOINTS)
+def test_hot_endpoint_query_budget(client, auth_headers, document_ids, method, path, budget):
+    path = path.format(document_id=document_ids[0])
+    # Cache de révocation chargé : il ne compte pas dans le budget
+    client.get("/api/auth/profile", headers=auth_headers)
+
+    with assert_max_queries(budget):
+        response = client.request(method, path, headers=auth_headers, json={} if method == "POST" else None)
+    assert response.status_code == 200, response.text
+
+
+def test_upload_query_budget(client, auth_headers, document_ids):
+    code = generate_code(client, auth_headers)
+    # Nouveau contenu : création du blob comprise
+    with assert_max_queries(13):
+        response = upload(client, code, content=b"%PDF-1.4\nnouveau contenu\n%%EOF")
+    assert response.status_code == 200, response.text
+
+
+def test_server_timing_reserved_to_administrators(client, auth_headers, db):
+    response = client.get("/api/documents", headers=auth_headers)
+    assert "server-timing" not in response.headers
+
+    db.query(User).filter(User.email == OWNER_EMAIL).update({"is_superuser": True})
+    db.commit()
+    response = client.get("/api/documents", headers=auth_headers)
+    assert "queries" in response.headers["server-timing"]
+
+
+def test_signed_download_token_not_logged(client, caplog):
+    token = "eyJmIjoic2VjcmV0In0.c2lnbmF0dXJl"
+    with caplog.at_level(logging.INFO, logger="santhium.requests"):
+        response = client.get(f"/api/documents/signed/{token}")
+    assert response.status_code == 403
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("/documents/signed/***" in message for message in messages)
+    assert not any(token in message for message in messages)
+
+
+def test_budget_ignores_background_queries(client, auth_headers):
+    def background_query():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    with assert_max_queries(0):
+        # Requête hors de tout contexte suivi, comme le flush des consultations
+        thread = threading.Thread(target=background_query)
+        thread.start()
+        thread.join()
+
+    with pytest.raises(AssertionError):
+        with assert_max_queries(0):
+            background_query()
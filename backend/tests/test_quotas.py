@@ -0,0 +1,49 @@
+# backend/tests/test_quotas.py
+"""
+Quotas par pharmacie : refus des uploads en 403 (stockage, documents) ou 429
+avec Retry-After (quota horaire)
+"""
+
+from app.models.pharmacy import Pharmacy
+from conftest import PDF, generate_code, upload
+
+
+def set_quota(db, **quota):
+    db.query(Pharmacy).update(quota)
+    db.commit()
+
+
+def test_document_quota_rejected_with_403(client, auth_headers, db):
+    set_quota(db, quota_max_documents=1)
+    assert upload(client, generate_code(client, auth_headers)).status_code == 200
+
+    response = upload(client, generate_code(client, auth_headers), content=PDF + b" ")
+    assert response.status_code == 403
+    assert "documents" in response.json()["detail"]
+    assert "retry-after" not in response.headers
+
+
+def test_storage_quota_rejected_with_403(client, auth_headers, db):
+    set_quota(db, quota_max_bytes=len(PDF) - 1)
+
+    response = upload(client, generate_code(client, auth_headers))
+    assert response.status_code == 403
+    assert "stockage" in response.json()["detail"]
+
+
+def test_hourly_quota_rejected_with_429(client, auth_headers, db):
+    set_quota(db, quota_max_uploads_per_hour=1)
+    assert upload(client, generate_code(client, auth_headers)).status_code == 200
+
+    response = upload(client, generate_code(client, auth_headers), content=PDF + b" ")
+    assert response.status_code == 429
+    assert 0 < int(response.headers["retry-after"]) <= 3601
+
+
+def test_rejected_upload_not_counted(client, auth_headers, db):
+    set_quota(db, quota_max_documents=1)
+    upload(client, generate_code(client, auth_headers))
+    upload(client, generate_code(client, auth_headers), content=PDF + b" ")
+
+    stats = client.get("/api/pharmacies/me/stats", headers=auth_headers).json()
+    assert stats["total_documents"] == 1
@@ -0,0 +1,86 @@
+# backend/tests/test_refresh_tokens.py
+"""
+Rotation des refresh tokens, détection de réutilisation et purge des tokens périmés
+"""
+
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+from app.tasks.cleanup import purge_refresh_tokens
+from conftest import login
+
+
+def refresh(client, refresh_token: str):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_token(client, pharmacy):
+    tokens = login(client)
+
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    response = client.get(
+        "/api/auth/profile", headers={"Authorization": f"Bearer {rotated['access_token']}"}
+    )
+    assert response.status_code == 200
+
+
+def test_reused_refresh_token_revokes_family(client, pharmacy):
+    tokens = login(client)
+    rotated = refresh(client, tokens["refresh_token"]).json()
+
+    # Token déjà échangé : refusé, et toute la session est révoquée
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+    assert refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_reuse_does_not_affect_other_sessions(client, pharmacy):
+    compromised = login(client)
+    other = login(client)
+    refresh(client, compromised["refresh_token"])
+    refresh(client, compromised["refresh_token"])
+
+    assert refresh(client, other["refresh_token"]).status_code == 200
+
+
+def test_logout_revokes_refresh_token(client, pharmacy):
+    tokens = login(client)
+    response = client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_unknown_refresh_token_rejected(client, pharmacy):
+    assert refresh(client, "inconnu").status_code == 401
+
+
+def test_purge_keeps_only_live_tokens(client, pharmacy, db):
+    tokens = login(client)
+    rotated = refresh(client, tokens["refresh_token"]).json()
+    logged_out = login(client)
+    client.post("/api/auth/logout", json={"refresh_token": logged_out["refresh_token"]})
+
+    # Rien n'est encore périmé : la révocation doit rester visible
+    assert purge_refresh_tokens() == 0
+
+    past = datetime.utcnow() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES + 1)
+    db.query(RefreshToken).filter(RefreshToken.used_at.isnot(None)).update({"used_at": past})
+    db.query(RefreshToken).filter(RefreshToken.revoked_at.isnot(None)).update({"revoked_at": past})
+    db.commit()
+
+    assert purge_refresh_tokens() == 2
+    assert db.query(RefreshToken).count() == 1
+    assert refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_purge_removes_expired_tokens(client, pharmacy, db):
+    login(client)
+    db.query(RefreshToken).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+    assert purge_refresh_tokens() == 1
@@ -0,0 +1,88 @@
+# backend/tests/test_replica_routing.py
+"""
+Routage des lectures du tableau de bord vers le réplica : aucune requête au
+primaire par lecture, lecture de ses propres écritures entre workers
+
+Le « réplica » est un second moteur sur la même base SQLite : seules les
+requêtes envoyées au moteur primaire sont comptées.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core import dependencies
+from app.core.config import settings
+from app.db import routing
+from app.db.instrumentation import assert_max_queries
+from app.db.routing import ReplicaRouter, replica_router
+from app.db.session import engine
+from app.models.pharmacy import Pharmacy
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    replica_engine = create_engine(engine.url)
+    monkeypatch.setattr(routing, "replica_engine", replica_engine)
+    monkeypatch.setattr(dependencies, "ReplicaSessionLocal", sessionmaker(bind=replica_engine))
+    monkeypatch.setattr(ReplicaRouter, "replica_lag", lambda self: 0.0)
+    monkeypatch.setattr(replica_router, "_last_writes", {})
+    monkeypatch.setattr(replica_router, "_markers_loaded_at", float("-inf"))
+    yield replica_engine
+    replica_engine.dispose()
+
+
+@pytest.fixture
+def primary_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_dashboard_reads_skip_primary(client, auth_headers, replica, primary_statements, monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_MARKER_REFRESH_SECONDS", 60)
+    # Marqueurs chargés une fois par worker, pas à chaque lecture
+    client.get("/api/documents", headers=auth_headers)
+    primary_statements.clear()
+
+    for path in ("/api/documents", "/api/codes/active", "/api/auth/profile", "/api/pharmacies/me/stats"):
+        response = client.get(path, headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+    assert primary_statements == []
+
+
+def test_write_on_other_worker_routes_reads_to_primary(pharmacy, replica, db):
+    pharmacy_id = db.query(Pharmacy.id).scalar()
+    writer, reader = ReplicaRouter(), ReplicaRouter()
+
+    assert reader.use_replica(pharmacy_id)
+    writer.record_write(pharmacy_id)
+    reader._markers_loaded_at = float("-inf")
+
+    assert not reader.use_replica(pharmacy_id)
+    assert reader.use_replica(pharmacy_id + 1)
+    with assert_max_queries(0):
+        for _ in range(5):
+            reader.use_replica(pharmacy_id)
+
+
+def read_bind(payload: dict):
+    sessions = dependencies.get_read_db(payload)
+    try:
+        return next(sessions).get_bind()
+    finally:
+        sessions.close()
+
+
+def test_read_session_routed_from_token(pharmacy, replica, db):
+    pharmacy_id = db.query(Pharmacy.id).scalar()
+
+    assert read_bind({"sub": "1", "pid": pharmacy_id}) is replica
+    # Token émis avant le claim pid : pharmacie inconnue, primaire
+    assert read_bind({"sub": "1"}) is engine
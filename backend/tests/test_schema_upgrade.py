@@ -0,0 +1,167 @@
+# backend/tests/test_schema_upgrade.py
+"""
+Mise à niveau d'une base créée par la version initiale (avant déduplication,
+quotas et contraintes d'unicité des pharmacies), et création de pharmacie sur
+une base dont les doublons empêchent les index d'unicité
+"""
+
+import pytest
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    insert,
+    inspect,
+)
+from sqlalchemy.orm import Session
+
+from app.db.upgrade import upgrade_schema
+from app.models import Base
+from app.models.document import Document
+from app.models.pharmacy import Pharmacy
+from app.schemas.pharmacy import PharmacyCreate
+from app.services.pharmacy_service import PharmacyService
+
+# Schéma de la version initiale (tables existantes à compléter)
+legacy = MetaData()
+Table(
+    "pharmacies", legacy,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("tenant_code", String, unique=True, index=True, nullable=False),
+    Column("name", String, nullable=False),
+    Column("address", String),
+    Column("city", String),
+    Column("postal_code", String),
+    Column("phone", String),
+    Column("email", String),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+Table(
+    "users", legacy,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("full_name", String),
+    Column("is_active", Boolean),
+    Column("is_superuser", Boolean),
+    Column("pharmacy_id", Integer, ForeignKey("pharmacies.id")),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+Table(
+    "codes", legacy,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("code", String(6), unique=True, index=True, nullable=False),
+    Column("is_active", Boolean),
+    Column("expiration_date", DateTime, nullable=False),
+    Column("max_uses", Integer),
+    Column("current_uses", Integer),
+    Column("pharmacy_id", Integer, ForeignKey("pharmacies.id")),
+    Column("created_by_id", Integer, ForeignKey("users.id")),
+    Column("created_at", DateTime),
+    Column("last_used_at", DateTime),
+)
+Table(
+    "documents", legacy,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("filename", String, nullable=False),
+    Column("original_filename", String, nullable=False),
+    Column("file_size", Integer),
+    Column("file_type", String),
+    Column("mime_type", String),
+    Column("encrypted_content", LargeBinary),
+    Column("code_id", Integer, ForeignKey("codes.id")),
+    Column("pharmacy_id", Integer, ForeignKey("pharmacies.id")),
+    Column("is_viewed", Boolean),
+    Column("viewed_at", DateTime),
+    Column("deletion_date", DateTime),
+    Column("uploaded_at", DateTime),
+)
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    legacy.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(legacy.tables["pharmacies"]).values(
+            id=1, tenant_code="PH-LEGACY", name="Pharmacie historique", phone="0102030405"
+        ))
+        connection.execute(insert(legacy.tables["documents"]).values(
+            id=1, filename="a.pdf", original_filename="a.pdf", pharmacy_id=1,
+            encrypted_content=b"jeton", uploaded_at=None
+        ))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_upgrade_completes_existing_tables(legacy_engine):
+    changes = upgrade_schema(legacy_engine)
+
+    inspector = inspect(legacy_engine)
+    document_columns = {column["name"] for column in inspector.get_columns("documents")}
+    pharmacy_columns = {column["name"] for column in inspector.get_columns("pharmacies")}
+    assert {"content_hash", "blob_id"} <= document_columns
+    assert {"quota_max_bytes", "quota_max_documents", "quota_max_uploads_per_hour"} <= pharmacy_columns
+    assert "ix_documents_pharmacy_uploaded" in changes
+    unique_indexes = {
+        index["name"] for index in inspector.get_indexes("pharmacies") if index["unique"]
+    }
+    assert {"ix_pharmacies_phone", "ix_pharmacies_email"} <= unique_indexes
+
+    with Session(legacy_engine) as session:
+        document = session.query(Document).one()
+        assert document.blob_id is None
+        assert document.uploaded_at is not None
+        assert session.query(Pharmacy).one().quota_max_documents is None
+
+
+def test_upgrade_is_idempotent(legacy_engine):
+    upgrade_schema(legacy_engine)
+
+    assert upgrade_schema(legacy_engine) == []
+
+
+
+def test_duplicate_pharmacies_do_not_block_upgrade(legacy_engine, caplog):
+    with legacy_engine.begin() as connection:
+        connection.execute(insert(legacy.tables["pharmacies"]).values(
+            id=2, tenant_code="PH-DOUBLON", name="Doublon", phone="0102030405"
+        ))
+
+    changes = upgrade_schema(legacy_engine)
+
+    assert "ix_pharmacies_phone" not in changes
+    assert "ix_pharmacies_email" in changes
+    assert any("ix_pharmacies_phone" in record.getMessage() for record in caplog.records)
+
+
+def test_duplicate_phone_rejected_without_unique_index(legacy_engine):
+    with legacy_engine.begin() as connection:
+        connection.execute(insert(legacy.tables["pharmacies"]).values(
+            id=2, tenant_code="PH-DOUBLON", name="Doublon", phone="0102030405"
+        ))
+    upgrade_schema(legacy_engine)
+
+    data = PharmacyCreate(
+        name="Pharmacie du Centre",
+        city="Paris",
+        postal_code="75001",
+        phone="0102030405",
+        owner_email="nouveau@pharmacie.fr",
+        owner_password="motdepasse1",
+    )
+    with Session(legacy_engine) as session:
+        with pytest.raises(ValueError, match="numéro"):
+            PharmacyService(session).create_pharmacy(data)
+        assert session.query(Pharmacy).count() == 2
@@ -0,0 +1,63 @@
+# backend/tests/test_view_tracking.py
+"""
+Écriture différée des consultations : chaque document garde sa propre date
+de première consultation, y compris après un échec d'écriture
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.document import Document
+from app.services.document_service import DocumentService
+from app.tasks.view_tracking import ViewTracker
+from conftest import PDF, generate_code, upload
+
+
+@pytest.fixture
+def document_ids(client, auth_headers) -> list[int]:
+    ids = []
+    for index in range(3):
+        response = upload(client, generate_code(client, auth_headers), content=PDF + bytes(index))
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+def viewed_at(db, document_ids: list[int]) -> dict[int, datetime]:
+    db.expire_all()
+    documents = db.query(Document).filter(Document.id.in_(document_ids))
+    return {document.id: document.viewed_at for document in documents}
+
+
+def test_flush_keeps_each_view_time(document_ids, db):
+    tracker = ViewTracker(max_batch_size=2)
+    base = datetime.utcnow() - timedelta(minutes=10)
+    expected = {document_id: base + timedelta(minutes=index) for index, document_id in enumerate(document_ids)}
+    tracker._pending.update(expected)
+
+    assert tracker.flush() == 3
+    assert viewed_at(db, document_ids) == expected
+
+
+def test_requeued_views_not_backdated(document_ids, db, monkeypatch):
+    tracker = ViewTracker()
+    first, second, _ = document_ids
+    earlier = datetime.utcnow() - timedelta(minutes=5)
+    tracker._pending[first] = earlier
+
+    def failing_mark_viewed(self, *args, **kwargs):
+        raise RuntimeError("base indisponible")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DocumentService, "mark_viewed", failing_mark_viewed)
+        with pytest.raises(RuntimeError):
+            tracker.flush()
+
+    # Événements réinjectés, puis nouvelle consultation d'un autre document
+    tracker.record(second)
+    tracker.flush()
+
+    dates = viewed_at(db, [first, second])
+    assert dates[first] == earlier
+    assert dates[second] > earlier + timedelta(minutes=4)
@@ -21,4 +21,44 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Renouvellement automatique du token d'accès via le refresh token
+let refreshPromise = null;
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const { config, response } = error;
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (
+      !response ||
+      response.status !== 401 ||
+      !refreshToken ||
+      config._retried ||
+      config.url.includes('/auth/')
+    ) {
+      return Promise.reject(error);
+    }
+
+    config._retried = true;
+    try {
+      // Une seule requête de renouvellement pour les appels concurrents
+      refreshPromise =
+        refreshPromise ||
+        api
+          .post('/api/v1/auth/refresh', { refresh_token: refreshToken })
+          .finally(() => {
+            refreshPromise = null;
+          });
+      const { data } = await refreshPromise;
+      localStorage.setItem('token', data.access_token);
+      localStorage.setItem('refreshToken', data.refresh_token);
+      return api(config);
+    } catch (refreshError) {
+      localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
+      return Promise.reject(error);
+    }
+  }
+);
+
 export default api;
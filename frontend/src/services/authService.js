@@ -6,8 +6,9 @@ const AUTH_BASE = '/api/v1/auth';
 export const authService = {
   login: async (email, password) => {
     const response = await api.post(`${AUTH_BASE}/login`, { email, password });
-    const { access_token: accessToken, user } = response.data;
+    const { access_token: accessToken, refresh_token: refreshToken, user } = response.data;
     localStorage.setItem('token', accessToken);
+    if (refreshToken) localStorage.setItem('refreshToken', refreshToken);
     return user;
   },
   register: async ({ fullName, email, password, pharmacyCode }) => {
@@ -17,13 +18,19 @@ export const authService = {
       password,
       pharmacy_code: pharmacyCode,
     });
-    const { access_token: accessToken, user } = response.data;
+    const { access_token: accessToken, refresh_token: refreshToken, user } = response.data;
     localStorage.setItem('token', accessToken);
+    if (refreshToken) localStorage.setItem('refreshToken', refreshToken);
     return user;
   },
 
   logout: () => {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      api.post(`${AUTH_BASE}/logout`, { refresh_token: refreshToken }).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
   },
 
   getCurrentUser: () => {
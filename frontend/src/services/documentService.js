@@ -23,6 +23,12 @@ export const documentService = {
     return response.data;
   },
 
+  // Rechercher des documents (nom, type, dates, statut, code)
+  search: async (params = {}) => {
+    const response = await api.get(`${DOCUMENT_BASE}/search`, { params });
+    return response.data;
+  },
+
   // Télécharger un document
   download: async (documentId) => {
     const response = await api.get(`${DOCUMENT_BASE}/${documentId}/download`, {
@@ -31,6 +37,23 @@ export const documentService = {
     return response.data;
   },
 
+  // URL de téléchargement signée et temporaire (ouvrable sans authentification)
+  getDownloadUrl: async (documentId) => {
+    const response = await api.post(`${DOCUMENT_BASE}/${documentId}/download-url`);
+    return {
+      ...response.data,
+      url: `${api.defaults.baseURL}${response.data.url}`,
+    };
+  },
+
+  // Marquer plusieurs documents comme vus
+  markViewed: async (documentIds) => {
+    const response = await api.post(`${DOCUMENT_BASE}/viewed`, {
+      document_ids: documentIds,
+    });
+    return response.data;
+  },
+
   // Supprimer un document
   delete: async (documentId) => {
     return await api.delete(`${DOCUMENT_BASE}/${documentId}`);
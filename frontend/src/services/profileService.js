@@ -1,10 +1,17 @@
 import api from './api';
 
 const AUTH_BASE = '/api/v1/auth';
+const PHARMACY_BASE = '/api/v1/pharmacies';
 
 export const profileService = {
   getProfile: async () => {
     const response = await api.get(`${AUTH_BASE}/profile`);
     return response.data;
   },
+
+  // Compteurs du tableau de bord (documents, non lus, codes actifs) et quotas
+  getStats: async () => {
+    const response = await api.get(`${PHARMACY_BASE}/me/stats`);
+    return response.data;
+  },
 };